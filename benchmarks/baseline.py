@@ -0,0 +1,54 @@
+"""Stored benchmark baselines and regression checks.
+
+Baselines live in ``benchmarks/baselines.json`` keyed by benchmark name (which
+encodes its scale, e.g. ``pipeline-200000``), each with the machine it was
+recorded on. Metrics ending in ``_per_s`` are throughputs (higher is better);
+everything else is a time (lower is better). A metric regresses when it is
+worse than the baseline by more than ``BENCH_TOLERANCE`` (default 1.5x).
+"""
+import json
+import os
+import platform
+import time
+from pathlib import Path
+
+PATH = Path(__file__).with_name("baselines.json")
+
+
+def machine() -> dict:
+    return {"python": platform.python_version(), "cpus": os.cpu_count(), "arch": platform.machine()}
+
+
+def load(path: Path = PATH) -> dict:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def save(name: str, metrics: dict, path: Path = PATH):
+    data = load(path)
+    data[name] = {"metrics": metrics, "machine": machine(),
+                  "recorded_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+    print(f"[Bench] saved baseline '{name}' to {path.name}")
+
+
+def compare(name: str, metrics: dict, tolerance: float | None = None, path: Path = PATH) -> list:
+    """Print current vs baseline per metric; returns the names of regressed metrics."""
+    tolerance = tolerance or float(os.getenv("BENCH_TOLERANCE", "1.5"))
+    base = load(path).get(name)
+    if base is None:
+        print(f"[Bench] no baseline '{name}' yet (run with --save-baseline)")
+        return []
+    if base["machine"].get("cpus") != os.cpu_count():
+        print(f"[WARN] baseline '{name}' was recorded on {base['machine'].get('cpus')} CPUs, this machine has {os.cpu_count()}")
+    regressed = []
+    for key, value in metrics.items():
+        ref = base["metrics"].get(key)
+        if not ref or value is None:
+            continue
+        # ratio > 1 means worse, whichever direction the metric runs
+        ratio = ref / value if key.endswith("_per_s") else value / ref
+        flag = "REGRESSION" if ratio > tolerance else "ok"
+        if ratio > tolerance:
+            regressed.append(key)
+        print(f"[Bench] {key:<28} {value:>12.4g} baseline={ref:<10.4g} x{ratio:.2f} {flag}")
+    return regressed
@@ -0,0 +1,90 @@
+"""Categorical encodings: fit time, model width/size and scoring latency.
+
+    python -m benchmarks.bench_encoding        # BENCH_ROWS=200000, BENCH_SOC=800 by default
+
+Synthetic rows with ``BENCH_SOC`` distinct SOC codes (Zipf-distributed, like
+a full-year disclosure file) are fitted with each encoding from
+``configs/training.yaml``; the pipeline is timed on single-row and 1000-row
+``predict_proba`` calls and the compiled scorer on single rows.
+"""
+import io
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score
+
+from src.models.compiled import compile_pipeline
+from src.models.train import build_pipeline
+from src.serving.scoring import CompiledScorer
+
+NUM = ["WAGE_RATE"]
+CAT = ["FULL_TIME_POSITION", "EMPLOYER_STATE", "WORKSITE_STATE", "SOC_CODE"]
+STATES = ["CA", "TX", "WA", "NY", "MA", "NJ", "IL", "GA", "FL", "PA", "NC", "VA", "OH", "MI", "AZ"]
+
+ENCODINGS = {
+    "onehot": {"method": "onehot"},
+    "capped": {"method": "capped", "min_frequency": 20, "max_categories": 100},
+    "hashing": {"method": "hashing", "hash_features": 256},
+    "soc_major": {"method": "onehot", "rollup": {"SOC_CODE": 2}},
+}
+
+
+def make_frame(rows: int, n_soc: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    codes = np.array([f"{11 + i % 43:02d}-{1000 + i:04d}" for i in range(n_soc)])
+    weights = 1.0 / np.arange(1, n_soc + 1)
+    soc = rng.choice(codes, rows, p=weights / weights.sum())
+    df = pd.DataFrame({
+        "FULL_TIME_POSITION": rng.choice(["Y", "N"], rows, p=[0.85, 0.15]),
+        "EMPLOYER_STATE": rng.choice(STATES, rows),
+        "WORKSITE_STATE": rng.choice(STATES, rows),
+        "SOC_CODE": soc,
+        "WAGE_RATE": rng.lognormal(11.4, 0.35, rows),
+    })
+    major = pd.Series(soc).str[:2].astype(int).to_numpy()
+    logit = (df["WAGE_RATE"].to_numpy() - 90000) / 20000 + (major % 5 - 2) * 0.4 + (df["FULL_TIME_POSITION"] == "Y") * 0.8
+    df["CASE_STATUS_BIN"] = (rng.random(rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return df
+
+
+def _timeit(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def main():
+    rows = int(os.getenv("BENCH_ROWS", "200000"))
+    n_soc = int(os.getenv("BENCH_SOC", "800"))
+    train, test = make_frame(rows, n_soc, seed=0), make_frame(20000, n_soc, seed=1)
+    y = train.pop("CASE_STATUS_BIN")
+    y_test = test.pop("CASE_STATUS_BIN")
+    row = test.iloc[[0]]
+    records = test.head(1000).to_dict(orient="records")
+
+    for name, enc in ENCODINGS.items():
+        pipe = build_pipeline(NUM, CAT, enc)
+        t0 = time.perf_counter()
+        pipe.fit(train, y)
+        fit_s = time.perf_counter() - t0
+        width = pipe.named_steps["clf"].coef_.shape[1]
+        buf = io.BytesIO()
+        joblib.dump({"model": pipe}, buf)
+        compiled = compile_pipeline(pipe, NUM, CAT)
+        scorer = CompiledScorer(compiled)
+        f1 = f1_score(y_test, pipe.predict(test))
+        one = _timeit(lambda: pipe.predict_proba(row), 200)
+        batch = _timeit(lambda: pipe.predict_proba(test.head(1000)), 20)
+        comp = _timeit(lambda: scorer.proba_many(records), 20) / len(records)
+        print(f"[Bench] {name:<9} fit={fit_s:.2f}s width={width} joblib={buf.tell() / 1024:.0f}KB "
+              f"compiled={len(json.dumps(compiled)) / 1024:.0f}KB f1={f1:.3f} "
+              f"pipeline_1row={one * 1e3:.2f}ms pipeline_1000rows={batch * 1e3:.1f}ms compiled_row={comp * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Wall time of every ``make all`` stage on scaled synthetic data.
+
+    python -m benchmarks.bench_pipeline                  # BENCH_ROWS=200000 by default
+    python -m benchmarks.bench_pipeline --save-baseline  # record benchmarks/baselines.json
+    python -m benchmarks.bench_pipeline --check          # exit 1 on a regression
+
+``src/`` and ``configs/`` are copied into a scratch directory, so the real
+``data/``, ``artifacts/`` and ``mlruns/`` are left alone. Rows from
+``make_scaled_dataset`` are written as a raw disclosure-style CSV and served
+from a local HTTP server, so ingest times the download plus streamed
+normalization. Every stage then runs as ``make`` runs it, in a fresh
+interpreter.
+"""
+import argparse
+import functools
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from benchmarks import baseline
+from src.data.ingest import make_scaled_dataset
+
+ROOT = Path(__file__).resolve().parents[1]
+STAGES = [
+    ("ingest", "src.data.ingest"),
+    ("validate", "src.data.validate"),
+    ("features", "src.features.build_features"),
+    ("train", "src.models.train"),
+    ("eval", "src.models.evaluate"),
+    ("report", "src.monitoring.generate_report"),
+]
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def write_raw_csv(path: Path, rows: int, seed: int = 0):
+    """``make_scaled_dataset`` rows in the shape of a disclosure file (mixed case, "$" wages, undashed SOC)."""
+    df = make_scaled_dataset(rows, seed=seed)
+    raw = df.rename(columns={"WAGE_RATE": "WAGE_RATE_OF_PAY"})
+    raw["CASE_STATUS"] = raw["CASE_STATUS"].str.title()
+    raw["SOC_CODE"] = raw["SOC_CODE"].str.replace("-", "", regex=False)
+    raw["WAGE_RATE_OF_PAY"] = "$" + raw["WAGE_RATE_OF_PAY"].map("{:,.2f}".format)
+    raw["WAGE_UNIT_OF_PAY"] = "Year"
+    raw.to_csv(path, index=False)
+
+
+def run_stages(work: Path, url: str, stages=STAGES) -> dict:
+    env = {**os.environ, "LCA_URL": url, "INGEST_STREAM": "1", "MAX_ROWS": "0", "PYTHONPATH": str(work)}
+    out = {}
+    for name, module in stages:
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-m", module], cwd=work, env=env, capture_output=True, text=True)
+        out[f"{name}_s"] = time.perf_counter() - t0
+        # validate exits 2 on data-quality failures; the pipeline (and CI) carry on regardless
+        if proc.returncode not in (0, 2 if name == "validate" else 0):
+            sys.stderr.write(proc.stdout[-2000:] + proc.stderr[-2000:])
+            raise SystemExit(f"[Bench] stage {name} failed with exit code {proc.returncode}")
+        print(f"[Bench] {name:<9} {out[f'{name}_s']:.2f}s")
+    out["total_s"] = sum(out.values())
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.bench_pipeline")
+    ap.add_argument("--rows", type=int, default=int(os.getenv("BENCH_ROWS", "200000")))
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true", help="exit 1 if a stage regressed against the baseline")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-pipeline-") as tmp:
+        work, serve = Path(tmp) / "repo", Path(tmp) / "serve"
+        for sub in ("src", "configs"):
+            shutil.copytree(ROOT / sub, work / sub, ignore=shutil.ignore_patterns("__pycache__"))
+        serve.mkdir()
+        t0 = time.perf_counter()
+        write_raw_csv(serve / "lca_bench.csv", args.rows)
+        print(f"[Bench] generated {args.rows} raw rows in {time.perf_counter() - t0:.2f}s")
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(serve)))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            metrics = run_stages(work, f"http://127.0.0.1:{server.server_port}/lca_bench.csv")
+        finally:
+            server.shutdown()
+
+    metrics["ingest_rows_per_s"] = args.rows / metrics["ingest_s"]
+    print(f"[Bench] pipeline rows={args.rows} total={metrics['total_s']:.2f}s")
+    name = f"pipeline-{args.rows}"
+    regressed = baseline.compare(name, metrics)
+    if args.save_baseline:
+        baseline.save(name, metrics)
+    if args.check and regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""In-process load test of the serving app.
+
+    python -m benchmarks.bench_serving                  # BENCH_REQUESTS=3000, BENCH_CONCURRENCY=16
+    python -m benchmarks.bench_serving --save-baseline  # record benchmarks/baselines.json
+    python -m benchmarks.bench_serving --check          # exit 1 on a regression
+
+Requests go through the whole ASGI stack (middleware, validation, scoring and
+the result cache) via httpx's ``ASGITransport``, so only the socket and
+server loop are left out. ``/predict`` gets single payloads drawn from
+``make_scaled_dataset`` and ``/predict/batch`` gets 100-row batches.
+Latency p50/p95/p99 and req/s are reported per endpoint. The model comes from
+``artifacts/`` and ``SCORER``, ``MICROBATCH`` and ``PREDICT_CACHE_*`` are read
+from the environment as usual.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks import baseline
+from src.data.ingest import make_scaled_dataset
+
+ROOT = Path(__file__).resolve().parents[1]
+FEATURES = ["FULL_TIME_POSITION", "EMPLOYER_STATE", "WORKSITE_STATE", "SOC_CODE", "WAGE_RATE"]
+
+
+def _payloads(n: int, seed: int = 0) -> list:
+    return make_scaled_dataset(n, seed=seed)[FEATURES].to_dict("records")
+
+
+async def drive(client, path: str, bodies: list, requests: int, concurrency: int) -> dict:
+    """Send ``requests`` POSTs from ``concurrency`` workers; returns latency percentiles and req/s."""
+    latencies = []
+    todo = iter(range(requests))
+
+    async def worker():
+        for i in todo:
+            t0 = time.perf_counter()
+            r = await client.post(path, json=bodies[i % len(bodies)])
+            latencies.append(time.perf_counter() - t0)
+            if r.status_code != 200:
+                raise RuntimeError(f"{path} returned {r.status_code}: {r.text[:200]}")
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "req_per_s": requests / wall}
+
+
+async def run(requests: int, concurrency: int) -> tuple:
+    from src.serving import app as serving_app
+
+    serving_app.startup()
+    if serving_app._model is None:
+        raise SystemExit("[Bench] no loadable model in artifacts/; run `python -m src.models.train` first")
+    rows = _payloads(1000)
+    batches = [rows[i:i + 100] for i in range(0, len(rows), 100)]
+    transport = httpx.ASGITransport(app=serving_app.app)
+    out = {}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await drive(client, "/predict", rows, 50, 4)  # warm-up
+            for name, path, bodies, n in [("predict", "/predict", rows, requests),
+                                          ("batch", "/predict/batch", batches, max(1, requests // 10))]:
+                stats = await drive(client, path, bodies, n, concurrency)
+                print(f"[Bench] {path:<15} n={n} c={concurrency} p50={stats['p50_ms']:.2f}ms "
+                      f"p95={stats['p95_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms {stats['req_per_s']:,.0f} req/s")
+                out.update({f"{name}_{k}": v for k, v in stats.items()})
+    finally:
+        await serving_app.shutdown()
+    return out, serving_app._model.kind
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.bench_serving")
+    ap.add_argument("--requests", type=int, default=int(os.getenv("BENCH_REQUESTS", "3000")))
+    ap.add_argument("--concurrency", type=int, default=int(os.getenv("BENCH_CONCURRENCY", "16")))
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true", help="exit 1 if a metric regressed against the baseline")
+    args = ap.parse_args()
+
+    os.environ.setdefault("MODEL_PATH", str(ROOT / "artifacts" / "model.joblib"))
+    os.environ.setdefault("COMPILED_MODEL_PATH", str(ROOT / "artifacts" / "model_compiled.json"))
+    os.environ.setdefault("VERSION_PATH", str(ROOT / "artifacts" / "version.json"))
+    metrics, kind = asyncio.run(run(args.requests, args.concurrency))
+
+    name = f"serving-{kind}-c{args.concurrency}"
+    regressed = baseline.compare(name, metrics)
+    if args.save_baseline:
+        baseline.save(name, metrics)
+    if args.check and regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Cold-start time of the Space app: interpreter + imports + model load.
+
+    python -m benchmarks.bench_startup        # BENCH_REPEAT=5 fresh processes per scorer
+
+Each run starts a new interpreter in ``serving/`` (as the container does),
+imports ``app`` and calls its startup hook, reporting the median import
+time, model load time and total wall time for the compiled scorer and for
+the joblib pipeline, plus the artifact sizes.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVING = Path(__file__).resolve().parents[1] / "serving"
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.startup()
+t2 = time.perf_counter()
+heavy = [m for m in ("pandas", "numpy", "sklearn", "joblib") if m in sys.modules]
+print(json.dumps({"import": t1 - t0, "load": t2 - t1, "kind": getattr(app._model, "kind", None), "heavy": heavy}))
+"""
+
+
+def run_once(scorer: str, log_dir: str) -> dict:
+    env = {**os.environ, "SCORER": scorer,
+           "MODEL_PATH": str(SERVING / "model.joblib"),
+           "COMPILED_MODEL_PATH": str(SERVING / "model_compiled.json"),
+           "INFERENCE_LOG_PATH": str(Path(log_dir) / "inference_log.jsonl")}
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=SERVING, env=env,
+                         capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["wall"] = time.perf_counter() - t0
+    return result
+
+
+def main():
+    repeat = int(os.getenv("BENCH_REPEAT", "5"))
+    for name in ("model_compiled.json", "model.joblib"):
+        p = SERVING / name
+        if p.exists():
+            print(f"[Bench] artifact {name}: {p.stat().st_size / 1024:.1f}KB")
+    with tempfile.TemporaryDirectory() as log_dir:
+        for scorer in ("compiled", "pipeline"):
+            runs = [run_once(scorer, log_dir) for _ in range(repeat)]
+            med = {k: statistics.median(r[k] for r in runs) for k in ("import", "load", "wall")}
+            print(f"[Bench] startup scorer={scorer} import={med['import']:.3f}s load={med['load']:.3f}s "
+                  f"wall={med['wall']:.3f}s heavy_modules={runs[0]['heavy'] or 'none'} (median of {repeat})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Row-wise vs vectorized wage-parsing fallback in ``normalize_columns``.
+
+    python -m benchmarks.bench_wage_parsing        # BENCH_ROWS=50000 by default
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data.ingest import _parse_wage_cols, _parse_wage_frame
+
+VALUES = ["$120,000.00", "95000", "", "45.50", "n/a", "85000 - 90000", "102,500"]
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "CASE_NUMBER": [f"I-200-{i:08d}" for i in range(rows)],
+        "EMPLOYER_NAME": rng.choice(["ACME CORP", "GLOBEX", "INITECH"], rows),
+        "WAGE_RATE_OF_PAY_FROM": rng.choice(VALUES, rows),
+        "WAGE_RATE_OF_PAY_TO": rng.choice(VALUES, rows),
+        "PREVAILING_WAGE_1": rng.choice(VALUES, rows),
+    })
+
+
+def main():
+    rows = int(os.getenv("BENCH_ROWS", "50000"))
+    df = make_frame(rows)
+
+    t0 = time.perf_counter()
+    old = df.apply(_parse_wage_cols, axis=1)
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = _parse_wage_frame(df)
+    t_new = time.perf_counter() - t0
+
+    pd.testing.assert_series_equal(new, old, check_names=False)
+    print(f"[Bench] wage fallback rows={rows} rowwise={t_old:.3f}s vectorized={t_new:.3f}s speedup={t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Keeps the repository root importable (``import src...``) when running ``pytest`` directly.
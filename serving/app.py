@@ -1,13 +1,21 @@
 import os
-import json 
+import time
 from pathlib import Path
 
-import joblib
-import pandas as pd
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
+
+from batching import MicroBatcher
+from inference_log import InferenceLogWriter
+from metrics import CONTENT_TYPE, MetricsMiddleware, ServingMetrics
+from model_store import ModelStore
+from result_cache import ResultCache
+from scoring import load_scorer, parse_batch
 
 BASE_DIR = Path(__file__).resolve().parent
 ENV_CANDIDATES = [
@@ -21,7 +29,23 @@ for candidate in ENV_CANDIDATES:
 else:
     load_dotenv()
 
+VER_PATH = os.getenv("VERSION_PATH", "version.json")
 MODEL_PATH = os.getenv("MODEL_PATH", "artifacts/model.joblib")
+COMPILED_MODEL_PATH = os.getenv("COMPILED_MODEL_PATH", "artifacts/model_compiled.json")
+SCORER = os.getenv("SCORER", "auto").lower()  # auto | compiled | pipeline
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+MICROBATCH = os.getenv("MICROBATCH", "0").lower() in ("1", "true", "yes")
+MICROBATCH_WAIT_MS = float(os.getenv("MICROBATCH_WAIT_MS", "2"))
+MICROBATCH_MAX_ROWS = int(os.getenv("MICROBATCH_MAX_ROWS", "256"))
+MODEL_RELOAD_S = float(os.getenv("MODEL_RELOAD_S", "0"))  # 0 = load once at startup
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "10000"))  # 0 disables the result cache
+PREDICT_CACHE_TTL_S = float(os.getenv("PREDICT_CACHE_TTL_S", "3600"))  # 0 = no expiry
+PREDICT_CACHE_WAGE_BUCKET = float(os.getenv("PREDICT_CACHE_WAGE_BUCKET", "0"))  # 0 = exact WAGE_RATE
+INFERENCE_LOG_PATH = os.getenv("INFERENCE_LOG_PATH", "inference_log.jsonl")
+INFERENCE_LOG_QUEUE = int(os.getenv("INFERENCE_LOG_QUEUE", "10000"))
+INFERENCE_LOG_MAX_MB = float(os.getenv("INFERENCE_LOG_MAX_MB", "50"))
+INFERENCE_LOG_ROTATE_S = float(os.getenv("INFERENCE_LOG_ROTATE_S", "0"))  # 0 = size-based only
+INFERENCE_LOG_GZIP = os.getenv("INFERENCE_LOG_GZIP", "0").lower() in ("1", "true", "yes")
 
 app = FastAPI(title="Visa LCA Classifier (Demo)")
 app.add_middleware(
@@ -31,6 +55,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+METRICS = ServingMetrics()
+app.add_middleware(MetricsMiddleware, metrics=METRICS,
+                   paths=("/predict", "/predict/batch", "/health", "/version", "/metrics"))
 
 class RequestPayload(BaseModel):
     FULL_TIME_POSITION: str = Field(..., description="Y/N")
@@ -39,38 +66,183 @@ class RequestPayload(BaseModel):
     SOC_CODE: str
     WAGE_RATE: float
 
+_PAYLOAD_BODY = {"requestBody": {"required": True, "content": {
+    "application/json": {"schema": RequestPayload.model_json_schema()}}}}
+
+# canned row scored by a freshly loaded model before it takes traffic
+_WARMUP_ROW = {"FULL_TIME_POSITION": "Y", "EMPLOYER_STATE": "CA", "WORKSITE_STATE": "CA",
+               "SOC_CODE": "15-1252", "WAGE_RATE": 100000.0}
+
 _model = None
+_store = None
+_cache = ResultCache(PREDICT_CACHE_SIZE, PREDICT_CACHE_TTL_S, PREDICT_CACHE_WAGE_BUCKET)
+_batcher = None
+_inference_log = None
 
 @app.on_event("startup")
 def startup():
-    global _model
-    if os.path.exists(MODEL_PATH):
-        _model = joblib.load(MODEL_PATH).get("model")
+    global _store, _batcher, _inference_log
+    _store = ModelStore(lambda: load_scorer(MODEL_PATH, COMPILED_MODEL_PATH, SCORER),
+                        [COMPILED_MODEL_PATH, MODEL_PATH], VER_PATH, _WARMUP_ROW, MODEL_RELOAD_S, _swap)
+    _store.reload(force=True)
+    # with MODEL_RELOAD_S set, a daemon thread republishes retrained artifacts
+    _store.start()
+    if MICROBATCH:
+        # coalesce concurrent /predict calls into one proba_many call
+        _batcher = MicroBatcher(_score, MICROBATCH_MAX_ROWS, MICROBATCH_WAIT_MS)
+    _inference_log = InferenceLogWriter(
+        INFERENCE_LOG_PATH,
+        max_queue=INFERENCE_LOG_QUEUE,
+        max_bytes=int(INFERENCE_LOG_MAX_MB * 1024 * 1024),
+        rotate_interval=INFERENCE_LOG_ROTATE_S,
+        compress=INFERENCE_LOG_GZIP,
+    ).start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    if _store is not None:
+        _store.close()
+    if _batcher is not None:
+        await _batcher.aclose()
+    if _inference_log is not None:
+        await run_in_threadpool(_inference_log.close)
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "model_loaded": _model is not None}
+    out = {"status": "ok", "model_loaded": _model is not None}
+    if _store is not None:
+        out["model"] = _store.stats()
+    if _cache.enabled:
+        out["cache"] = _cache.stats()
+    if _batcher is not None:
+        out["batcher"] = _batcher.stats()
+    if _inference_log is not None:
+        out["inference_log"] = _inference_log.stats()
+    return out
+
+@app.get("/version")
+def version():
+    # cached on every swap instead of re-reading version.json per call
+    # empty until a model has loaded
+    return (_store.version if _store is not None else None) or {"trained_at_utc": None, "f1": None}
+
+@app.get("/metrics")
+def metrics():
+    return Response(METRICS.render(), media_type=CONTENT_TYPE)
+
+@app.post("/predict", openapi_extra=_PAYLOAD_BODY)
+async def predict(request: Request):
+    # validated by hand (not as a typed parameter) so validation time is measurable
+    req = _validate(await _json_body(request), "/predict")
+    if _model is None:
+        return {"error": "Model not loaded. Train first."}
+    if _batcher is not None:
+        proba = await _batcher.submit(req)
+    else:
+        proba = (await run_in_threadpool(_score, [req]))[0]
+
+    result = _result(proba)
+    _log_inference([(req, result["label"], proba)])
+    return result
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    """Score a JSON array (or NDJSON body) of payloads in one model call.
 
-@app.post("/predict")
-def predict(p: RequestPayload):
+    Results come back in input order; rows that fail validation get an
+    ``error`` entry instead of a prediction and do not fail the batch.
+    """
     if _model is None:
         return {"error": "Model not loaded. Train first."}
-    df = pd.DataFrame([p.dict()])
-    proba = _model.predict_proba(df)[0, 1]
+    try:
+        rows = parse_batch(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}")
+    if len(rows) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch of {len(rows)} rows exceeds MAX_BATCH_SIZE={MAX_BATCH_SIZE}.")
+    return await run_in_threadpool(_score_batch, rows)
 
-    result = {
+def _result(proba):
+    return {
         "label": "CERTIFIED" if proba >= 0.5 else "DENIED",
         "proba_certified": round(float(proba), 4)
     }
 
+def _score(rows):
+    model = _model  # one snapshot per call, so a concurrent swap cannot split a batch
+    if not _cache.active(model):
+        return _score_model(model, rows)
+    keys = [_cache.key(r) for r in rows]
+    probas = _cache.get_many(model, keys)
+    miss = [i for i, p in enumerate(probas) if p is None]
+    METRICS.cache_lookups.inc("hit", amount=len(rows) - len(miss))
+    METRICS.cache_lookups.inc("miss", amount=len(miss))
+    if miss:
+        for i, p in zip(miss, _score_model(model, [rows[i] for i in miss])):
+            probas[i] = p
+        evicted = _cache.put_many(model, [(keys[i], probas[i]) for i in miss])
+        if evicted:
+            METRICS.cache_evictions.inc(amount=evicted)
+    return probas
+
+def _score_model(model, rows):
+    probas, timings = model.proba_many_timed(rows)
+    METRICS.observe_scoring(model.kind, len(rows), timings)
+    return probas
+
+def _swap(model, previous, seconds):
+    global _model
+    _cache.reset(model)  # results from the previous model must not be served
+    _model = model
+    METRICS.model_load.set(seconds)
+    if previous is not None:
+        METRICS.model_loaded.set(0, previous.kind)
+        METRICS.model_reloads.inc()
+    if model is not None:
+        METRICS.model_loaded.set(1, model.kind)
+    METRICS.model_generation.set(_store.generation)
+
+async def _json_body(request: Request):
     try:
-        with open("inference_log.jsonl", "a", encoding="utf-8") as f:
-            f.write(json.dumps({
-                "req": p.dict(),
-                "pred": result["label"],
-                "proba": float(proba)
-            }) + "\n")
-    except Exception:
-        pass
+        return await request.json()
+    except ValueError:
+        raise RequestValidationError([{"type": "json_invalid", "loc": ("body",), "msg": "JSON decode error", "input": {}}])
 
-    return result
+def _validate(body, path):
+    t0 = time.perf_counter()
+    try:
+        return RequestPayload.model_validate(body).dict()
+    except ValidationError as e:
+        METRICS.validation_errors.inc(path)
+        raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)])
+    finally:
+        METRICS.validation.observe(time.perf_counter() - t0, path)
+
+def _score_batch(rows):
+    results, valid = [None] * len(rows), []
+    t0 = time.perf_counter()
+    for i, row in enumerate(rows):
+        try:
+            valid.append((i, RequestPayload.model_validate(row).dict()))
+        except ValidationError as e:
+            results[i] = {"error": e.errors(include_url=False, include_context=False)}
+    METRICS.validation.observe(time.perf_counter() - t0, "/predict/batch")
+    if len(valid) < len(rows):
+        METRICS.validation_errors.inc("/predict/batch", amount=len(rows) - len(valid))
+    probas = _score([req for _, req in valid])
+    for (i, req), proba in zip(valid, probas):
+        results[i] = _result(proba)
+    _log_inference([(req, results[i]["label"], proba) for (i, req), proba in zip(valid, probas)])
+    return {"results": results, "n_ok": len(valid), "n_errors": len(rows) - len(valid)}
+
+def _log_inference(records):
+    # enqueue only; serialisation and file I/O happen on the writer thread
+    if _inference_log is None:
+        return
+    for req, label, proba in records:
+        _inference_log.log({
+            "req": req,
+            "pred": label,
+            "proba": float(proba),
+            "ts": time.time()
+        })
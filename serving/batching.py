@@ -0,0 +1,79 @@
+"""Asyncio micro-batcher that coalesces concurrent single-row predictions.
+
+Requests arriving within ``max_wait_ms`` of each other (up to ``max_batch``
+rows) are scored together with one ``score_many`` call on a worker thread and
+the probabilities are fanned back to the waiting coroutines.
+
+Copied verbatim into ``serving/`` for the Space image (standard library only).
+"""
+import asyncio
+
+
+class MicroBatcher:
+    def __init__(self, score_many, max_batch: int = 256, max_wait_ms: float = 2.0):
+        self._score_many = score_many
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self.batches = 0
+        self.rows = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            # (re)bind to the running loop, e.g. after a server or TestClient restart
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, row: dict) -> float:
+        self._ensure_started()
+        fut = self._loop.create_future()
+        self._queue.put_nowait((row, fut))
+        return await fut
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            if self.max_wait and queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                probas = await self._loop.run_in_executor(None, self._score_many, [row for row, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), proba in zip(batch, probas):
+                if not fut.done():
+                    fut.set_result(proba)
+
+            self.batches += 1
+            self.rows += len(batch)
+            self.last_batch_size = len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch_size": round(self.rows / self.batches, 2) if self.batches else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.max_wait * 1000.0,
+            "max_batch": self.max_batch,
+        }
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,138 @@
+"""Background, buffered writer for the serving inference log (JSON lines).
+
+Request handlers only enqueue a dict; a daemon thread serialises records,
+writes them in batches and rotates the file by size and/or age, optionally
+gzipping rotated segments. When the bounded queue is full the record is
+dropped and counted instead of blocking the request.
+
+Copied verbatim into ``serving/`` for the Space image (standard library only).
+"""
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+
+_STOP = object()
+
+
+class InferenceLogWriter:
+    def __init__(self, path, max_queue: int = 10000, flush_interval: float = 1.0,
+                 max_bytes: int = 50 * 1024 * 1024, rotate_interval: float = 0.0,
+                 compress: bool = False, batch_size: int = 1000):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.compress = compress
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._opened_at = time.time()
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self.errors = 0
+        self._reported_dropped = 0
+        self._drop_lock = threading.Lock()  # log() runs on many request threads
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="inference-log", daemon=True)
+            self._thread.start()
+        return self
+
+    def log(self, record: dict) -> bool:
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 5.0):
+        if self._thread is not None:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._drop_lock:
+            dropped = self.dropped
+        return {
+            "queue_depth": self._queue.qsize(),
+            "written": self.written,
+            "dropped": dropped,
+            "rotations": self.rotations,
+            "errors": self.errors,
+        }
+
+    def _run(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self._opened_at = self.path.stat().st_mtime
+        stop = False
+        while not stop:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if any(r is _STOP for r in batch):
+                batch = [r for r in batch if r is not _STOP]
+                stop = True
+            if batch:
+                self._write(batch)
+            self._maybe_rotate()
+            with self._drop_lock:
+                dropped = self.dropped
+            if dropped != self._reported_dropped:
+                print(f"[InferenceLog] queue full; dropped {dropped - self._reported_dropped} records")
+                self._reported_dropped = dropped
+
+    def _write(self, batch):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r) + "\n" for r in batch))
+            self.written += len(batch)
+        except Exception as e:
+            self.errors += 1
+            print(f"[InferenceLog] write failed: {e}")
+
+    def _maybe_rotate(self):
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        too_big = self.max_bytes and size >= self.max_bytes
+        too_old = self.rotate_interval and size and time.time() - self._opened_at >= self.rotate_interval
+        if not (too_big or too_old):
+            return
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        dest = self.path.with_name(f"{self.path.name}.{stamp}")
+        n = 1
+        while dest.exists() or dest.with_name(dest.name + ".gz").exists():
+            dest = self.path.with_name(f"{self.path.name}.{stamp}-{n}")
+            n += 1
+        try:
+            os.replace(self.path, dest)
+            if self.compress:
+                with open(dest, "rb") as src, gzip.open(str(dest) + ".gz", "wb") as gz:
+                    shutil.copyfileobj(src, gz)
+                dest.unlink()
+            self.rotations += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"[InferenceLog] rotation failed: {e}")
+        self._opened_at = time.time()
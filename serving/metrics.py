@@ -0,0 +1,184 @@
+"""In-process Prometheus metrics for the serving apps.
+
+Counters, gauges and fixed-bucket histograms are plain Python lists guarded
+by one lock each. An observation costs a ``bisect`` and two additions, so
+instrumenting the hot path stays in the low microseconds. ``/metrics``
+renders the text exposition format (version 0.0.4) on demand.
+``MetricsMiddleware`` is a bare ASGI wrapper that times every HTTP request
+end to end.
+
+Copied verbatim into ``serving/`` for the Space image (standard library only).
+"""
+import bisect
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; dense below 10 ms where the compiled scorer lives
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _fmt_labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        for key, v in sorted(self._series.items()):
+            lines.append(f"{self.name}{_fmt_labels(self.labels, key)} {_fmt_value(v)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._series[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            series = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        for key, (counts, total, n) in series:
+            cum = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cum += c
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, [('le', _fmt_value(bound))])} {cum}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self.add(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()) -> Gauge:
+        return self.add(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.add(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        return "\n".join(line for m in self._metrics for line in m.render()) + "\n"
+
+
+class ServingMetrics:
+    """The metric set shared by both serving apps."""
+
+    def __init__(self):
+        r = self.registry = Registry()
+        self.requests = r.counter("visa_requests_total", "HTTP requests by path, method and status.",
+                                  ("path", "method", "status"))
+        self.errors = r.counter("visa_request_errors_total", "HTTP requests that ended in a 4xx/5xx or raised.",
+                                ("path", "status"))
+        self.latency = r.histogram("visa_request_duration_seconds", "End-to-end HTTP request latency.",
+                                   ("path", "method"))
+        self.validation = r.histogram("visa_validation_duration_seconds", "Payload validation time per request.",
+                                      ("path",))
+        self.validation_errors = r.counter("visa_validation_errors_total", "Rows rejected by payload validation.",
+                                           ("path",))
+        self.transform = r.histogram("visa_transform_duration_seconds",
+                                     "Model input transform time per scoring call.", ("scorer",))
+        self.predict = r.histogram("visa_predict_proba_duration_seconds",
+                                   "predict_proba time per scoring call.", ("scorer",))
+        self.rows = r.counter("visa_rows_scored_total", "Rows scored by the model.", ("scorer",))
+        self.model_load = r.gauge("visa_model_load_seconds", "Time taken to load and warm the current model.")
+        self.model_loaded = r.gauge("visa_model_loaded", "1 if a model is loaded.", ("scorer",))
+        self.cache_lookups = r.counter("visa_prediction_cache_lookups_total",
+                                       "Prediction cache lookups by result (hit or miss).", ("result",))
+        self.cache_evictions = r.counter("visa_prediction_cache_evictions_total",
+                                         "Prediction cache entries evicted by the LRU size bound.")
+        self.model_generation = r.gauge("visa_model_generation", "Number of models published since startup.")
+        self.model_reloads = r.counter("visa_model_reloads_total", "Hot reloads of the model after startup.")
+
+    def observe_scoring(self, kind: str, n: int, timings: dict):
+        if "transform" in timings:
+            self.transform.observe(timings["transform"], kind)
+        self.predict.observe(timings["predict_proba"], kind)
+        self.rows.inc(kind, amount=n)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count, errors and end-to-end latency."""
+
+    def __init__(self, app, metrics: ServingMetrics, paths=()):
+        self.app, self.metrics, self.paths = app, metrics, frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        status = [500]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            # unknown paths share one label so scans cannot blow up cardinality
+            path = scope["path"] if scope["path"] in self.paths else "other"
+            code = str(status[0])
+            self.metrics.latency.observe(time.perf_counter() - t0, path, scope["method"])
+            self.metrics.requests.inc(path, scope["method"], code)
+            if status[0] >= 400:
+                self.metrics.errors.inc(path, code)
@@ -0,0 +1,120 @@
+"""Hot-reloadable holder for the serving model and its version metadata.
+
+``ModelStore`` fingerprints the model artifacts (path, mtime, size) and, when
+they change, loads the new scorer on the caller's (or its poll) thread, warms
+it with a canned payload and only then publishes it. Publishing is a single
+attribute assignment, so requests already holding the previous scorer finish
+on it and new requests pick up the new one. A failed or half-written artifact
+keeps the current model and is retried on the next poll, and so does a
+loader that finds nothing to load (returns None). ``version.json`` is
+read once per swap and served from memory.
+
+Copied verbatim into ``serving/`` for the Space image (standard library only).
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class ModelStore:
+    def __init__(self, loader, paths, version_path=None, warmup_row=None,
+                 poll_interval: float = 0.0, on_swap=None):
+        self._loader = loader
+        self.paths = [p for p in paths if p]
+        self.version_path = version_path
+        self.warmup_row = warmup_row
+        self.poll_interval = float(poll_interval)
+        self._on_swap = on_swap
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._fingerprint = None
+        self.model = None
+        self.version = {}
+        self.generation = 0
+        self.reloads = 0
+        self.failures = 0
+        self.loaded_at = None
+        self.last_error = None
+
+    def fingerprint(self) -> tuple:
+        out = []
+        for p in self.paths + ([self.version_path] if self.version_path else []):
+            try:
+                st = os.stat(p)
+                out.append((p, st.st_mtime_ns, st.st_size))
+            except OSError:
+                out.append((p, None, None))
+        return tuple(out)
+
+    def _read_version(self) -> dict:
+        try:
+            with open(self.version_path) as f:
+                return json.load(f)
+        except (OSError, TypeError, ValueError):
+            return {"trained_at_utc": None, "f1": None}
+
+    def reload(self, force: bool = False) -> bool:
+        """Load, warm and publish the artifacts if they changed; returns True on a swap."""
+        with self._lock:
+            fp = self.fingerprint()
+            if not force and fp == self._fingerprint:
+                return False
+            t0 = time.perf_counter()
+            try:
+                model = self._loader()
+                if model is None:
+                    raise FileNotFoundError(f"no loadable model artifact among {self.paths}")
+                if self.warmup_row is not None:
+                    model.proba_many([self.warmup_row])
+            except Exception as e:
+                # keep serving the current model; the next poll retries
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                log.warning("model reload failed (%s); keeping generation %d", self.last_error, self.generation)
+                return False
+            version = self._read_version()
+            previous = self.model
+            self.model, self.version = model, version
+            self._fingerprint = fp
+            self.generation += 1
+            self.loaded_at = time.time()
+            self.last_error = None
+            if self.generation > 1:
+                self.reloads += 1
+                print(f"[Serve] model reloaded (generation {self.generation}, "
+                      f"trained_at_utc={version.get('trained_at_utc')})")
+            if self._on_swap is not None:
+                self._on_swap(model, previous, time.perf_counter() - t0)
+            return True
+
+    def start(self):
+        if self.poll_interval > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-reload", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, timeout: float = 5.0):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.reload()
+
+    def stats(self) -> dict:
+        return {
+            "generation": self.generation,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error,
+            "poll_interval_s": self.poll_interval,
+        }
@@ -0,0 +1,105 @@
+"""In-process LRU/TTL cache of prediction results.
+
+``/predict`` payloads are four categoricals plus a wage, and real traffic
+repeats the same job profiles, so a probability is cached under the feature
+tuple (categoricals exactly as the model sees them, plus ``WAGE_RATE`` either
+exact or floored to a ``wage_bucket``). Entries belong to one model object:
+``reset(model)`` on every swap empties the cache, and lookups or inserts made
+with any other model are ignored, so a request still running on a replaced
+model can neither read nor write stale results.
+
+Copied verbatim into ``serving/`` for the Space image (standard library only).
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+CATEGORICAL = ("FULL_TIME_POSITION", "EMPLOYER_STATE", "WORKSITE_STATE", "SOC_CODE")
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0, wage_bucket: float = 0.0):
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl)
+        self.wage_bucket = float(wage_bucket)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._owner = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def key(self, row: dict) -> tuple:
+        wage = row.get("WAGE_RATE")
+        if wage is not None and self.wage_bucket > 0 and math.isfinite(wage):
+            wage = math.floor(wage / self.wage_bucket) * self.wage_bucket
+        return tuple(row.get(c) for c in CATEGORICAL) + (wage,)
+
+    def reset(self, model):
+        """Drop every entry and bind the cache to ``model``."""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._owner = model
+
+    def active(self, model) -> bool:
+        return self.enabled and model is not None and model is self._owner
+
+    def get_many(self, model, keys: list) -> list:
+        """Cached probability per key, or None for misses."""
+        if not self.active(model):
+            return [None] * len(keys)
+        now = time.monotonic()
+        out = []
+        with self._lock:
+            for k in keys:
+                hit = self._entries.get(k)
+                if hit is not None and self.ttl > 0 and hit[1] <= now:
+                    del self._entries[k]
+                    self.expirations += 1
+                    hit = None
+                if hit is None:
+                    self.misses += 1
+                    out.append(None)
+                else:
+                    self._entries.move_to_end(k)
+                    self.hits += 1
+                    out.append(hit[0])
+        return out
+
+    def put_many(self, model, items) -> int:
+        """Insert ``(key, proba)`` pairs; returns the number of LRU evictions."""
+        expires = time.monotonic() + self.ttl
+        evicted = 0
+        with self._lock:
+            if not self.active(model):
+                return 0
+            for k, proba in items:
+                self._entries[k] = (proba, expires)
+                self._entries.move_to_end(k)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        return evicted
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,217 @@
+"""Scorers used by the serving apps.
+
+``CompiledScorer`` evaluates the JSON artifact written by
+``src.models.compiled`` with dict lookups (or a pure-Python MurmurHash3 for
+hashed columns) and one multiply-add per numeric column, bypassing the
+sklearn Pipeline and pandas entirely.
+``PipelineScorer`` wraps the joblib pipeline behind the same interface.
+
+This module is copied verbatim into ``serving/`` for the Space image, so it
+must only import the standard library at module level.
+"""
+import json
+import logging
+import math
+import os
+import time
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+FORMAT = "compiled-logreg/v2"
+FORMATS = {"compiled-logreg/v1", FORMAT}
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+def _missing(v) -> bool:
+    return v is None or v != v
+
+
+def murmurhash3_32(data: bytes, seed: int = 0) -> int:
+    """Signed MurmurHash3 (x86, 32-bit), identical to ``sklearn.utils.murmurhash3_32``."""
+    c1, c2, mask = 0xCC9E2D51, 0x1B873593, 0xFFFFFFFF
+    h = seed & mask
+    n = len(data) & ~3
+    for i in range(0, n, 4):
+        k = (int.from_bytes(data[i:i + 4], "little") * c1) & mask
+        k = (((k << 15) | (k >> 17)) * c2) & mask
+        h ^= k
+        h = (((h << 13) | (h >> 19)) * 5 + 0xE6546B64) & mask
+    tail = data[n:]
+    if tail:
+        k = int.from_bytes(tail, "little")
+        k = (k * c1) & mask
+        k = (((k << 15) | (k >> 17)) * c2) & mask
+        h ^= k
+    h ^= len(data)
+    h = ((h ^ (h >> 16)) * 0x85EBCA6B) & mask
+    h = ((h ^ (h >> 13)) * 0xC2B2AE35) & mask
+    h ^= h >> 16
+    return h - (1 << 32) if h & 0x80000000 else h
+
+
+class _HashedColumn:
+    """Weight lookup for a ``FeatureHasher(input_type="string")`` column; memoises seen values."""
+
+    MAX_MEMO = 1 << 16
+
+    def __init__(self, spec: dict):
+        self.n = int(spec["n_features"])
+        self.alternate_sign = bool(spec.get("alternate_sign", True))
+        self.coef = spec["coef"]
+        self.memo = {}
+
+    def get(self, v, default=None) -> float:
+        w = self.memo.get(v)
+        if w is None:
+            h = murmurhash3_32(str(v).encode("utf-8"))
+            # same index rule as sklearn's _hashing_fast (abs(-2**31) special-cased)
+            idx = (2147483647 - (self.n - 1)) % self.n if h == -2147483648 else abs(h) % self.n
+            w = self.coef[idx] * (-1.0 if self.alternate_sign and h < 0 else 1.0)
+            if len(self.memo) < self.MAX_MEMO:
+                self.memo[v] = w
+        return w
+
+
+class CompiledScorer:
+    kind = "compiled"
+
+    def __init__(self, spec: dict):
+        if spec.get("format") not in FORMATS:
+            raise ValueError(f"Unsupported compiled model format: {spec.get('format')!r}")
+        bias = float(spec["intercept"])
+        # fold the StandardScaler into the weight so scoring is one multiply-add
+        self._numeric = []
+        for col in spec["numeric"]:
+            weight = col["coef"] / (col["scale"] or 1.0)
+            bias -= weight * col["mean"]
+            self._numeric.append((col["name"], col["median"], weight))
+        self._categorical = []
+        for col in spec["categorical"]:
+            prefix = col.get("prefix")
+            fill = col["fill"][:prefix] if prefix else col["fill"]
+            if "hash" in col:
+                table, other = _HashedColumn(col["hash"]), None
+            else:
+                table, other = col["coef"], col.get("other", 0.0)
+            self._categorical.append((col["name"], table, other, prefix, table.get(fill, other)))
+        self._bias = bias
+
+    @classmethod
+    def load(cls, path) -> "CompiledScorer":
+        return cls(json.loads(Path(path).read_text()))
+
+    def decision(self, row: dict) -> float:
+        z = self._bias
+        for name, table, other, prefix, fill in self._categorical:
+            v = row.get(name)
+            if _missing(v):
+                z += fill
+                continue
+            if prefix:
+                v = str(v)[:prefix]
+            # unknown categories contribute nothing (handle_unknown="ignore") or the infrequent bucket's weight
+            z += table.get(v, other)
+        for name, median, weight in self._numeric:
+            x = row.get(name)
+            z += weight * (median if _missing(x) else x)
+        return z
+
+    def proba(self, row: dict) -> float:
+        return _sigmoid(self.decision(row))
+
+    def proba_many(self, rows: list) -> list:
+        return [_sigmoid(self.decision(row)) for row in rows]
+
+    def proba_many_timed(self, rows: list):
+        # lookups and the dot product are one loop here, so there is no separate transform stage
+        t0 = time.perf_counter()
+        out = self.proba_many(rows)
+        return out, {"predict_proba": time.perf_counter() - t0}
+
+
+class PipelineScorer:
+    kind = "pipeline"
+
+    def __init__(self, model):
+        self.model = model
+
+    @classmethod
+    def load(cls, path) -> "PipelineScorer":
+        import joblib
+
+        return cls(joblib.load(path).get("model"))
+
+    def proba(self, row: dict) -> float:
+        import pandas as pd
+
+        return float(self.model.predict_proba(pd.DataFrame([row]))[0, 1])
+
+    def proba_many(self, rows: list) -> list:
+        import pandas as pd
+
+        if not rows:
+            return []
+        return self.model.predict_proba(pd.DataFrame(rows))[:, 1].tolist()
+
+    def proba_many_timed(self, rows: list):
+        """``proba_many`` split into preprocessing and ``predict_proba`` timings."""
+        import pandas as pd
+
+        if not rows:
+            return [], {"transform": 0.0, "predict_proba": 0.0}
+        t0 = time.perf_counter()
+        X = self.model[:-1].transform(pd.DataFrame(rows))
+        t1 = time.perf_counter()
+        out = self.model[-1].predict_proba(X)[:, 1].tolist()
+        return out, {"transform": t1 - t0, "predict_proba": time.perf_counter() - t1}
+
+
+def parse_batch(body: bytes, content_type: str = "") -> list:
+    """Decode a batch request body: a JSON array, or NDJSON (one object per line)."""
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    rows = json.loads(body)
+    if not isinstance(rows, list):
+        raise ValueError("Batch body must be a JSON array of payloads.")
+    return rows
+
+
+def load_scorer(model_path, compiled_path=None, mode: str = "auto"):
+    """Return a scorer for ``mode`` (auto | compiled | pipeline), or None if no artifact exists.
+
+    ``auto`` prefers the compiled artifact and falls back to the joblib pipeline,
+    which needs the optional sklearn/pandas stack (``requirements-pipeline.txt``).
+    An artifact that exists but cannot be served raises instead of returning
+    None, so a hot reload keeps the current model. That covers a corrupt
+    compiled file with no usable pipeline behind it, e.g. in the slim image.
+    """
+    compiled_error = None
+    if mode != "pipeline" and compiled_path and os.path.exists(compiled_path):
+        try:
+            return CompiledScorer.load(compiled_path)
+        except (ValueError, KeyError) as e:
+            if mode == "compiled":
+                raise
+            compiled_error = e
+    if mode == "compiled" or not (model_path and os.path.exists(model_path)):
+        if compiled_error is not None:
+            raise ValueError(f"compiled model {compiled_path} is unusable ({compiled_error}) "
+                             "and there is no pipeline artifact to fall back to") from compiled_error
+        return None
+    try:
+        scorer = PipelineScorer.load(model_path)
+    except ImportError as e:
+        if compiled_error is not None:
+            raise ValueError(f"compiled model {compiled_path} is unusable ({compiled_error}) and the pipeline "
+                             f"fallback needs requirements-pipeline.txt ({e})") from compiled_error
+        raise ImportError(f"pipeline scorer needs requirements-pipeline.txt ({e})") from e
+    if compiled_error is not None:
+        log.warning("compiled model %s unusable (%s); serving the joblib pipeline", compiled_path, compiled_error)
+    return scorer
@@ -1,15 +1,22 @@
-import os, re, json, urllib.parse, requests
+import os, re, json, time, hashlib, threading, urllib.parse, requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 load_dotenv(BASE_DIR / ".env", override=False)
 
 # CKAN endpoints
-BASE_GSA = "https://api.gsa.gov/technology/datagov/v3/action/package_search"
+BASE_GSA = os.getenv("DATA_GOV_API_URL", "https://api.gsa.gov/technology/datagov/v3/action/package_search")
 BASE_CATALOG = "https://catalog.data.gov/api/3/action/package_search"
 API_KEY = os.getenv("DATAGOV_API_KEY")
 
+# cache respons CKAN di disk; 0 = nonaktif
+CACHE_DIR = BASE_DIR / "data" / "raw" / "ckan_cache"
+CACHE_TTL = int(os.getenv("CKAN_CACHE_TTL", "21600"))
+
 # hanya izinkan domain resmi DOL/OFLC
 ALLOWED_DOMAINS = {
     "dol.gov",
@@ -29,23 +36,69 @@ QUERIES = [
     "OFLC performance data H-1B",
 ]
 
+_session = None
+_session_lock = threading.Lock()
+
+def _get_session() -> requests.Session:
+    # satu session (connection pool) dipakai bersama semua query, dengan retry/backoff
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=("GET",))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=len(QUERIES), max_retries=retry)
+            s = requests.Session()
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+def _cache_path(base: str, q: str, rows: int) -> Path:
+    key = hashlib.sha1(f"{base}|{q}|{rows}".encode()).hexdigest()
+    return CACHE_DIR / f"{key}.json"
+
+def _cache_get(path: Path):
+    if CACHE_TTL <= 0 or not path.exists():
+        return None
+    try:
+        entry = json.loads(path.read_text())
+    except Exception:
+        return None
+    if time.time() - entry.get("fetched_at", 0) > CACHE_TTL:
+        return None
+    return entry.get("data")
+
+def _cache_put(path: Path, data) -> None:
+    if CACHE_TTL <= 0:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f".{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps({"fetched_at": time.time(), "data": data}))
+    tmp.replace(path)
+
 def _ckan_search(q: str, rows: int = 120):
     # kalau ada API key, coba GSA dulu; kalau tidak, langsung catalog
     bases = [BASE_GSA, BASE_CATALOG] if API_KEY else [BASE_CATALOG, BASE_GSA]
     last_err = None
     for base in bases:
+        cache = _cache_path(base, q, rows)
+        cached = _cache_get(cache)
+        if cached is not None:
+            return cached
         try:
             params = {"q": q, "rows": rows}
             headers = {}
             if "api.gsa.gov" in base and API_KEY:
                 params["api_key"] = API_KEY
                 headers["X-Api-Key"] = API_KEY
-            r = requests.get(base, params=params, headers=headers, timeout=45)
+            r = _get_session().get(base, params=params, headers=headers, timeout=45)
             if r.status_code in (401, 403):
                 last_err = r.text
                 continue
             r.raise_for_status()
-            return r.json()
+            data = r.json()
+            _cache_put(cache, data)
+            return data
         except Exception as e:
             last_err = str(e)
             continue
@@ -58,45 +111,60 @@ def _domain_ok(url: str) -> bool:
     except Exception:
         return False
 
+def _lca_resources(data):
+    for pkg in data.get("result", {}).get("results", []):
+        for r in pkg.get("resources", []):
+            name = (r.get("name") or r.get("title") or "").lower()
+            url = (r.get("url") or "").strip()
+            if not url:
+                continue
+            if not _domain_ok(url):
+                # skip resource dari domain selain DOL/OFLC
+                continue
+            if not any(url.lower().endswith(ext) for ext in (".csv", ".xlsx", ".xls", ".zip")):
+                continue
+            # longgar: harus mengandung h-1b/lca + (disclosure/fy/data)
+            if any(k in name for k in ("h-1b", "h1b", "lca")) and any(k in name for k in ("disclosure", "fy", "data")):
+                yield {"name": r.get("name") or r.get("title"), "url": url}
+
+def _dedupe(resources):
+    seen = set()
+    for r in resources:
+        if r["url"] not in seen:
+            seen.add(r["url"])
+            yield r
+
 def search_oflc_lca_resources(year: str | None = None):
-    results = []
-    for q in QUERIES:
-        data = _ckan_search(q, rows=120)
-        for pkg in data.get("result", {}).get("results", []):
-            for r in pkg.get("resources", []):
-                name = (r.get("name") or r.get("title") or "").lower()
-                url = (r.get("url") or "").strip()
-                if not url:
-                    continue
-                if not _domain_ok(url):
-                    # skip resource dari domain selain DOL/OFLC
-                    continue
-                if not any(url.lower().endswith(ext) for ext in (".csv", ".xlsx", ".xls", ".zip")):
-                    continue
-                # longgar: harus mengandung h-1b/lca + (disclosure/fy/data)
-                if any(k in name for k in ("h-1b", "h1b", "lca")) and any(k in name for k in ("disclosure", "fy", "data")):
-                    if (year is None) or (str(year) in name):
-                        results.append({
-                            "name": r.get("name") or r.get("title"),
-                            "url": url
-                        })
-        if results:
-            break
-    # fallback: kalau pakai filter tahun tapi kosong, lepas filter
-    if year and not results:
-        return search_oflc_lca_resources(None)
-    return results
+    # semua query jalan paralel, tapi prioritas tetap urutan QUERIES:
+    # hasil query pertama yang tidak kosong yang dipakai (seperti versi sekuensial)
+    with ThreadPoolExecutor(max_workers=len(QUERIES)) as pool:
+        responses = list(pool.map(lambda q: _ckan_search(q, rows=120), QUERIES))
+    per_query = [list(_dedupe(_lca_resources(data))) for data in responses]
+    # filter tahun per query; kalau semua kosong, lepas filter (tanpa request ulang)
+    if year:
+        for results in per_query:
+            filtered = [r for r in results if str(year) in (r["name"] or "").lower()]
+            if filtered:
+                return filtered
+    return next((results for results in per_query if results), [])
+
+def resource_year(r) -> int:
+    nm = (r.get("name") or "")
+    m = re.search(r"(?:FY|Fiscal\s*Year)[^\d]*(\d{4})", nm, re.I)
+    return int(m.group(1)) if m else -1
 
 def pick_latest_url(resources):
     best, best_year = None, -1
     for r in resources:
-        nm = (r.get("name") or "")
-        m = re.search(r"(?:FY|Fiscal\s*Year)[^\d]*(\d{4})", nm, re.I)
-        y = int(m.group(1)) if m else -1
+        y = resource_year(r)
         if y >= best_year:
             best_year, best = y, r
     return best
 
+def pick_year_url(resources, year):
+    # resource pertama yang namanya menyebut FY tersebut
+    return next((r for r in resources if resource_year(r) == int(year)), None)
+
 if __name__ == "__main__":
     y = os.getenv("LCA_YEAR")
     res = search_oflc_lca_resources(y)
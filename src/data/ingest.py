@@ -1,9 +1,13 @@
-import os, re, io, zipfile, requests
+import os, re, io, json, zipfile
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from dotenv import load_dotenv
-from .ckan_fetch_latest import search_oflc_lca_resources, pick_latest_url
+from .ckan_fetch_latest import search_oflc_lca_resources, pick_latest_url, pick_year_url
+from . import raw_cache
+from ..profiling import profile_stage, profiled
+from .storage import (load_manifest, parse_years, partition_path, processed_path, save_manifest,
+                      write_chunks, write_processed)
 
 BASE = Path(__file__).resolve().parents[2]
 load_dotenv(BASE / ".env", override=False)
@@ -23,8 +27,44 @@ def _make_synthetic_dataset(max_rows: int) -> pd.DataFrame:
         "WORKSITE_STATE": ["CA","TX","WA","NY","MA"]*16,
         "SOC_CODE": ["15-1252","15-1245","15-1256","15-2051","11-1021"]*16,
         "WAGE_RATE": [120000.0,110000.0,130000.0,90000.0,145000.0]*16,
-    }).head(max_rows)
-    return df
+    })
+    return df.head(max_rows) if max_rows else df
+
+US_STATES = ["CA","TX","NY","NJ","WA","IL","MA","PA","GA","FL","NC","VA","MI","OH","AZ","MN","MD","CO","CT","WI",
+             "MO","IN","TN","OR","UT","SC","IA","KS","KY","AL","LA","OK","AR","NE","NV","NH","DE","RI","ID","NM",
+             "ME","MS","HI","WV","VT","SD","ND","MT","AK","WY","DC"]
+SOC_MAJORS = [11,13,15,17,19,21,23,25,27,29,31,33,35,37,39,41,43,45,47,49,51,53]
+
+def make_scaled_dataset(rows: int, n_soc: int = 800, seed: int = 0) -> pd.DataFrame:
+    """Synthetic normalized rows at any scale with disclosure-like cardinality.
+
+    SOC codes are Zipf-distributed over ``n_soc`` codes in the 22 major groups and
+    states are skewed towards the large filers (all 50 plus DC). Certification
+    depends on wage and full-time status, so models have a signal to learn.
+    """
+    rng = np.random.default_rng(seed)
+    states = np.array(US_STATES)
+    p_state = 1.0 / np.arange(1, len(states) + 1) ** 1.1
+    p_state /= p_state.sum()
+    majors = np.array(SOC_MAJORS)[np.arange(n_soc) % len(SOC_MAJORS)]
+    codes = np.char.add(np.char.add(majors.astype(str), "-"), np.char.zfill((1000 + np.arange(n_soc)).astype(str), 4))
+    p_soc = 1.0 / np.arange(1, n_soc + 1)
+    soc_idx = rng.choice(n_soc, rows, p=p_soc / p_soc.sum())
+
+    employer = rng.choice(states, rows, p=p_state)
+    worksite = np.where(rng.random(rows) < 0.8, employer, rng.choice(states, rows, p=p_state))
+    full_time = rng.random(rows) < 0.93
+    wage = np.round(rng.lognormal(11.3 + 0.25 * (majors[soc_idx] == 15), 0.35), 2)
+    logit = 1.0 + 2.0 * (np.log(wage) - 11.3) + 1.5 * full_time
+    certified = rng.random(rows) < 1.0 / (1.0 + np.exp(-logit))
+    return pd.DataFrame({
+        "CASE_STATUS": np.where(certified, "CERTIFIED", "DENIED"),
+        "EMPLOYER_STATE": employer,
+        "WORKSITE_STATE": worksite,
+        "SOC_CODE": codes[soc_idx],
+        "FULL_TIME_POSITION": np.where(full_time, "Y", "N"),
+        "WAGE_RATE": wage,
+    })[REQ_OUT]
 
 def _pick_col(df, *cands):
     lower = {c.lower(): c for c in df.columns}
@@ -42,6 +82,7 @@ def _std_soc(code):
     return str(code) if m else np.nan
 
 def _parse_wage_cols(row):
+    # referensi row-wise; normalize_columns memakai _parse_wage_frame (vectorized)
     # coba FROM/TO
     cands = [c for c in row.index if "WAGE" in c and ("FROM" in c or "TO" in c)]
     vals = []
@@ -61,7 +102,51 @@ def _parse_wage_cols(row):
                 except: pass
     return np.nan
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+_NUM_RE = r"([-+]?\d*\.?\d+)"
+
+# multiplier ke upah tahunan (2080 jam kerja / tahun)
+UNIT_TO_ANNUAL = {
+    "HOUR": 2080.0, "HOURLY": 2080.0,
+    "WEEK": 52.0, "WEEKLY": 52.0,
+    "BI-WEEKLY": 26.0, "BIWEEKLY": 26.0,
+    "MONTH": 12.0, "MONTHLY": 12.0,
+    "YEAR": 1.0, "YEARLY": 1.0, "ANNUAL": 1.0,
+}
+
+def _first_number(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.extract(_NUM_RE, expand=False).astype(float)
+
+def _parse_wage_source(df: pd.DataFrame):
+    """``_parse_wage_frame`` plus a mask of rows whose value came from a PREVAILING_WAGE column."""
+    nan = pd.Series(np.nan, index=df.index, dtype=float)
+    # coba FROM/TO: rata-rata angka pertama dari kolom yang terisi
+    cands = [c for c in df.columns if "WAGE" in c and ("FROM" in c or "TO" in c)]
+    avg = pd.concat([_first_number(df[c]) for c in cands], axis=1).mean(axis=1) if cands else nan
+    # coba WAGE_RATE_OF_PAY atau PREVAILING_WAGE: kolom pertama yang berisi angka
+    keys = [c for c in df.columns
+            if "WAGE_RATE_OF_PAY" in c or "PREVAILING_WAGE" in c or c in ("WAGE", "WAGE_RATE")]
+    from_pw = pd.Series(False, index=df.index)
+    if keys:
+        nums = pd.concat([_first_number(df[c]) for c in keys], axis=1)
+        first = nums.bfill(axis=1).iloc[:, 0]
+        # kolom sumber per baris = kolom pertama yang berisi angka
+        src = nums.notna().to_numpy().argmax(axis=1)
+        is_pw = np.array(["PREVAILING_WAGE" in c for c in keys])[src]
+        from_pw = pd.Series(is_pw, index=df.index) & avg.isna() & first.notna()
+    else:
+        first = nan
+    return avg.where(avg.notna(), first), from_pw
+
+def _parse_wage_frame(df: pd.DataFrame) -> pd.Series:
+    """Vectorized equivalent of ``df.apply(_parse_wage_cols, axis=1)``."""
+    return _parse_wage_source(df)[0]
+
+def _annualize(wage: pd.Series, unit: pd.Series) -> pd.Series:
+    mult = unit.astype(str).str.strip().str.upper().map(UNIT_TO_ANNUAL).fillna(1.0)
+    return wage * mult
+
+@profiled("ingest.normalize_columns")
+def normalize_columns(df: pd.DataFrame, required=REQ_OUT) -> pd.DataFrame:
     df = df.rename(columns={c: str(c).upper().strip() for c in df.columns})
 
     c_status = _pick_col(df, "CASE_STATUS","CASE STATUS","STATUS","CASESTATUS")
@@ -70,11 +155,16 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     soc      = _pick_col(df, "SOC_CODE","SOC CODE","SOC","SOC-CODE")
     ft_pos   = _pick_col(df, "FULL_TIME_POSITION","FULL TIME POSITION","FULL_TIME_POSITION_Y_N","FT_FULL_TIME_POSITION")
     wage     = _pick_col(df, "WAGE_RATE","WAGE RATE","WAGE_RATE_OF_PAY","WAGE RATE OF PAY","PREVAILING_WAGE")
+    unit     = _pick_col(df, "WAGE_UNIT_OF_PAY","WAGE UNIT OF PAY","UNIT_OF_PAY","WAGE_UNIT")
+    # prevailing wage punya kolom satuan sendiri
+    pw_unit  = _pick_col(df, "PW_UNIT_OF_PAY","PW UNIT OF PAY","PW_WAGE_UNIT_OF_PAY","PW_WAGE_UNIT")
 
     out = pd.DataFrame(index=df.index)
 
     # CASE_STATUS
-    out["CASE_STATUS"] = df[c_status].astype(str).str.strip().str.upper() if c_status else np.nan
+    # file asli menulis "Certified - Withdrawn"; rapatkan spasi di sekitar "-" sebelum dipetakan
+    out["CASE_STATUS"] = (df[c_status].astype(str).str.strip().str.upper()
+                          .str.replace(r"\s*-\s*", "-", regex=True) if c_status else np.nan)
     out["CASE_STATUS"] = out["CASE_STATUS"].replace({"CERTIFIED-WITHDRAWN":"CERTIFIED","WITHDRAWN":"DENIED"})
 
     # STATES
@@ -96,12 +186,21 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     # WAGE_RATE
     if wage:
         wr = pd.to_numeric(df[wage].astype(str).str.replace(r"[^0-9.\-]", "", regex=True), errors="coerce")
+        from_pw = pd.Series("PREVAILING" in wage, index=df.index)
     else:
-        wr = df.apply(_parse_wage_cols, axis=1)
+        wr, from_pw = _parse_wage_source(df)
+    # satuan mengikuti kolom upah yang dipakai per baris; tanpa satuan yang cocok, nilai dibiarkan
+    units = pd.Series(np.nan, index=df.index, dtype=object)
+    if unit:
+        units = df[unit].where(~from_pw)
+    if pw_unit:
+        units = units.where(~from_pw, df[pw_unit])
+    if unit or pw_unit:
+        wr = _annualize(wr, units)
     out["WAGE_RATE"] = wr
 
     # bersihkan baris kosong
-    out = out.dropna(subset=REQ_OUT)
+    out = out.dropna(subset=list(required))
     return out[REQ_OUT].copy()
 
 def _read_any(bytes_data: bytes, url: str, n=None) -> pd.DataFrame:
@@ -123,11 +222,119 @@ def _read_any(bytes_data: bytes, url: str, n=None) -> pd.DataFrame:
     # fallback coba parse sebagai CSV
     return pd.read_csv(bio, nrows=n, low_memory=False, dtype=str)
 
+def _iter_chunks(path: Path, url: str, chunksize: int, n=None):
+    """Yield raw string-typed chunks of a CSV/ZIP file; Excel is read whole."""
+    url_l = url.lower()
+    if url_l.endswith(".xlsx") or url_l.endswith(".xls"):
+        yield pd.read_excel(path, nrows=n, dtype=str)
+        return
+    if url_l.endswith(".zip"):
+        with zipfile.ZipFile(path) as z:
+            csvs = [f for f in z.namelist() if f.lower().endswith(".csv")]
+            if not csvs:
+                raise ValueError("ZIP tidak berisi CSV")
+            with z.open(csvs[0]) as f:
+                with pd.read_csv(f, nrows=n, chunksize=chunksize, low_memory=False, dtype=str) as reader:
+                    yield from reader
+        return
+    with pd.read_csv(path, nrows=n, chunksize=chunksize, low_memory=False, dtype=str) as reader:
+        yield from reader
+
+def normalize_file(path: Path, url: str, out: Path, chunksize: int = 100_000, n=None, checks=None) -> int:
+    """Normalize ``path`` chunk by chunk, appending to ``out``; returns rows written.
+
+    ``checks`` is an optional ``(rules, total, max_samples)`` triple from ``_inline_checks``;
+    each normalized chunk is validated into ``total`` on its way to disk.
+    """
+    chunks = (normalize_columns(chunk) for chunk in _iter_chunks(path, url, chunksize, n))
+    if checks is not None:
+        from . import validate
+
+        chunks = validate.observe(chunks, *checks)
+    return write_chunks(chunks, out, REQ_OUT)
+
+def _inline_checks():
+    # validate pulls in pandera; only pay for it when INGEST_VALIDATE is on
+    from . import validate
+
+    cfg = validate.load_config()
+    return validate.compile_rules(cfg), {"rows": 0, "chunks": 0, "failures": {}}, validate.settings(cfg)[1]
+
+def _finish_checks(checks):
+    if checks is None or not checks[1]["chunks"]:
+        return
+    from . import validate
+
+    report = validate.summarize(checks[1])
+    validate.write_report(report)
+    print(f"[Ingest] inline validation: rows={report['rows']} errors={report['errors']} "
+          f"warnings={report['warnings']} (docs/validation.json)")
+
+def _source_stamp(out: Path) -> Path:
+    return out.with_name(out.name + ".source.json")
+
+def _write_synthetic(max_rows: int):
+    df = _make_synthetic_dataset(max_rows)
+    out = write_processed(df, "lca_labeled")
+    _source_stamp(out).unlink(missing_ok=True)
+    print(f"[Ingest] wrote {out} (synthetic)")
+
+def ingest_years(years, max_rows: int = 0, chunksize: int = 100_000, force: bool = False, checks=None) -> dict:
+    """Build one normalized partition per fiscal year, skipping unchanged sources."""
+    resources = search_oflc_lca_resources(None)
+    manifest = load_manifest("lca_labeled")
+    for fy in years:
+        res = pick_year_url(resources, fy)
+        if res is None:
+            print(f"[WARN] no LCA resource found for FY{fy}; skipping")
+            continue
+        print(f"[Ingest] FY{fy}: downloading {res['url']}")
+        try:
+            cached = raw_cache.fetch(res["url"])
+        except Exception as e:
+            print(f"[WARN] FY{fy}: download failed: {e}; skipping")
+            continue
+        prev = manifest.get(str(fy))
+        if (not force and prev and prev["sha256"] == cached["sha256"] and prev["max_rows"] == max_rows
+                and (PROC / prev["path"]).exists()):
+            print(f"[Ingest] FY{fy}: unchanged (sha256={cached['sha256'][:12]}); skipping")
+            continue
+        out = partition_path("lca_labeled", fy, cached["sha256"])
+        rows = normalize_file(cached["path"], res["url"], out, chunksize=chunksize, n=max_rows or None,
+                              checks=checks)
+        if prev and (PROC / prev["path"]) != out:
+            (PROC / prev["path"]).unlink(missing_ok=True)
+        manifest[str(fy)] = {
+            "url": res["url"],
+            "sha256": cached["sha256"],
+            "max_rows": max_rows,
+            "rows": rows,
+            "path": out.relative_to(PROC).as_posix(),
+        }
+        print(f"[Ingest] FY{fy}: wrote {out} rows={rows}")
+    save_manifest("lca_labeled", manifest)
+    return manifest
+
+@profile_stage("ingest")
 def main():
-    max_rows = int(os.getenv("MAX_ROWS", "40000"))
+    # streaming / multi-year mode: bounded memory, no row cap unless MAX_ROWS is set
+    years = parse_years(os.getenv("LCA_YEARS"))
+    stream = os.getenv("INGEST_STREAM", "0").lower() in ("1", "true", "yes")
+    max_rows = int(os.getenv("MAX_ROWS", "0" if stream or years else "40000"))
+    chunksize = int(os.getenv("INGEST_CHUNKSIZE", "100000"))
+    force = os.getenv("INGEST_FORCE", "0").lower() in ("1", "true", "yes")
+    checks = _inline_checks() if os.getenv("INGEST_VALIDATE", "0").lower() in ("1", "true", "yes") else None
     year = os.getenv("LCA_YEAR")
     manual_url = os.getenv("LCA_URL")  # override manual jika ingin
 
+    if years:
+        manifest = ingest_years(years, max_rows, chunksize, force, checks)
+        _finish_checks(checks)
+        if not manifest:
+            print("[WARN] no fiscal-year partitions; creating synthetic sample...")
+            _write_synthetic(max_rows)
+        return
+
     # 1) tentukan URL
     if manual_url:
         url = manual_url.strip()
@@ -137,38 +344,45 @@ def main():
         resources = search_oflc_lca_resources(year)
         if not resources:
             print("[WARN] CKAN empty; creating synthetic sample...")
-            df = _make_synthetic_dataset(max_rows)
-            out = PROC / "lca_labeled.csv"
-            df.to_csv(out, index=False)
-            print(f"[Ingest] wrote {out} (synthetic)")
+            _write_synthetic(max_rows)
             return
         picked = pick_latest_url(resources) or resources[0]
         url = picked["url"]
 
+    # 2) unduh lewat cache (conditional request + resume)
     print(f"[Ingest] downloading {url}")
     try:
-        r = requests.get(url, timeout=180)
-        r.raise_for_status()
+        cached = raw_cache.fetch(url)
     except Exception as e:
         print(f"[WARN] download failed: {e}; using synthetic sample")
-        df = _make_synthetic_dataset(max_rows)
-        out = PROC / "lca_labeled.csv"
-        df.to_csv(out, index=False)
-        print(f"[Ingest] wrote {out} (synthetic)")
+        _write_synthetic(max_rows)
         return
+    if cached["from_cache"]:
+        print(f"[Ingest] not modified; using cached {cached['path'].name}")
 
-    # 2) simpan mentah
-    fname = url.split("/")[-1].split("?")[0] or "lca_download"
-    dest = RAW / fname
-    dest.write_bytes(r.content)
+    # lewati normalisasi kalau output terakhir berasal dari sumber yang sama
+    out = processed_path("lca_labeled")
+    stamp = _source_stamp(out)
+    source = {"url": url, "sha256": cached["sha256"], "max_rows": max_rows}
+    if not force and out.exists() and stamp.exists() and json.loads(stamp.read_text()) == source:
+        print(f"[Ingest] {out} up to date (source sha256={cached['sha256'][:12]}); skipping")
+        return
 
     # 3) baca & normalisasi
-    df0 = _read_any(r.content, url, n=max_rows)
-    df = normalize_columns(df0)
+    if stream:
+        rows = normalize_file(cached["path"], url, out, chunksize=chunksize, n=max_rows or None, checks=checks)
+        print(f"[Ingest] wrote {out} rows={rows} (streamed)")
+    else:
+        df0 = _read_any(cached["path"].read_bytes(), url, n=max_rows)
+        df = normalize_columns(df0)
+        out = write_processed(df, "lca_labeled")
+        print(f"[Ingest] wrote {out} rows={len(df)}")
+        if checks is not None:
+            from . import validate
 
-    out = PROC / "lca_labeled.csv"
-    df.to_csv(out, index=False)
-    print(f"[Ingest] wrote {out} rows={len(df)}")
+            validate.merge(checks[1], validate.check_chunk(df, checks[0], 0, checks[2]), checks[2])
+    _finish_checks(checks)
+    stamp.write_text(json.dumps(source))
 
 if __name__ == "__main__":
     main()
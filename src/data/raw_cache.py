@@ -0,0 +1,125 @@
+"""Content-addressed cache for raw disclosure downloads.
+
+Files are stored once under ``data/raw/cache/objects/<sha256><ext>`` and an
+index maps each URL to its object plus the ETag/Last-Modified validators, so
+repeat fetches are conditional requests (304 -> reuse the cached object).
+Interrupted downloads are kept as ``.part`` files and resumed with a Range
+request guarded by If-Range. A resume the server rejects (e.g. 416) discards
+the partial file and retries once with a plain GET.
+"""
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import requests
+
+BASE = Path(__file__).resolve().parents[2]
+CACHE = BASE / "data" / "raw" / "cache"
+
+
+def _dirs(root: Path):
+    objects, partial = root / "objects", root / "partial"
+    objects.mkdir(parents=True, exist_ok=True)
+    partial.mkdir(parents=True, exist_ok=True)
+    return objects, partial
+
+
+def _load_index(root: Path) -> dict:
+    p = root / "index.json"
+    return json.loads(p.read_text()) if p.exists() else {}
+
+
+def _save_index(root: Path, index: dict) -> None:
+    tmp = root / "index.json.tmp"
+    tmp.write_text(json.dumps(index, indent=2))
+    tmp.replace(root / "index.json")
+
+
+def _suffix(url: str) -> str:
+    name = url.split("?")[0].rsplit("/", 1)[-1]
+    return Path(name).suffix.lower()
+
+
+def _validators(r: requests.Response) -> dict:
+    return {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+
+
+def fetch(url: str, root: Path = CACHE, timeout: int = 180, chunk_bytes: int = 1 << 20,
+          session: requests.Session | None = None) -> dict:
+    """Return ``{"path", "sha256", "from_cache"}`` for ``url``, downloading only if it changed."""
+    objects, partial = _dirs(root)
+    http = session or requests
+    index = _load_index(root)
+    entry = index.get(url)
+    key = hashlib.sha1(url.encode()).hexdigest()
+    part, part_meta = partial / f"{key}.part", partial / f"{key}.json"
+
+    headers = {}
+    cached = entry is not None and Path(entry["path"]).exists()
+    if cached:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    resume_from = part.stat().st_size if part.exists() and part_meta.exists() else 0
+    if resume_from:
+        meta = json.loads(part_meta.read_text())
+        validator = meta.get("etag") or meta.get("last_modified")
+        if validator:
+            headers["Range"] = f"bytes={resume_from}-"
+            headers["If-Range"] = validator
+        else:
+            resume_from = 0
+
+    r = http.get(url, headers=headers, timeout=timeout, stream=True)
+    if resume_from and r.status_code >= 400:
+        # 416 (the part is already complete, or the range is refused) or any other error while
+        # resuming: drop the partial download and start over once, so a stale .part cannot wedge every ingest
+        r.close()
+        print(f"[WARN] resuming {url} failed (HTTP {r.status_code}); discarding the partial download")
+        part.unlink(missing_ok=True)
+        part_meta.unlink(missing_ok=True)
+        resume_from = 0
+        headers.pop("Range", None)
+        headers.pop("If-Range", None)
+        r = http.get(url, headers=headers, timeout=timeout, stream=True)
+
+    with r:
+        if r.status_code == 304 and cached:
+            return {"path": Path(entry["path"]), "sha256": entry["sha256"], "from_cache": True}
+        r.raise_for_status()
+
+        digest = hashlib.sha256()
+        if r.status_code == 206 and resume_from:
+            with open(part, "rb") as f:
+                for block in iter(lambda: f.read(chunk_bytes), b""):
+                    digest.update(block)
+            mode = "ab"
+        else:
+            mode = "wb"
+            part_meta.write_text(json.dumps(_validators(r)))
+        with open(part, mode) as f:
+            for chunk in r.iter_content(chunk_size=chunk_bytes):
+                if chunk:
+                    f.write(chunk)
+                    digest.update(chunk)
+        validators = json.loads(part_meta.read_text()) if mode == "ab" else _validators(r)
+
+    sha = digest.hexdigest()
+    obj = objects / f"{sha}{_suffix(url)}"
+    if obj.exists():
+        part.unlink()
+    else:
+        part.replace(obj)
+    part_meta.unlink(missing_ok=True)
+
+    index[url] = {
+        "path": str(obj),
+        "sha256": sha,
+        "size": obj.stat().st_size,
+        "fetched_at_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        **validators,
+    }
+    _save_index(root, index)
+    return {"path": obj, "sha256": sha, "from_cache": False}
@@ -0,0 +1,195 @@
+"""Shared reader/writer for the ``data/processed`` layer.
+
+Processed tables are stored as Parquet by default (typed columns,
+dictionary-encoded strings, snappy-compressed) so downstream stages skip
+CSV parsing. ``PROCESSED_FORMAT=csv`` keeps the old text files; readers fall
+back to whichever format exists so older CSV outputs still load.
+
+A dataset can also be partitioned by fiscal year
+(``<name>/fy=<year>/part-<source hash>.<ext>`` plus ``<name>/_manifest.json``).
+Readers use whichever layout was written last and only load the fiscal
+years selected by ``FY_RANGE`` (e.g. ``2022-2024``; default: all).
+"""
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+BASE = Path(__file__).resolve().parents[2]
+PROC = BASE / "data" / "processed"
+
+SUFFIXES = {"parquet": ".parquet", "csv": ".csv"}
+
+
+def _format() -> str:
+    fmt = os.getenv("PROCESSED_FORMAT", "parquet").lower()
+    if fmt not in SUFFIXES:
+        raise ValueError(f"Unsupported PROCESSED_FORMAT '{fmt}' (expected parquet or csv).")
+    return fmt
+
+
+def processed_path(name: str) -> Path:
+    """Path that ``write_processed(name)`` writes to under the configured format."""
+    return PROC / f"{name}{SUFFIXES[_format()]}"
+
+
+def find_processed(name: str) -> Path | None:
+    """Existing file for ``name``, preferring the configured format."""
+    fmt = _format()
+    for f in [fmt] + [f for f in SUFFIXES if f != fmt]:
+        p = PROC / f"{name}{SUFFIXES[f]}"
+        if p.exists():
+            return p
+    return None
+
+
+def read_table(path: Path, columns=None) -> pd.DataFrame:
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns, low_memory=False)
+
+
+def parse_years(spec: str | None) -> list[int] | None:
+    """``"2022-2024"`` / ``"2022,2024"`` -> sorted years; empty -> None (all)."""
+    if not spec or not spec.strip():
+        return None
+    years = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            lo, hi = (int(x) for x in part.split("-", 1))
+            years.update(range(lo, hi + 1))
+        elif part:
+            years.add(int(part))
+    return sorted(years)
+
+
+def _manifest_path(name: str) -> Path:
+    return PROC / name / "_manifest.json"
+
+
+def load_manifest(name: str) -> dict:
+    p = _manifest_path(name)
+    return json.loads(p.read_text()) if p.exists() else {}
+
+
+def save_manifest(name: str, manifest: dict) -> None:
+    p = _manifest_path(name)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    tmp.replace(p)
+
+
+def partition_path(name: str, fy: int, source_sha256: str) -> Path:
+    return PROC / name / f"fy={fy}" / f"part-{source_sha256[:16]}{SUFFIXES[_format()]}"
+
+
+def is_partitioned(name: str) -> bool:
+    """True when the FY-partitioned layout is newer than any single-file output."""
+    manifest = _manifest_path(name)
+    if not manifest.exists():
+        return False
+    flat = find_processed(name)
+    return flat is None or manifest.stat().st_mtime >= flat.stat().st_mtime
+
+
+def _partition_files(name: str, years=None):
+    for fy, entry in sorted(load_manifest(name).items(), key=lambda kv: int(kv[0])):
+        if years is None or int(fy) in years:
+            yield int(fy), PROC / entry["path"]
+
+
+def iter_partitions(name: str, years=None, columns=None):
+    """Yield ``(fy, frame)`` one fiscal year at a time, oldest first."""
+    for fy, path in _partition_files(name, years):
+        yield fy, read_table(path, columns=columns)
+
+
+def iter_table_chunks(path: Path, chunksize: int, columns=None):
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+    with pd.read_csv(path, chunksize=chunksize, usecols=columns, low_memory=False) as reader:
+        yield from reader
+
+
+def iter_processed_chunks(name: str, chunksize: int, columns=None, years=None):
+    """Stream ``name`` in frames of at most ``chunksize`` rows, whatever its layout."""
+    if is_partitioned(name):
+        years = years if years is not None else parse_years(os.getenv("FY_RANGE"))
+        for _, path in _partition_files(name, years):
+            yield from iter_table_chunks(path, chunksize, columns)
+        return
+    path = find_processed(name)
+    if path is None:
+        raise FileNotFoundError(f"No processed dataset '{name}' in {PROC}")
+    yield from iter_table_chunks(path, chunksize, columns)
+
+
+def read_processed(name: str, columns=None, years=None) -> pd.DataFrame:
+    if is_partitioned(name):
+        years = years if years is not None else parse_years(os.getenv("FY_RANGE"))
+        frames = [df for _, df in iter_partitions(name, years, columns)]
+        if not frames:
+            raise FileNotFoundError(f"No partitions of '{name}' for fiscal years {years}")
+        return pd.concat(frames, ignore_index=True)
+    path = find_processed(name)
+    if path is None:
+        raise FileNotFoundError(f"No processed dataset '{name}' in {PROC}")
+    return read_table(path, columns=columns)
+
+
+def write_table(df: pd.DataFrame, path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".parquet":
+        df.to_parquet(path, index=False, compression="snappy")
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def write_processed(df: pd.DataFrame, name: str) -> Path:
+    return write_table(df, processed_path(name))
+
+
+def write_chunks(chunks, path: Path, columns) -> int:
+    """Append an iterable of same-schema frames to ``path`` via a ``.part`` file; returns rows written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    rows = 0
+    if path.suffix == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer, schema = None, None
+        try:
+            for df in chunks:
+                if df.empty:
+                    continue
+                table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+                if writer is None:
+                    schema = table.schema
+                    writer = pq.ParquetWriter(tmp, schema, compression="snappy")
+                writer.write_table(table)
+                rows += len(df)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            pd.DataFrame(columns=columns).to_parquet(tmp, index=False)
+    else:
+        pd.DataFrame(columns=columns).to_csv(tmp, index=False)
+        for df in chunks:
+            df.to_csv(tmp, mode="a", header=False, index=False)
+            rows += len(df)
+    tmp.replace(path)
+    return rows
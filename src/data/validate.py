@@ -1,27 +1,61 @@
+"""Schema validation of the processed ``lca_labeled`` table.
+
+``VALIDATE_MODE=chunked`` (default) streams the table in chunks and checks each
+one with vectorized masks: expected columns, dtypes, nulls and the value domains
+declared in ``configs/schema.yaml`` (``isin`` lists or named ``domains``, regex
+``pattern``, ``min``/``max``). Failures are aggregated per (column, check) into a
+total count, the first offending rows and the most frequent offending values,
+both capped at ``max_samples``, so the report stays small on full-year files.
+Chunks can be checked by a process pool, and ingest can run the same checks
+inline (``INGEST_VALIDATE=1``). The summary goes to ``docs/validation.json``.
+
+``VALIDATE_MODE=full`` keeps the original whole-table pandera validation.
+"""
 from __future__ import annotations
 
+import json
+import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pandera.pandas as pa
 from pandera import DataFrameSchema
 from pandera.errors import SchemaErrors, SchemaError
 import yaml
 
+from ..profiling import profile_stage, profiled
+from .storage import PROC, find_processed, is_partitioned, iter_processed_chunks, read_processed
+
 BASE_DIR = Path(__file__).resolve().parents[2]
 PROC_DIR = BASE_DIR / "data" / "processed"
 CONFIG_PATH = BASE_DIR / "configs" / "schema.yaml"
+REPORT_PATH = BASE_DIR / "docs" / "validation.json"
 
+_DTYPE_CHECKS = {
+    "string": lambda s: pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s),
+    "float": lambda s: pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s),
+    "int": pd.api.types.is_integer_dtype,
+    "bool": pd.api.types.is_bool_dtype,
+}
+_DTYPE_ALIASES = {"float64": "float", "int64": "int", "boolean": "bool"}
 
-def _load_schema() -> DataFrameSchema:
+
+def load_config() -> dict:
     if not CONFIG_PATH.exists():
         raise FileNotFoundError(f"Schema config not found: {CONFIG_PATH}")
-
     cfg = yaml.safe_load(CONFIG_PATH.read_text())
-    columns_cfg = cfg.get("columns", [])
-    if not columns_cfg:
+    if not cfg.get("columns"):
         raise ValueError("schema.yaml contains no column definitions.")
+    return cfg
+
+
+def _load_schema() -> DataFrameSchema:
+    columns_cfg = load_config()["columns"]
 
     dtype_map: dict[str, pa.dtypes.DataType] = {
         "string": pa.String(),
@@ -46,14 +80,182 @@ def _load_schema() -> DataFrameSchema:
     return pa.DataFrameSchema(schema_columns, strict=True)
 
 
-def main() -> int:
-    dataset = PROC_DIR / "lca_labeled.csv"
-    if not dataset.exists():
-        print(f"[Validate] Missing processed dataset: {dataset}")
-        print("[Validate] Run `python -m src.data.ingest` first.")
-        return 1
+def compile_rules(cfg: dict) -> list[dict]:
+    """Resolve ``schema.yaml`` column entries (and named domains) into check rules."""
+    domains = cfg.get("domains", {})
+    rules = []
+    for col in cfg["columns"]:
+        dtype = _DTYPE_ALIASES.get(str(col.get("dtype", "")).lower(), str(col.get("dtype", "")).lower())
+        if dtype not in _DTYPE_CHECKS:
+            raise ValueError(f"Unsupported dtype '{dtype}' for column '{col['name']}'.")
+        isin = col.get("isin")
+        if isinstance(isin, str):
+            if isin not in domains:
+                raise ValueError(f"Unknown domain '{isin}' for column '{col['name']}'.")
+            isin = domains[isin]
+        rules.append({
+            "name": col["name"],
+            "dtype": dtype,
+            "nullable": bool(col.get("nullable", False)),
+            "isin": sorted(str(v) for v in isin) if isin is not None else None,
+            "pattern": col.get("pattern"),
+            "min": col.get("min"),
+            "max": col.get("max"),
+            "severity": col.get("severity", "error"),
+        })
+    return rules
+
+
+def _failure(column, check, severity, count, rows=(), values=None) -> dict:
+    return {"column": column, "check": check, "severity": severity, "count": int(count),
+            "examples": [list(r) for r in rows], "values": values or {}}
+
+
+def _record(out, rule, check, s: pd.Series, mask: np.ndarray, offset: int, max_samples: int):
+    idx = np.flatnonzero(mask)
+    if not len(idx):
+        return
+    bad = s.iloc[idx]
+    # only the per-chunk top values travel back to the parent; merge keeps the running top
+    top = bad.astype(str).value_counts(dropna=False).head(max_samples)
+    rows = [(int(offset + i), None if pd.isna(v) else str(v)) for i, v in zip(idx[:max_samples], bad.iloc[:max_samples])]
+    out[(rule["name"], check)] = _failure(rule["name"], check, rule["severity"], len(idx), rows,
+                                          {str(k): int(v) for k, v in top.items()})
+
+
+def check_chunk(df: pd.DataFrame, rules: list[dict], offset: int = 0, max_samples: int = 20,
+                strict: bool = True) -> dict:
+    """Check one chunk; returns ``{"rows": n, "failures": {(column, check): failure}}``."""
+    out = {}
+    n = len(df)
+    if strict:
+        for name in sorted(set(df.columns) - {r["name"] for r in rules}):
+            out[(name, "unexpected_column")] = _failure(name, "unexpected_column", "error", n)
+    for rule in rules:
+        name = rule["name"]
+        if name not in df.columns:
+            out[(name, "column_missing")] = _failure(name, "column_missing", "error", n)
+            continue
+        s = df[name]
+        if not _DTYPE_CHECKS[rule["dtype"]](s):
+            out[(name, "dtype")] = _failure(name, "dtype", "error", n, values={str(s.dtype): n})
+            continue
+        null = s.isna().to_numpy()
+        if not rule["nullable"]:
+            _record(out, rule, "not_null", s, null, offset, max_samples)
+        present = ~null
+        if rule["isin"] is not None:
+            _record(out, rule, "isin", s, present & ~s.isin(rule["isin"]).to_numpy(), offset, max_samples)
+        if rule["pattern"]:
+            # arrow-backed strings run the regex in C instead of a Python loop
+            ok = s.astype("string[pyarrow]").str.fullmatch(rule["pattern"]).fillna(False).to_numpy(dtype=bool)
+            _record(out, rule, "pattern", s, present & ~ok, offset, max_samples)
+        if rule["min"] is not None or rule["max"] is not None:
+            x = pd.to_numeric(s, errors="coerce").to_numpy(dtype=float)
+            lo = rule["min"] if rule["min"] is not None else -np.inf
+            hi = rule["max"] if rule["max"] is not None else np.inf
+            with np.errstate(invalid="ignore"):
+                _record(out, rule, "range", s, present & ~((x >= lo) & (x <= hi)), offset, max_samples)
+    return {"rows": n, "failures": out}
+
+
+def merge(total: dict, part: dict, max_samples: int = 20) -> dict:
+    """Fold a ``check_chunk`` result into ``total`` (chunks must arrive in row order)."""
+    total["rows"] = total.get("rows", 0) + part["rows"]
+    total["chunks"] = total.get("chunks", 0) + 1
+    failures = total.setdefault("failures", {})
+    for key, f in part["failures"].items():
+        acc = failures.get(key)
+        if acc is None:
+            failures[key] = acc = _failure(f["column"], f["check"], f["severity"], 0)
+        acc["count"] += f["count"]
+        acc["examples"] = (acc["examples"] + f["examples"])[:max_samples]
+        for v, c in f["values"].items():
+            acc["values"][v] = acc["values"].get(v, 0) + c
+        if len(acc["values"]) > max_samples:
+            acc["values"] = dict(sorted(acc["values"].items(), key=lambda kv: -kv[1])[:max_samples])
+    return total
+
+
+def _with_offsets(chunks):
+    start = 0
+    for chunk in chunks:
+        yield chunk, start
+        start += len(chunk)
+
+
+def _ordered(pool, chunks, window: int, rules: list[dict], max_samples: int):
+    """Check chunks on ``pool`` with at most ``window`` in flight; yield results in input order."""
+    pending = deque()
+    for chunk, start in _with_offsets(chunks):
+        pending.append(pool.submit(check_chunk, chunk, rules, start, max_samples))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
 
-    df = pd.read_csv(dataset)
+def observe(chunks, rules: list[dict], total: dict, max_samples: int = 20):
+    """Pass ``chunks`` through unchanged while folding their checks into ``total`` (inline use)."""
+    for chunk in chunks:
+        merge(total, check_chunk(chunk, rules, total.get("rows", 0), max_samples), max_samples)
+        yield chunk
+
+
+@profiled("validate.validate_chunks")
+def validate_chunks(chunks, rules: list[dict], max_samples: int = 20, workers: int = 1) -> dict:
+    """Check every chunk and return the aggregated report (see ``summarize``)."""
+    t0 = time.perf_counter()
+    total = {"rows": 0, "chunks": 0, "failures": {}}
+    if workers <= 1:
+        for chunk, start in _with_offsets(chunks):
+            merge(total, check_chunk(chunk, rules, start, max_samples), max_samples)
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            for part in _ordered(pool, chunks, 2 * workers, rules, max_samples):
+                merge(total, part, max_samples)
+    return summarize(total, time.perf_counter() - t0)
+
+
+def summarize(total: dict, seconds: float = 0.0) -> dict:
+    failures = sorted(total.get("failures", {}).values(), key=lambda f: (f["severity"] != "error", -f["count"]))
+    for f in failures:
+        f["values"] = dict(sorted(f["values"].items(), key=lambda kv: -kv[1]))
+    errors = sum(f["count"] for f in failures if f["severity"] == "error")
+    return {
+        "passed": errors == 0,
+        "rows": total.get("rows", 0),
+        "chunks": total.get("chunks", 0),
+        "errors": errors,
+        "warnings": sum(f["count"] for f in failures if f["severity"] != "error"),
+        "seconds": round(seconds, 3),
+        "failures": failures,
+    }
+
+
+def write_report(report: dict, path: Path = REPORT_PATH) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+    return path
+
+
+def _print_report(report: dict):
+    for f in report["failures"]:
+        print(f"[Validate] {f['severity'].upper()} {f['column']}.{f['check']}: {f['count']} rows; "
+              f"top values {list(f['values'].items())[:5]}")
+
+
+def settings(cfg: dict) -> tuple[int, int, int]:
+    vcfg = cfg.get("validation", {})
+    chunksize = int(os.getenv("VALIDATE_CHUNKSIZE", vcfg.get("chunksize", 200_000)))
+    max_samples = int(os.getenv("VALIDATE_MAX_SAMPLES", vcfg.get("max_samples", 20)))
+    workers = int(os.getenv("VALIDATE_WORKERS", vcfg.get("workers", 1))) or os.cpu_count() or 1
+    return chunksize, max_samples, workers
+
+
+@profiled("validate.pandera_full")
+def _main_full(dataset) -> int:
+    df = read_processed("lca_labeled")
     try:
         schema = _load_schema()
         schema.validate(df, lazy=True)
@@ -71,5 +273,33 @@ def main() -> int:
         return 3
 
 
+@profile_stage("validate")
+def main() -> int:
+    dataset = PROC / "lca_labeled" if is_partitioned("lca_labeled") else find_processed("lca_labeled")
+    if dataset is None:
+        print(f"[Validate] Missing processed dataset: {PROC_DIR / 'lca_labeled'}.{{parquet,csv}}")
+        print("[Validate] Run `python -m src.data.ingest` first.")
+        return 1
+
+    if os.getenv("VALIDATE_MODE", "chunked").lower() == "full":
+        return _main_full(dataset)
+
+    try:
+        cfg = load_config()
+        rules = compile_rules(cfg)
+        chunksize, max_samples, workers = settings(cfg)
+        report = validate_chunks(iter_processed_chunks("lca_labeled", chunksize), rules, max_samples, workers)
+    except Exception as exc:  # defensive catch-all for configuration/runtime issues
+        print(f"[Validate] Unexpected error: {exc}")
+        return 3
+    write_report(report)
+    _print_report(report)
+    status = "passed" if report["passed"] else "failed"
+    print(f"[Validate] Dataset {dataset} {status} schema validation: rows={report['rows']} "
+          f"chunks={report['chunks']} errors={report['errors']} warnings={report['warnings']} "
+          f"in {report['seconds']:.2f}s (workers={workers}); wrote {REPORT_PATH.relative_to(BASE_DIR)}")
+    return 0 if report["passed"] else 2
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -1,18 +1,43 @@
 import pandas as pd
-from pathlib import Path
 
-BASE = Path(__file__).resolve().parents[2]
-PROC = BASE / "data" / "processed"
+from ..data.storage import (PROC, is_partitioned, load_manifest, partition_path, read_processed,
+                            read_table, save_manifest, write_processed, write_table)
+from ..profiling import profile_stage, profiled
 
-def main():
-    df = pd.read_csv(PROC / "lca_labeled.csv")
+@profiled("features.build")
+def build(df: pd.DataFrame) -> pd.DataFrame:
     df["CASE_STATUS_BIN"] = (df["CASE_STATUS"].astype(str).str.upper()=="CERTIFIED").astype(int)
     df["FULL_TIME_POSITION"] = df["FULL_TIME_POSITION"].fillna("U").astype(str).str.upper().str[0]
     for c in ["EMPLOYER_STATE","WORKSITE_STATE","SOC_CODE"]:
         df[c] = df[c].fillna("UNK").astype(str).str.upper()
     df["WAGE_RATE"] = pd.to_numeric(df["WAGE_RATE"], errors="coerce")
-    df.to_csv(PROC / "features.csv", index=False)
-    print("[Features] wrote features.csv", len(df))
+    return df
+
+def build_partitions():
+    # satu partisi fitur per FY; lewati FY yang sumbernya tidak berubah
+    source = load_manifest("lca_labeled")
+    manifest = {fy: e for fy, e in load_manifest("features").items() if fy in source}
+    for fy, entry in sorted(source.items()):
+        prev = manifest.get(fy)
+        if prev and prev["source_sha256"] == entry["sha256"] and (PROC / prev["path"]).exists():
+            print(f"[Features] FY{fy}: unchanged; skipping")
+            continue
+        df = build(read_table(PROC / entry["path"]))
+        out = write_table(df, partition_path("features", int(fy), entry["sha256"]))
+        if prev and (PROC / prev["path"]) != out:
+            (PROC / prev["path"]).unlink(missing_ok=True)
+        manifest[fy] = {"source_sha256": entry["sha256"], "rows": len(df), "path": out.relative_to(PROC).as_posix()}
+        print(f"[Features] FY{fy}: wrote {out.name}", len(df))
+    save_manifest("features", manifest)
+
+@profile_stage("features")
+def main():
+    if is_partitioned("lca_labeled"):
+        build_partitions()
+        return
+    df = build(read_processed("lca_labeled"))
+    out = write_processed(df, "features")
+    print(f"[Features] wrote {out.name}", len(df))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,96 @@
+"""Export the fitted training pipeline as a plain-data "compiled" scorer.
+
+The pipeline built in ``src.models.train`` is a logistic regression over
+imputed/standardised numeric columns and encoded categorical columns, so the
+whole ColumnTransformer + ``predict_proba`` collapses into an intercept, a few
+numeric constants and, per categorical column, either a coefficient lookup
+table (one-hot, with an optional ``other`` weight for the infrequent bucket)
+or a hashed weight vector. Prefix rollups are recorded as ``prefix``.
+The result is JSON-serialisable and is scored by
+``src.serving.scoring.CompiledScorer`` without sklearn or pandas.
+"""
+import json
+from pathlib import Path
+
+FORMAT = "compiled-logreg/v2"
+
+
+def compile_pipeline(pipe, num_cols, cat_cols) -> dict:
+    pre = pipe.named_steps["prep"]
+    clf = pipe.named_steps["clf"]
+    if clf.coef_.shape[0] != 1:
+        raise ValueError("Only binary LogisticRegression pipelines can be compiled.")
+    coef = clf.coef_[0]
+
+    num = pre.named_transformers_["num"]
+    imputer, scaler = num.named_steps["imputer"], num.named_steps["scaler"]
+    num_coef = coef[pre.output_indices_["num"]]
+    numeric = []
+    for j, name in enumerate(num_cols):
+        numeric.append({
+            "name": name,
+            "median": float(imputer.statistics_[j]),
+            "mean": float(scaler.mean_[j]) if scaler.mean_ is not None else 0.0,
+            "scale": float(scaler.scale_[j]) if scaler.scale_ is not None else 1.0,
+            "coef": float(num_coef[j]),
+        })
+
+    cat = pre.named_transformers_["cat"]
+    imputer = cat.named_steps["imputer"]
+    prefixes = {}
+    if "rollup" in cat.named_steps:
+        for name, trans, _ in cat.named_steps["rollup"].transformers_:
+            # fitted "passthrough" entries become kw_args-less FunctionTransformers
+            dtype = (getattr(trans, "kw_args", None) or {}).get("dtype")
+            if dtype and name in cat_cols:
+                prefixes[name] = int(str(dtype)[1:])
+    cat_coef = coef[pre.output_indices_["cat"]]
+    categorical = []
+    if "hash" in cat.named_steps:
+        hashers = cat.named_steps["hash"]
+        for j, name in enumerate(cat_cols):
+            hasher = hashers.named_transformers_[name]
+            categorical.append({
+                "name": name,
+                "fill": str(imputer.statistics_[j]),
+                "hash": {
+                    "n_features": int(hasher.n_features),
+                    "alternate_sign": bool(hasher.alternate_sign),
+                    "coef": [float(w) for w in cat_coef[hashers.output_indices_[name]]],
+                },
+            })
+    else:
+        ohe = cat.named_steps["ohe"]
+        if ohe.drop_idx_ is not None:
+            raise ValueError("OneHotEncoder with dropped categories cannot be compiled.")
+        infrequent = getattr(ohe, "infrequent_categories_", None) or [None] * len(cat_cols)
+        offset = 0
+        for j, name in enumerate(cat_cols):
+            rare = set() if infrequent[j] is None else {str(c) for c in infrequent[j]}
+            # frequent categories keep their order; the infrequent bucket is the last output column
+            cats = [str(c) for c in ohe.categories_[j] if str(c) not in rare]
+            col = {
+                "name": name,
+                "fill": str(imputer.statistics_[j]),
+                "coef": {c: float(w) for c, w in zip(cats, cat_coef[offset:offset + len(cats)])},
+            }
+            offset += len(cats)
+            if rare:
+                col["other"] = float(cat_coef[offset])
+                offset += 1
+            categorical.append(col)
+    for col in categorical:
+        if col["name"] in prefixes:
+            col["prefix"] = prefixes[col["name"]]
+
+    return {
+        "format": FORMAT,
+        "classes": [c.item() if hasattr(c, "item") else c for c in clf.classes_],
+        "intercept": float(clf.intercept_[0]),
+        "numeric": numeric,
+        "categorical": categorical,
+    }
+
+
+def save_compiled(compiled: dict, path: Path) -> None:
+    Path(path).write_text(json.dumps(compiled))
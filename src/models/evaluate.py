@@ -1,31 +1,208 @@
+"""Chunked evaluation of the trained model.
+
+Features are streamed in chunks and only the training holdout recorded in
+``artifacts/version.json`` is scored (older models without it are scored on
+every row). Predictions are folded into 2x2 confusion counts, overall and per
+segment (WORKSITE_STATE, SOC major group, FULL_TIME_POSITION), so memory does
+not grow with the dataset. Bootstrap confidence intervals resample the
+confusion counts with a multinomial draw, which is equivalent to resampling
+rows for any metric computed from the confusion matrix. Results go to
+``docs/eval.json`` and the training run in MLflow.
+"""
 import json
+import os
 from pathlib import Path
 
 import joblib
+import mlflow
+import numpy as np
 import pandas as pd
-from sklearn.metrics import classification_report, confusion_matrix, f1_score
+from sklearn.model_selection import train_test_split
+
+from ..data.storage import iter_processed_chunks
+from ..profiling import profile_stage, profiled
+from . import prep_cache
+from .train import MLRUNS, load_cfg
 
 BASE = Path(__file__).resolve().parents[2]
-PROC = BASE / "data" / "processed"
 ART = BASE / "artifacts"
 DOC = BASE / "docs"
 DOC.mkdir(parents=True, exist_ok=True)
 
+SEGMENTS = ["WORKSITE_STATE", "SOC_MAJOR", "FULL_TIME_POSITION"]
+
+
+def _segment_keys(chunk: pd.DataFrame) -> dict:
+    return {
+        "WORKSITE_STATE": chunk["WORKSITE_STATE"].astype(str),
+        "SOC_MAJOR": chunk["SOC_CODE"].astype(str).str[:2],
+        "FULL_TIME_POSITION": chunk["FULL_TIME_POSITION"].astype(str),
+    }
+
+
+def cells(y, yhat) -> np.ndarray:
+    """Confusion counts ``[tn, fp, fn, tp]``."""
+    return np.bincount(np.asarray(y, dtype=int) * 2 + np.asarray(yhat, dtype=int), minlength=4)
+
+
+def _div(a, b):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    return np.divide(a, b, out=np.zeros(np.broadcast(a, b).shape), where=b > 0)
+
+
+def f1_scores(c) -> dict:
+    """F1 variants from confusion counts; ``c`` may carry leading (e.g. bootstrap) axes."""
+    c = np.asarray(c, dtype=float)
+    tn, fp, fn, tp = c[..., 0], c[..., 1], c[..., 2], c[..., 3]
+    f1_pos, f1_neg = _div(2 * tp, 2 * tp + fp + fn), _div(2 * tn, 2 * tn + fn + fp)
+    pos, neg = tp + fn, tn + fp
+    # like sklearn, macro averages only over classes present in y or the predictions
+    present = (pos + tp + fp > 0).astype(float) + (neg + tn + fn > 0).astype(float)
+    return {
+        "f1_positive": f1_pos,
+        "f1_macro": _div(f1_pos * (pos + tp + fp > 0) + f1_neg * (neg + tn + fn > 0), present),
+        "f1_weighted": _div(f1_pos * pos + f1_neg * neg, pos + neg),
+    }
+
+
+def bootstrap_ci(c, n_boot: int = 1000, level: float = 0.95, seed: int = 42) -> dict:
+    """Percentile intervals ``{metric: [lo, hi]}`` from ``n_boot`` multinomial resamples of ``c``."""
+    c = np.asarray(c)
+    n = int(c.sum())
+    if n == 0:
+        return {}
+    draws = np.random.default_rng(seed).multinomial(n, c / n, size=n_boot)
+    q = [(1 - level) / 2 * 100, (1 + level) / 2 * 100]
+    return {k: [float(x) for x in np.percentile(v, q)] for k, v in f1_scores(draws).items()}
+
+
+def report_dict(c) -> dict:
+    """``classification_report(output_dict=True)`` equivalent for binary confusion counts."""
+    tn, fp, fn, tp = (int(x) for x in c)
+    n = tn + fp + fn + tp
+    out = {}
+    for label, hit, false_pos, miss in [("0", tn, fn, fp), ("1", tp, fp, fn)]:
+        precision, recall = float(_div(hit, hit + false_pos)), float(_div(hit, hit + miss))
+        out[label] = {"precision": precision, "recall": recall,
+                      "f1-score": float(_div(2 * precision * recall, precision + recall)),
+                      "support": float(hit + miss)}
+    out["accuracy"] = float(_div(tn + tp, n))
+    keys = ["precision", "recall", "f1-score"]
+    out["macro avg"] = {**{k: (out["0"][k] + out["1"][k]) / 2 for k in keys}, "support": float(n)}
+    out["weighted avg"] = {**{k: float(_div(out["0"][k] * out["0"]["support"] + out["1"][k] * out["1"]["support"], n))
+                              for k in keys}, "support": float(n)}
+    return out
+
+
+def _holdout_mask(holdout: dict | None, y_all: np.ndarray) -> np.ndarray:
+    if not holdout:
+        return np.ones(len(y_all), dtype=bool)
+    if holdout["kind"] == "every":
+        return np.arange(len(y_all)) % int(holdout["n"]) == 0
+    _, test_idx = train_test_split(np.arange(len(y_all)), test_size=holdout["test_size"],
+                                   random_state=holdout["random_state"], stratify=y_all)
+    mask = np.zeros(len(y_all), dtype=bool)
+    mask[test_idx] = True
+    return mask
+
+
+@profiled("eval.evaluate")
+def evaluate(model, chunks_fn, target: str, holdout: dict | None = None, design=None,
+             n_boot: int = 1000, level: float = 0.95, min_rows: int = 30) -> dict:
+    """Score ``chunks_fn()`` frames (holdout rows only) and return the ``eval.json`` payload.
+
+    ``design`` optionally holds the model's already-transformed rows in chunk order.
+    """
+    y_all = np.concatenate([c[target].to_numpy(dtype=int) for c in chunks_fn()]) if holdout else None
+    mask_all = _holdout_mask(holdout, y_all) if holdout else None
+
+    total = np.zeros(4, dtype=np.int64)
+    seg = {s: {} for s in SEGMENTS}
+    offset = 0
+    for chunk in chunks_fn():
+        n = len(chunk)
+        mask = mask_all[offset:offset + n] if mask_all is not None else np.ones(n, dtype=bool)
+        rows = np.flatnonzero(mask)
+        start, offset = offset, offset + n
+        if not len(rows):  # small chunks can hold no holdout rows; predict() rejects empty input
+            continue
+        if design is not None:
+            yhat = model.named_steps["clf"].predict(design[start + rows])
+        else:
+            yhat = model.predict(chunk.iloc[rows])
+        part = chunk.iloc[rows]
+        code = part[target].to_numpy(dtype=int) * 2 + np.asarray(yhat, dtype=int)
+        total += np.bincount(code, minlength=4)
+        for name, keys in _segment_keys(part).items():
+            counts = pd.crosstab(keys.to_numpy(), code).reindex(columns=range(4), fill_value=0)
+            for k, row in zip(counts.index, counts.to_numpy()):
+                acc = seg[name].setdefault(str(k), np.zeros(4, dtype=np.int64))
+                acc += row
+
+    metrics = {k: float(v) for k, v in f1_scores(total).items()}
+    segments = {}
+    for name, groups in seg.items():
+        segments[name] = {}
+        for k, c in sorted(groups.items()):
+            entry = {"n": int(c.sum()), "confusion": c.tolist(), **{m: float(v) for m, v in f1_scores(c).items()}}
+            if c.sum() >= min_rows:
+                entry["ci"] = bootstrap_ci(c, n_boot, level)
+            segments[name][k] = entry
+    tn, fp, fn, tp = (int(x) for x in total)
+    return {
+        "report": report_dict(total),
+        "confusion_matrix": [[tn, fp], [fn, tp]],
+        **metrics,
+        "ci": bootstrap_ci(total, n_boot, level),
+        "ci_level": level,
+        "n_bootstrap": n_boot,
+        "n_eval": int(total.sum()),
+        "holdout": holdout or {"kind": "all"},
+        "segments": segments,
+    }
+
+
+@profile_stage("eval", model_run=True)
 def main():
-    df = pd.read_csv(PROC / "features.csv")
+    cfg, _ = load_cfg()
+    ecfg = cfg.get("evaluation", {})
+    chunksize = int(os.getenv("EVAL_CHUNKSIZE", ecfg.get("chunksize", 100_000)))
+    target, columns = cfg["target"], cfg["numeric"] + cfg["categorical"]
     model = joblib.load(ART / "model.joblib")["model"]
-    y = df["CASE_STATUS_BIN"]; X = df.drop(columns=["CASE_STATUS_BIN"])
-    yhat = model.predict(X)
-    report = classification_report(y, yhat, output_dict=True)
-    cm = confusion_matrix(y, yhat).tolist()
-    metrics = {
-        "f1_macro": f1_score(y, yhat, average="macro"),
-        "f1_weighted": f1_score(y, yhat, average="weighted"),
-        "f1_positive": f1_score(y, yhat, pos_label=1),
-    }
-    payload = {"report": report, "confusion_matrix": cm, **metrics}
+    version = json.loads((ART / "version.json").read_text()) if (ART / "version.json").exists() else {}
+    holdout = version.get("holdout")
+    if holdout is None:
+        print("[WARN] version.json has no holdout; evaluating on all rows (includes training data).")
+
+    needed = list(dict.fromkeys(columns + [target, "WORKSITE_STATE", "SOC_CODE", "FULL_TIME_POSITION"]))
+    chunks_fn = lambda: iter_processed_chunks("features", chunksize, columns=needed)
+    design = None
+    if prep_cache.enabled():
+        dhash = prep_cache.data_hash_chunks(chunks_fn(), columns + [target])
+        design = prep_cache.lookup_design(model.named_steps["prep"], dhash)
+        if design is not None:
+            print("[Eval] reusing cached design matrix")
+
+    payload = evaluate(model, chunks_fn, target, holdout, design,
+                       n_boot=int(ecfg.get("bootstrap", 1000)), level=float(ecfg.get("ci_level", 0.95)),
+                       min_rows=int(ecfg.get("min_segment_rows", 30)))
     (DOC / "eval.json").write_text(json.dumps(payload, indent=2))
-    print("[Eval] wrote docs/eval.json")
+    print(f"[Eval] wrote docs/eval.json n={payload['n_eval']} f1_positive={payload['f1_positive']:.3f} "
+          f"CI{int(payload['ci_level'] * 100)}={payload['ci'].get('f1_positive')}")
+
+    mlflow.set_tracking_uri(MLRUNS.resolve().as_uri())
+    mlflow.set_experiment("visa-lca")
+    run_id = version.get("run_id")
+    try:
+        run = mlflow.start_run(run_id=run_id) if run_id else mlflow.start_run(run_name="evaluate")
+    except mlflow.exceptions.MlflowException:
+        run = mlflow.start_run(run_name="evaluate")
+    with run:
+        metrics = {f"eval_{k}": payload[k] for k in ("f1_positive", "f1_macro", "f1_weighted")}
+        for k, (lo, hi) in payload["ci"].items():
+            metrics[f"eval_{k}_ci_low"], metrics[f"eval_{k}_ci_high"] = lo, hi
+        mlflow.log_metrics(metrics)
+        mlflow.log_dict(payload, "eval.json")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,148 @@
+"""On-disk cache of the fitted preprocessor and its transformed design matrix.
+
+Entries live under ``data/cache/prep/<key>/`` and are keyed by a hash of the
+feature rows (only the configured numeric/categorical/target columns), the
+unfitted ``ColumnTransformer`` definition and the train/test split, so
+re-running ``train`` with different classifier settings skips straight to
+the classifier fit. Each entry holds the fitted preprocessor, the CSR matrix
+for *all* rows (in frame order) and the split indices; ``evaluate`` reuses
+the matrix when the features are unchanged. Least recently used
+entries are evicted beyond ``PREP_CACHE_MAX_ENTRIES`` / ``PREP_CACHE_MAX_MB``.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+
+from ..profiling import profiled
+
+BASE = Path(__file__).resolve().parents[2]
+CACHE = BASE / "data" / "cache" / "prep"
+
+
+def enabled() -> bool:
+    return os.getenv("PREP_CACHE", "1") != "0"
+
+
+def data_hash(df: pd.DataFrame, columns) -> str:
+    return data_hash_chunks([df], columns)
+
+
+def data_hash_chunks(chunks, columns) -> str:
+    """Same digest as ``data_hash`` over the concatenated chunks (row hashes are per-row)."""
+    h = hashlib.sha256(json.dumps(list(columns)).encode())
+    for df in chunks:
+        h.update(pd.util.hash_pandas_object(df[list(columns)], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def cache_key(pre, dhash: str, split: dict) -> str:
+    spec = json.dumps({"prep": joblib.hash(clone(pre)), "data": dhash, "split": split}, sort_keys=True)
+    return hashlib.sha256(spec.encode()).hexdigest()[:24]
+
+
+def _entry_size(d: Path) -> int:
+    return sum(f.stat().st_size for f in d.iterdir() if f.is_file())
+
+
+def evict(root: Path = CACHE, max_entries: int | None = None, max_bytes: int | None = None) -> list[str]:
+    """Drop least recently used entries until both limits hold; returns the evicted keys."""
+    max_entries = int(os.getenv("PREP_CACHE_MAX_ENTRIES", "4")) if max_entries is None else max_entries
+    max_bytes = int(float(os.getenv("PREP_CACHE_MAX_MB", "1024")) * 1e6) if max_bytes is None else max_bytes
+    if not root.exists():
+        return []
+    entries = sorted((d for d in root.iterdir() if (d / "meta.json").exists()),
+                     key=lambda d: d.stat().st_mtime, reverse=True)
+    kept, total, evicted = 0, 0, []
+    for d in entries:
+        size = _entry_size(d)
+        if kept < max_entries and total + size <= max_bytes:
+            kept, total = kept + 1, total + size
+            continue
+        shutil.rmtree(d, ignore_errors=True)
+        evicted.append(d.name)
+    return evicted
+
+
+def load(key: str | None, root: Path = CACHE) -> dict | None:
+    d = root / key if key else None
+    if d is None or not (d / "meta.json").exists():
+        return None
+    try:
+        entry = json.loads((d / "meta.json").read_text())
+        entry["prep"] = joblib.load(d / "prep.joblib")
+        entry["X"] = sp.load_npz(d / "X.npz")
+        split = np.load(d / "split.npz")
+        entry["train_idx"], entry["test_idx"] = split["train"], split["test"]
+    except (OSError, ValueError, EOFError):
+        return None
+    os.utime(d)  # mark as recently used for LRU eviction
+    return entry
+
+
+def save(key: str, pre, X, train_idx, test_idx, meta: dict, root: Path = CACHE) -> Path:
+    d = root / key
+    tmp = root / f".{key}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    joblib.dump(pre, tmp / "prep.joblib")
+    sp.save_npz(tmp / "X.npz", X, compressed=False)
+    np.savez(tmp / "split.npz", train=train_idx, test=test_idx)
+    (tmp / "meta.json").write_text(json.dumps({"key": key, "created_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), **meta}))
+    shutil.rmtree(d, ignore_errors=True)
+    tmp.replace(d)
+    evict(root)
+    return d
+
+
+@profiled("train.prep_fit_or_load")
+def fit_or_load(pre, df: pd.DataFrame, target: str, columns, test_size: float = 0.2,
+                random_state: int = 42, root: Path = CACHE) -> dict:
+    """Fitted ``pre`` plus the design matrix of ``df`` and its stratified split, from cache when possible.
+
+    Returns ``{"key", "prep", "X", "train_idx", "test_idx", "hit"}``.
+    """
+    split = {"test_size": test_size, "random_state": random_state, "stratify": True}
+    dhash = data_hash(df, list(columns) + [target])
+    key = cache_key(pre, dhash, split)
+    if enabled():
+        entry = load(key, root)
+        if entry is not None:
+            return {**entry, "key": key, "hit": True}
+
+    y = df[target]
+    train_idx, test_idx = train_test_split(
+        np.arange(len(df)), test_size=test_size, random_state=random_state, stratify=y
+    )
+    X = df.drop(columns=[target])
+    pre = clone(pre).fit(X.iloc[train_idx])
+    Xt = sp.csr_matrix(pre.transform(X))
+    if enabled():
+        save(key, pre, Xt, train_idx, test_idx, {"data_hash": dhash, "columns": list(columns) + [target], "rows": len(df)}, root)
+    return {"key": key, "prep": pre, "X": Xt, "train_idx": train_idx, "test_idx": test_idx, "hit": False}
+
+
+def cached_design(pre, df: pd.DataFrame, target: str, columns, test_size: float = 0.2,
+                  random_state: int = 42, root: Path = CACHE):
+    """Design matrix of ``df`` cached for a preprocessor defined like ``pre``, or None on a miss."""
+    if not enabled() or not set(list(columns) + [target]) <= set(df.columns):
+        return None
+    return lookup_design(pre, data_hash(df, list(columns) + [target]), test_size, random_state, root)
+
+
+def lookup_design(pre, dhash: str, test_size: float = 0.2, random_state: int = 42, root: Path = CACHE):
+    """Like ``cached_design`` for a precomputed ``data_hash`` of the feature and target columns."""
+    if not enabled():
+        return None
+    split = {"test_size": test_size, "random_state": random_state, "stratify": True}
+    entry = load(cache_key(pre, dhash, split), root)
+    return None if entry is None else entry["X"]
@@ -0,0 +1,113 @@
+"""Offline batch scoring of large CSV/Parquet files.
+
+    python -m src.models.score INPUT [-o OUTPUT] [--chunksize N] [--workers N]
+
+The input is streamed in chunks and scored by a process pool (``--workers``,
+default ``min(4, cores)``). Every worker opens ``model.joblib`` with
+``mmap_mode="r"``, so the fitted arrays are shared through the page cache
+instead of being copied per process. Chunks
+are scored in parallel but written in input order with ``row``, the optional
+id column, ``proba`` (probability of CERTIFIED) and ``pred``. Inputs that
+are raw disclosure files (no feature columns) are normalized like ingest
+does, without dropping rows.
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ..data.ingest import normalize_columns
+from ..data.storage import iter_table_chunks, processed_path, write_chunks
+from ..features.build_features import build
+from ..profiling import profile_stage
+from .train import ART, load_cfg
+
+# each worker holds its own model plus a chunk in flight, so memory grows per worker
+DEFAULT_WORKERS = 4
+
+_MODEL = None
+_FEATURES = None
+
+
+def _init_worker(model_path: str, features: list):
+    global _MODEL, _FEATURES
+    _MODEL = joblib.load(model_path, mmap_mode="r")["model"]
+    _FEATURES = features
+
+
+def _score_chunk(df: pd.DataFrame, start: int, id_col: str | None, threshold: float) -> pd.DataFrame:
+    out = pd.DataFrame({"row": np.arange(start, start + len(df))}, index=df.index)
+    if id_col and id_col in df.columns:
+        out[id_col] = df[id_col].astype(str)
+    X = df if set(_FEATURES) <= set(df.columns) else build(normalize_columns(df, required=()))
+    proba = _MODEL.predict_proba(X[_FEATURES])[:, 1] if len(X) else np.empty(0)
+    out["proba"] = proba
+    out["pred"] = (proba >= threshold).astype(int)
+    return out.reset_index(drop=True)
+
+
+def _with_offsets(chunks):
+    start = 0
+    for chunk in chunks:
+        yield chunk, start
+        start += len(chunk)
+
+
+def _ordered(pool, chunks, window: int, *args):
+    """Score chunks on ``pool`` with at most ``window`` in flight; yield results in input order."""
+    pending = deque()
+    for chunk, start in _with_offsets(chunks):
+        pending.append(pool.submit(_score_chunk, chunk, start, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def score_file(src, out, model_path=ART / "model.joblib", chunksize: int = 100_000, workers: int = 0,
+               id_col: str | None = "CASE_NUMBER", threshold: float = 0.5) -> dict:
+    """Score ``src`` into ``out``; returns ``{"rows", "seconds", "rows_per_s", "workers"}``."""
+    cfg, _ = load_cfg()
+    features = cfg["numeric"] + cfg["categorical"]
+    workers = workers or min(DEFAULT_WORKERS, os.cpu_count() or 1)
+    t0 = time.perf_counter()
+    chunks = iter_table_chunks(src, chunksize)
+    columns = ["row", "proba", "pred"]
+    if workers == 1:
+        _init_worker(str(model_path), features)
+        results = (_score_chunk(c, start, id_col, threshold) for c, start in _with_offsets(chunks))
+        rows = write_chunks(results, out, columns)
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(str(model_path), features)) as pool:
+            rows = write_chunks(_ordered(pool, chunks, 2 * workers, id_col, threshold), out, columns)
+    secs = time.perf_counter() - t0
+    return {"rows": rows, "seconds": secs, "rows_per_s": rows / secs if secs else 0.0, "workers": workers}
+
+
+@profile_stage("score")
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.models.score", description="Batch-score a CSV/Parquet file.")
+    ap.add_argument("input", type=Path)
+    ap.add_argument("-o", "--output", type=Path, default=None,
+                    help="output .csv/.parquet (default: data/processed/scores.<PROCESSED_FORMAT>)")
+    ap.add_argument("--model", type=Path, default=Path(os.getenv("MODEL_PATH", ART / "model.joblib")))
+    ap.add_argument("--chunksize", type=int, default=int(os.getenv("SCORE_CHUNKSIZE", "100000")))
+    ap.add_argument("--workers", type=int, default=int(os.getenv("SCORE_WORKERS", "0")), help=f"0 = min({DEFAULT_WORKERS}, cores)")
+    ap.add_argument("--id-col", default="CASE_NUMBER", help="input column copied to the output if present")
+    ap.add_argument("--threshold", type=float, default=0.5)
+    args = ap.parse_args(argv)
+
+    out = args.output or processed_path("scores")
+    stats = score_file(args.input, out, args.model, args.chunksize, args.workers, args.id_col, args.threshold)
+    print(f"[Score] wrote {out} rows={stats['rows']} in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_s']:,.0f} rows/s, workers={stats['workers']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Out-of-core training for the logistic-regression pipeline.
+
+Pass 1 scans every chunk once to learn category vocabularies, most-frequent
+values and numeric statistics (median from a uniform bottom-k sample, mean
+and variance from running sums). Those statistics are written into the
+pipeline's imputers/scaler/encoder, and an ``SGDClassifier(loss="log_loss")``
+is then fitted with ``partial_fit`` for a number of epochs over the same
+chunks. Every ``HOLDOUT_EVERY``-th row is held out for the final F1, so the
+result is an ordinary fitted Pipeline that serving and evaluation load
+exactly like the batch-trained one.
+"""
+from collections import Counter
+
+import numpy as np
+
+HOLDOUT_EVERY = 5  # ~20% holdout, like test_size=0.2 in batch mode
+
+
+def _holdout(offset: int, n: int) -> np.ndarray:
+    return (np.arange(offset, offset + n) % HOLDOUT_EVERY) == 0
+
+
+def scan_stats(chunks, num_cols, cat_cols, sample_size: int = 100_000, seed: int = 42) -> dict:
+    rng = np.random.default_rng(seed)
+    counts = {c: Counter() for c in cat_cols}
+    num = {c: {"n": 0, "missing": 0, "sum": 0.0, "sumsq": 0.0,
+               "keys": np.empty(0), "sample": np.empty(0)} for c in num_cols}
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        for c in cat_cols:
+            counts[c].update(chunk[c].dropna().astype(str).value_counts().to_dict())
+        for c in num_cols:
+            x = chunk[c].to_numpy(dtype=float)
+            valid = x[~np.isnan(x)]
+            st = num[c]
+            st["n"] += len(valid)
+            st["missing"] += len(x) - len(valid)
+            st["sum"] += float(valid.sum())
+            st["sumsq"] += float((valid ** 2).sum())
+            # bottom-k sampling: keep the values with the k smallest random keys
+            keys = np.concatenate([st["keys"], rng.random(len(valid))])
+            sample = np.concatenate([st["sample"], valid])
+            if len(keys) > sample_size:
+                keep = np.argpartition(keys, sample_size)[:sample_size]
+                keys, sample = keys[keep], sample[keep]
+            st["keys"], st["sample"] = keys, sample
+
+    stats = {"rows": rows, "numeric": {}, "categorical": {}}
+    for c, st in num.items():
+        median = float(np.median(st["sample"])) if st["n"] else 0.0
+        # statistics of the column *after* median imputation, as SimpleImputer -> StandardScaler sees it
+        total = st["n"] + st["missing"]
+        mean = (st["sum"] + st["missing"] * median) / total if total else 0.0
+        var = max((st["sumsq"] + st["missing"] * median ** 2) / total - mean ** 2, 0.0) if total else 0.0
+        stats["numeric"][c] = {"median": median, "mean": mean, "var": var, "n": total}
+    for c, cnt in counts.items():
+        stats["categorical"][c] = {
+            "vocab": sorted(cnt),
+            "most_frequent": min(cnt.items(), key=lambda kv: (-kv[1], kv[0]))[0] if cnt else "UNK",
+        }
+    return stats
+
+
+def _apply_stats(pre, stats, num_cols, cat_cols, proto):
+    """Fit ``pre`` on a prototype chunk, then overwrite its fitted state with full-data statistics."""
+    pre.set_params(cat__ohe__categories=[stats["categorical"][c]["vocab"] for c in cat_cols])
+    pre.fit(proto)
+    num = pre.named_transformers_["num"]
+    imputer, scaler = num.named_steps["imputer"], num.named_steps["scaler"]
+    imputer.statistics_ = np.array([stats["numeric"][c]["median"] for c in num_cols])
+    scaler.mean_ = np.array([stats["numeric"][c]["mean"] for c in num_cols])
+    scaler.var_ = np.array([stats["numeric"][c]["var"] for c in num_cols])
+    scaler.scale_ = np.where(scaler.var_ > 0, np.sqrt(scaler.var_), 1.0)
+    scaler.n_samples_seen_ = np.array([stats["numeric"][c]["n"] for c in num_cols])
+    cat_imputer = pre.named_transformers_["cat"].named_steps["imputer"]
+    cat_imputer.statistics_ = np.array([stats["categorical"][c]["most_frequent"] for c in cat_cols], dtype=object)
+    return pre
+
+
+def fit_streaming(pipe, chunks_fn, target, num_cols, cat_cols, epochs: int = 5, seed: int = 42, on_epoch=None):
+    """Fit ``pipe`` (``prep`` + an SGD ``clf``) over ``chunks_fn()`` passes; returns ``(pipe, f1)``."""
+    stats = scan_stats(chunks_fn(), num_cols, cat_cols, seed=seed)
+    proto = next(iter(chunks_fn()))
+    pre = _apply_stats(pipe.named_steps["prep"], stats, num_cols, cat_cols, proto.drop(columns=[target]))
+    clf = pipe.named_steps["clf"]
+    classes = np.array([0, 1])
+    rng = np.random.default_rng(seed)
+
+    for epoch in range(epochs):
+        loss_sum, loss_n, offset, fitted = 0.0, 0, 0, epoch > 0
+        for chunk in chunks_fn():
+            train = chunk[~_holdout(offset, len(chunk))]
+            offset += len(chunk)
+            if train.empty:
+                continue
+            train = train.iloc[rng.permutation(len(train))]
+            X = pre.transform(train.drop(columns=[target]))
+            y = train[target].to_numpy(dtype=int)
+            if fitted:
+                # progressive validation: score each chunk before learning from it
+                p = np.clip(clf.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+                loss_sum += float(-(y * np.log(p) + (1 - y) * np.log(1 - p)).sum())
+                loss_n += len(y)
+            clf.partial_fit(X, y, classes=classes)
+            fitted = True
+        if on_epoch is not None and loss_n:
+            on_epoch(epoch, loss_sum / loss_n)
+
+    tp = fp = fn = 0
+    offset = 0
+    for chunk in chunks_fn():
+        test = chunk[_holdout(offset, len(chunk))]
+        offset += len(chunk)
+        if test.empty:
+            continue
+        y = test[target].to_numpy(dtype=int)
+        pred = clf.predict(pre.transform(test.drop(columns=[target])))
+        tp += int(((pred == 1) & (y == 1)).sum())
+        fp += int(((pred == 1) & (y == 0)).sum())
+        fn += int(((pred == 0) & (y == 1)).sum())
+    f1 = 2 * tp / (2 * tp + fp + fn) if tp else 0.0
+    return pipe, f1
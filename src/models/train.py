@@ -1,16 +1,24 @@
-import json, time
-import joblib, yaml, mlflow, pandas as pd
+import json, os, time
+import joblib, yaml, mlflow
+import numpy as np
 from pathlib import Path
 from sklearn.model_selection import train_test_split
 from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
 from sklearn.impute import SimpleImputer
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import f1_score
 
+from ..data.storage import iter_processed_chunks, read_processed
+from ..profiling import profile_stage, profiled, section
+from . import prep_cache
+from .compiled import compile_pipeline, save_compiled
+from .search import successive_halving
+from .streaming import HOLDOUT_EVERY, fit_streaming
+
 BASE = Path(__file__).resolve().parents[2]
-PROC = BASE / "data" / "processed"
 ART = BASE / "artifacts"
 MLRUNS = BASE / "mlruns"
 ART.mkdir(parents=True, exist_ok=True)
@@ -21,53 +29,159 @@ def load_cfg():
     thr = yaml.safe_load((BASE / "configs" / "thresholds.yaml").read_text())
     return cfg, thr
 
-def main():
-    cfg, thr = load_cfg()
-    df = pd.read_csv(PROC / "features.csv")
-    y = df[cfg["target"]]
-    X = df.drop(columns=[cfg["target"]])
-    num_cols = cfg["numeric"]
-    cat_cols = cfg["categorical"]
+def build_categorical(cat_cols, encoding=None):
+    # encoding (configs/training.yaml): method onehot | capped | hashing, plus optional prefix rollups
+    enc = encoding or {}
+    method = enc.get("method", "onehot")
+    steps = [("imputer", SimpleImputer(strategy="most_frequent"))]
+    rollup = enc.get("rollup") or {}
+    if rollup:
+        # e.g. SOC_CODE: 2 keeps the SOC major group ("15-1252" -> "15"); casting to <U{n} truncates
+        steps.append(("rollup", ColumnTransformer([
+            (c, FunctionTransformer(np.asarray, kw_args={"dtype": f"U{int(rollup[c])}"}) if c in rollup else "passthrough", [j])
+            for j, c in enumerate(cat_cols)
+        ])))
+    if method == "onehot":
+        steps.append(("ohe", OneHotEncoder(handle_unknown="ignore")))
+    elif method == "capped":
+        steps.append(("ohe", OneHotEncoder(
+            handle_unknown="infrequent_if_exist",
+            min_frequency=enc.get("min_frequency"),
+            max_categories=enc.get("max_categories"),
+        )))
+    elif method == "hashing":
+        n = int(enc.get("hash_features", 256))
+        steps.append(("hash", ColumnTransformer([
+            (c, FeatureHasher(n_features=n, input_type="string"), [j]) for j, c in enumerate(cat_cols)
+        ])))
+    else:
+        raise ValueError(f"Unknown categorical encoding '{method}' (expected onehot, capped or hashing).")
+    return Pipeline(steps=steps)
 
+def build_pipeline(num_cols, cat_cols, encoding=None):
     pre = ColumnTransformer([
         ("num", Pipeline(steps=[
             ("imputer", SimpleImputer(strategy="median")),
             ("scaler", StandardScaler())
         ]), num_cols),
-        ("cat", Pipeline(steps=[
-            ("imputer", SimpleImputer(strategy="most_frequent")),
-            ("ohe", OneHotEncoder(handle_unknown="ignore"))
-        ]), cat_cols)
+        ("cat", build_categorical(cat_cols, encoding), cat_cols)
     ])
 
-    pipe = Pipeline([
+    return Pipeline([
         ("prep", pre),
         ("clf", LogisticRegression(max_iter=200))
     ])
 
+@profiled("train.batch")
+def train_batch(cfg):
+    df = read_processed("features")
+    pipe = build_pipeline(cfg["numeric"], cfg["categorical"], cfg.get("encoding"))
+    # fitted ColumnTransformer + design matrix are reused while features and column config are unchanged
+    cached = prep_cache.fit_or_load(
+        pipe.named_steps["prep"], df, cfg["target"], cfg["numeric"] + cfg["categorical"],
+        test_size=0.2, random_state=42,
+    )
+    print(f"[Train] preprocessing cache {'hit' if cached['hit'] else 'miss'} ({cached['key']})")
+    y = df[cfg["target"]].to_numpy()
+    X, tr, te = cached["X"], cached["train_idx"], cached["test_idx"]
+    pipe.set_params(prep=cached["prep"])
+    with section("train.clf_fit"):
+        pipe.named_steps["clf"].fit(X[tr], y[tr])
+    pred = pipe.named_steps["clf"].predict(X[te])
+    mlflow.log_params({"model": "LogReg", "test_size": 0.2})
+    mlflow.set_tag("prep_cache_key", cached["key"])
+    return pipe, f1_score(y[te], pred)
+
+@profiled("train.stream")
+def train_stream(cfg):
+    # out-of-core: SGD logistic regression via partial_fit over chunks
+    scfg = cfg.get("streaming", {})
+    chunksize = int(scfg.get("chunksize", 100_000))
+    epochs = int(scfg.get("epochs", 5))
+    alpha = float(scfg.get("alpha", 1e-4))
+    enc = cfg.get("encoding") or {}
+    if enc.get("method", "onehot") != "onehot" or enc.get("rollup"):
+        raise ValueError("TRAIN_MODE=stream supports only the default onehot encoding without rollups.")
+    pipe = build_pipeline(cfg["numeric"], cfg["categorical"], cfg.get("encoding"))
+    pipe.set_params(clf=SGDClassifier(loss="log_loss", alpha=alpha, random_state=42))
+    mlflow.log_params({"model": "SGDLogReg", "test_size": 0.2, "chunksize": chunksize, "epochs": epochs, "alpha": alpha})
+
+    def on_epoch(epoch, loss):
+        mlflow.log_metric("train_log_loss", loss, step=epoch)
+        print(f"[Train] epoch {epoch + 1}/{epochs} log_loss={loss:.4f}")
+
+    return fit_streaming(
+        pipe, lambda: iter_processed_chunks("features", chunksize), cfg["target"],
+        cfg["numeric"], cfg["categorical"], epochs=epochs, on_epoch=on_epoch,
+    )
+
+@profiled("train.search")
+def train_search(cfg):
+    # successive halving over search.grid; each trial is a nested MLflow run
+    scfg = cfg.get("search", {})
+    df = read_processed("features")
+    y = df[cfg["target"]]
+    X = df.drop(columns=[cfg["target"]])
     Xtr, Xte, ytr, yte = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
     )
+    Xfit, Xval, yfit, yval = train_test_split(
+        Xtr, ytr, test_size=0.2, random_state=42, stratify=ytr
+    )
+    pipe = build_pipeline(cfg["numeric"], cfg["categorical"], cfg.get("encoding"))
+    best, trials = successive_halving(
+        pipe.named_steps["prep"], Xfit, yfit, Xval, yval, scfg.get("grid", {"C": [1.0]}),
+        n_jobs=int(scfg.get("n_jobs", -1)),
+        halving_factor=int(scfg.get("halving_factor", 3)),
+        min_resources=float(scfg.get("min_resources", 0.1)),
+    )
+    for t in trials:
+        with mlflow.start_run(nested=True, run_name=f"rung{t['rung']}"):
+            mlflow.log_params({**t["params"], "rung": t["rung"], "n_rows": t["n_rows"]})
+            mlflow.log_metrics({"f1_val": t["f1_val"], "fit_seconds": t["fit_seconds"]})
+    print(f"[Train] search: {len(trials)} trials, best {best}")
+
+    pipe.set_params(**{f"clf__{k}": v for k, v in best.items()})
+    pipe.fit(Xtr, ytr)
+    mlflow.log_params({"model": "LogReg", "test_size": 0.2, **{f"best_{k}": v for k, v in best.items()}})
+    return pipe, f1_score(yte, pipe.predict(Xte))
+
+TRAINERS = {"batch": train_batch, "stream": train_stream, "search": train_search}
+
+@profile_stage("train", model_run=True)
+def main():
+    cfg, thr = load_cfg()
+    num_cols = cfg["numeric"]
+    cat_cols = cfg["categorical"]
+    mode = os.getenv("TRAIN_MODE", cfg.get("mode", "batch")).lower()
+    if mode not in TRAINERS:
+        raise ValueError(f"Unknown training mode '{mode}' (expected {', '.join(TRAINERS)}).")
 
     mlflow.set_tracking_uri(MLRUNS.resolve().as_uri())
     mlflow.set_experiment("visa-lca")
 
-    with mlflow.start_run():
-        pipe.fit(Xtr, ytr)
-        pred = pipe.predict(Xte)
-        f1 = f1_score(yte, pred)
+    with mlflow.start_run() as run:
+        pipe, f1 = TRAINERS[mode](cfg)
 
         mlflow.log_metric("f1", float(f1))
-        mlflow.log_params({"model": "LogReg", "test_size": 0.2})
 
         model_path = ART / "model.joblib"
         joblib.dump({"model": pipe}, model_path)
+        # plain-data copy of the pipeline for the pandas-free serving path
+        with section("train.compile"):
+            save_compiled(compile_pipeline(pipe, num_cols, cat_cols), ART / "model_compiled.json")
         print(f"[Train] F1={f1:.3f}")
 
         # Tulis metadata versi model setelah F1 tersedia
+        # holdout: baris yang tidak dipakai training, supaya evaluate menilai data yang sama
+        holdout = ({"kind": "every", "n": HOLDOUT_EVERY} if mode == "stream"
+                   else {"kind": "stratified", "test_size": 0.2, "random_state": 42})
         (ART / "version.json").write_text(json.dumps({
             "trained_at_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-            "f1": float(f1)
+            "f1": float(f1),
+            "mode": mode,
+            "run_id": run.info.run_id,
+            "holdout": holdout,
         }))
 
         if f1 < float(thr["min_f1"]):
@@ -0,0 +1,317 @@
+"""Incremental drift engine.
+
+The reference profile is built once per source version of ``lca_labeled``
+and cached in ``data/monitoring``. For each monitored feature it stores
+percentile-bin counts (numeric) or top-K category counts (categorical),
+plus a small row sample. Current-window statistics are folded in
+incrementally from the serving inference log. Rotated and gzipped segments
+are read once, and the active file is read from its last offset. The
+statistics are kept in per-day buckets covering ``window_days``.
+
+PSI, binned two-sample KS (numeric) and chi-square (categorical) are
+computed from those counts. Without enough logged traffic, the engine falls
+back to the old comparison of the first and second halves of the dataset.
+"""
+import gzip
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from ..data.storage import PROC, find_processed, is_partitioned, iter_processed_chunks, load_manifest
+from ..profiling import profiled
+
+BASE = Path(__file__).resolve().parents[2]
+MON = BASE / "data" / "monitoring"
+
+N_BINS = 100          # percentile bins for numeric features (+1 missing bucket)
+TOP_K = 50            # categories kept per categorical feature (+ other + missing buckets)
+VALUE_SAMPLE = 50_000
+ROW_SAMPLE = 5_000
+OTHER, MISSING = "__other__", "__missing__"
+
+
+class _Accumulator:
+    """Exact category counts plus bottom-k samples of numeric values and whole rows."""
+
+    def __init__(self, num_cols, cat_cols, seed: int = 0):
+        self.num_cols, self.cat_cols = num_cols, cat_cols
+        self.rng = np.random.default_rng(seed)
+        self.n = 0
+        self.cats = {c: {} for c in cat_cols}
+        self.missing = {c: 0 for c in num_cols}
+        self.values = {c: (np.empty(0), np.empty(0)) for c in num_cols}
+        self.rows = (np.empty(0), pd.DataFrame(columns=num_cols + cat_cols))
+
+    @staticmethod
+    def _bottom_k(keys, items, k):
+        if len(keys) <= k:
+            return keys, items
+        keep = np.argpartition(keys, k)[:k]
+        return keys[keep], items[keep] if isinstance(items, np.ndarray) else items.iloc[keep]
+
+    def update(self, df: pd.DataFrame):
+        self.n += len(df)
+        for c in self.cat_cols:
+            for k, v in df[c].fillna(MISSING).astype(str).value_counts().items():
+                self.cats[c][k] = self.cats[c].get(k, 0) + int(v)
+        for c in self.num_cols:
+            x = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float)
+            valid = x[~np.isnan(x)]
+            self.missing[c] += len(x) - len(valid)
+            keys, vals = self.values[c]
+            self.values[c] = self._bottom_k(np.concatenate([keys, self.rng.random(len(valid))]),
+                                            np.concatenate([vals, valid]), VALUE_SAMPLE)
+        keys, rows = self.rows
+        rows = pd.concat([rows, df[self.num_cols + self.cat_cols]], ignore_index=True) if len(rows) else \
+            df[self.num_cols + self.cat_cols].reset_index(drop=True)
+        self.rows = self._bottom_k(np.concatenate([keys, self.rng.random(len(df))]), rows, ROW_SAMPLE)
+
+    def profile(self, edges=None) -> dict:
+        """Finalize to plain data; numeric bins use ``edges`` or the sample's own percentiles."""
+        out = {"n": self.n, "numeric": {}, "categorical": {}, "sample": self.rows[1].to_dict(orient="records")}
+        for c in self.num_cols:
+            vals = self.values[c][1]
+            e = np.asarray(edges[c]) if edges else np.unique(np.percentile(vals, np.linspace(0, 100, N_BINS + 1)[1:-1])) \
+                if len(vals) else np.empty(0)
+            hist = np.bincount(np.searchsorted(e, vals, side="right"), minlength=len(e) + 1).astype(float)
+            # scale the sampled histogram up to the number of non-missing rows
+            nonmissing = self.n - self.missing[c]
+            hist = hist * (nonmissing / hist.sum()) if hist.sum() else hist
+            out["numeric"][c] = {"edges": e.tolist(), "counts": hist.tolist() + [float(self.missing[c])]}
+        for c in self.cat_cols:
+            out["categorical"][c] = dict(self.cats[c])
+        return out
+
+
+def _source_fingerprint(name: str = "lca_labeled") -> str:
+    if is_partitioned(name):
+        return hashlib.sha1(json.dumps(load_manifest(name), sort_keys=True).encode()).hexdigest()
+    path = find_processed(name)
+    if path is None:
+        raise FileNotFoundError(f"No processed dataset '{name}' in {PROC}")
+    st = path.stat()
+    return hashlib.sha1(f"{path.name}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()
+
+
+@profiled("drift.build_reference")
+def build_reference(num_cols, cat_cols, mode: str = "full", chunksize: int = 100_000, root: Path = MON) -> dict:
+    """Reference (and, for ``mode="split"``, current) profiles of ``lca_labeled``, cached per source."""
+    fp = _source_fingerprint()
+    cache = root / f"reference-{mode}.json"
+    if cache.exists():
+        cached = json.loads(cache.read_text())
+        if cached.get("source") == fp and cached.get("columns") == num_cols + cat_cols:
+            return cached
+    columns = num_cols + cat_cols
+    chunks = lambda: iter_processed_chunks("lca_labeled", chunksize, columns=columns)
+    ref, cur = _Accumulator(num_cols, cat_cols, seed=0), _Accumulator(num_cols, cat_cols, seed=1)
+    if mode == "split":
+        total = sum(len(c) for c in iter_processed_chunks("lca_labeled", chunksize, columns=columns[:1]))
+        mid, offset = (total // 2 if total > 1 else 1), 0
+        for chunk in chunks():
+            cut = min(max(mid - offset, 0), len(chunk))
+            if cut:
+                ref.update(chunk.iloc[:cut])
+            if cut < len(chunk):
+                cur.update(chunk.iloc[cut:])
+            offset += len(chunk)
+    else:
+        for chunk in chunks():
+            ref.update(chunk)
+    reference = ref.profile()
+    edges = {c: reference["numeric"][c]["edges"] for c in num_cols}
+    out = {"source": fp, "mode": mode, "columns": columns, "reference": reference,
+           "current": cur.profile(edges) if mode == "split" else None}
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = cache.with_name(cache.name + ".tmp")
+    tmp.write_text(json.dumps(out))
+    tmp.replace(cache)
+    return out
+
+
+# --- current window from the inference log --------------------------------------------------------
+
+def _log_segments(path: Path):
+    """Active log plus rotated ``<name>.<stamp>[-n][.gz]`` segments, oldest first."""
+    rotated = sorted(p for p in path.parent.glob(path.name + ".*") if not p.name.endswith(".tmp"))
+    return rotated + ([path] if path.exists() else [])
+
+
+def _open(path: Path):
+    return gzip.open(path, "rb") if path.suffix == ".gz" else open(path, "rb")
+
+
+def _empty_bucket(reference: dict) -> dict:
+    return {"n": 0, "numeric": {c: [0.0] * (len(v["edges"]) + 2) for c, v in reference["numeric"].items()},
+            "categorical": {c: {} for c in reference["categorical"]}, "sample": [], "seen": 0}
+
+
+def _add_record(bucket: dict, req: dict, reference: dict, rng, cap: int):
+    bucket["n"] += 1
+    for c, spec in reference["numeric"].items():
+        x = req.get(c)
+        try:
+            x = float(x)
+        except (TypeError, ValueError):
+            x = float("nan")
+        idx = len(spec["edges"]) + 1 if x != x else int(np.searchsorted(spec["edges"], x, side="right"))
+        bucket["numeric"][c][idx] += 1
+    for c in reference["categorical"]:
+        v = req.get(c)
+        v = MISSING if v is None else str(v).strip().upper()
+        bucket["categorical"][c][v] = bucket["categorical"][c].get(v, 0) + 1
+    # reservoir sample per day for the on-demand HTML report
+    bucket["seen"] += 1
+    row = {c: req.get(c) for c in list(reference["numeric"]) + list(reference["categorical"])}
+    if len(bucket["sample"]) < cap:
+        bucket["sample"].append(row)
+    else:
+        j = int(rng.integers(bucket["seen"]))
+        if j < cap:
+            bucket["sample"][j] = row
+
+
+@profiled("drift.update_current")
+def update_current(log_path, reference: dict, window_days: int = 7, root: Path = MON, now: float | None = None) -> dict:
+    """Fold new inference-log lines into per-day buckets; returns the persisted state."""
+    log_path = Path(log_path)
+    state_path = root / "current.json"
+    state = json.loads(state_path.read_text()) if state_path.exists() else {}
+    if state.get("reference") != reference.get("source"):
+        state = {"reference": reference.get("source"), "segments": {}, "done": [], "days": {}}
+    ref = reference["reference"]
+    rng = np.random.default_rng()
+    cap = max(1, ROW_SAMPLE // max(window_days, 1))
+    for seg in _log_segments(log_path):
+        if seg.name in state["done"]:
+            continue
+        with _open(seg) as f:
+            first = f.readline()
+            if not first.endswith(b"\n"):
+                continue
+            fp = hashlib.sha1(first).hexdigest()
+            offset = state["segments"].get(fp, 0)
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # leave a partially written last line for the next run
+        mtime = seg.stat().st_mtime
+        for line in data[:end].splitlines():
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            day = time.strftime("%Y-%m-%d", time.gmtime(rec.get("ts", mtime)))
+            bucket = state["days"].setdefault(day, _empty_bucket(ref))
+            _add_record(bucket, rec.get("req") or {}, ref, rng, cap)
+        state["segments"][fp] = offset + end
+        if seg != log_path:
+            state["done"].append(seg.name)
+    cutoff = time.strftime("%Y-%m-%d", time.gmtime((now or time.time()) - window_days * 86400))
+    state["days"] = {d: b for d, b in state["days"].items() if d > cutoff}
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = state_path.with_name(state_path.name + ".tmp")
+    tmp.write_text(json.dumps(state))
+    tmp.replace(state_path)
+    return state
+
+
+def window_profile(state: dict) -> dict:
+    """Sum the day buckets into the same shape as a reference profile."""
+    out = {"n": 0, "numeric": {}, "categorical": {}, "sample": []}
+    for bucket in state["days"].values():
+        out["n"] += bucket["n"]
+        out["sample"].extend(bucket["sample"])
+        for c, counts in bucket["numeric"].items():
+            acc = out["numeric"].setdefault(c, {"counts": [0.0] * len(counts)})
+            acc["counts"] = [a + b for a, b in zip(acc["counts"], counts)]
+        for c, counts in bucket["categorical"].items():
+            acc = out["categorical"].setdefault(c, {})
+            for k, v in counts.items():
+                acc[k] = acc.get(k, 0) + v
+    return out
+
+
+# --- statistics -------------------------------------------------------------------------------------
+
+def psi(ref, cur, eps: float = 1e-4) -> np.ndarray:
+    """Population stability index per row of two (features x bins) count matrices."""
+    ref, cur = np.asarray(ref, dtype=float), np.asarray(cur, dtype=float)
+    p = np.clip(ref / np.maximum(ref.sum(axis=-1, keepdims=True), 1), eps, None)
+    q = np.clip(cur / np.maximum(cur.sum(axis=-1, keepdims=True), 1), eps, None)
+    used = (ref + cur) > 0
+    return np.where(used, (q - p) * np.log(q / p), 0.0).sum(axis=-1)
+
+
+def ks_binned(ref, cur):
+    """Two-sample KS statistic and asymptotic p-value from counts over shared bins (missing excluded)."""
+    ref, cur = np.asarray(ref, dtype=float), np.asarray(cur, dtype=float)
+    n, m = ref.sum(axis=-1), cur.sum(axis=-1)
+    d = np.abs(np.cumsum(ref, axis=-1) / np.maximum(n, 1)[..., None]
+               - np.cumsum(cur, axis=-1) / np.maximum(m, 1)[..., None]).max(axis=-1)
+    en = np.sqrt(n * m / np.maximum(n + m, 1))
+    return d, stats.kstwobign.sf(en * d)
+
+
+def chi2(ref, cur):
+    """Chi-square homogeneity test per row of two (features x categories) count matrices."""
+    table = np.stack([np.asarray(ref, dtype=float), np.asarray(cur, dtype=float)], axis=-2)
+    col = table.sum(axis=-2, keepdims=True)
+    row = table.sum(axis=-1, keepdims=True)
+    expected = row * col / np.maximum(table.sum(axis=(-2, -1), keepdims=True), 1)
+    stat = np.where(expected > 0, (table - expected) ** 2 / np.where(expected > 0, expected, 1), 0).sum(axis=(-2, -1))
+    dof = np.maximum((col[..., 0, :] > 0).sum(axis=-1) - 1, 1)
+    return stat, stats.chi2.sf(stat, dof)
+
+
+def _cat_vectors(ref_counts: dict, cur_counts: dict):
+    top = [k for k, _ in sorted(ref_counts.items(), key=lambda kv: -kv[1]) if k != MISSING][:TOP_K]
+    keys = top + [OTHER, MISSING]
+
+    def vec(counts):
+        v = [counts.get(k, 0) for k in top]
+        other = sum(n for k, n in counts.items() if k not in top and k != MISSING)
+        return v + [other, counts.get(MISSING, 0)]
+    return keys, vec(ref_counts), vec(cur_counts)
+
+
+@profiled("drift.compare")
+def compare(reference: dict, current: dict, thresholds: dict) -> dict:
+    """Per-feature PSI / KS / chi-square with drift flags, computed in one vectorized call per kind."""
+    psi_thr = float(thresholds.get("psi", 0.2))
+    p_thr = float(thresholds.get("p_value", 0.01))
+    features = {}
+    num = list(reference["numeric"])
+    if num:
+        width = max(len(reference["numeric"][c]["counts"]) for c in num)
+        # pad bins before the trailing missing bucket so features with fewer unique edges line up
+        pad = lambda v: list(v[:-1]) + [0] * (width - len(v)) + [v[-1]]
+        ref = np.array([pad(reference["numeric"][c]["counts"]) for c in num])
+        cur = np.array([pad(current["numeric"][c]["counts"]) for c in num])
+        psis = psi(ref, cur)
+        d, p = ks_binned(ref[:, :-1], cur[:, :-1])
+        for i, c in enumerate(num):
+            features[c] = {"kind": "numeric", "psi": float(psis[i]), "ks": float(d[i]), "p_value": float(p[i]),
+                           "drift": bool(psis[i] >= psi_thr or p[i] < p_thr)}
+    cat = list(reference["categorical"])
+    if cat:
+        vecs = [_cat_vectors(reference["categorical"][c], current["categorical"].get(c, {})) for c in cat]
+        width = max(len(k) for k, _, _ in vecs)
+        pad = lambda v: v + [0] * (width - len(v))
+        ref = np.array([pad(r) for _, r, _ in vecs])
+        cur = np.array([pad(q) for _, _, q in vecs])
+        psis = psi(ref, cur)
+        stat, p = chi2(ref, cur)
+        for i, c in enumerate(cat):
+            features[c] = {"kind": "categorical", "psi": float(psis[i]), "chi2": float(stat[i]), "p_value": float(p[i]),
+                           "drift": bool(psis[i] >= psi_thr or p[i] < p_thr)}
+    share = sum(f["drift"] for f in features.values()) / max(len(features), 1)
+    return {
+        "features": features,
+        "drift_share": share,
+        "dataset_drift": share >= float(thresholds.get("drift_share", 0.5)),
+    }
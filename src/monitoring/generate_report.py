@@ -1,28 +1,69 @@
+import json
+import os
+import time
 from pathlib import Path
 
 import pandas as pd
+import yaml
 
-from evidently import Report
-from evidently.presets import DataDriftPreset
+from ..profiling import profile_stage, profiled
+from .drift import MON, build_reference, compare, update_current, window_profile, _log_segments
 
 BASE = Path(__file__).resolve().parents[2]
-DATA = BASE / "data" / "processed" / "lca_labeled.csv"
 OUT_HTML = BASE / "docs" / "report.html"
+OUT_JSON = BASE / "docs" / "drift.json"
 
 
+@profiled("report.evidently_html")
+def render_html(reference: pd.DataFrame, current: pd.DataFrame, out: Path = OUT_HTML) -> Path:
+    # Evidently hanya dijalankan di atas sampel kecil, bukan seluruh dataset
+    from evidently import Report
+    from evidently.presets import DataDriftPreset
+
+    snapshot = Report(metrics=[DataDriftPreset()]).run(reference_data=reference, current_data=current)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    snapshot.save_html(str(out))
+    return out
+
+
+@profile_stage("report")
 def main():
-    df = pd.read_csv(DATA, low_memory=False)
+    cfg = yaml.safe_load((BASE / "configs" / "training.yaml").read_text())
+    thr = yaml.safe_load((BASE / "configs" / "thresholds.yaml").read_text()).get("drift", {})
+    num_cols, cat_cols = cfg["numeric"], cfg["categorical"]
+    log_path = Path(os.getenv("INFERENCE_LOG_PATH", "inference_log.jsonl"))
+    window_days = int(thr.get("window_days", 7))
 
-    mid = len(df) // 2 if len(df) > 1 else 1
-    ref = df.iloc[:mid].copy()
-    cur = df.iloc[mid:].copy()
+    current = None
+    if _log_segments(log_path) or (MON / "current.json").exists():
+        profiles = build_reference(num_cols, cat_cols, "full")
+        current = window_profile(update_current(log_path, profiles, window_days))
+        mode = "log"
+    if current is None or current["n"] < int(thr.get("min_rows", 100)):
+        # belum cukup trafik: bandingkan paruh pertama vs kedua dataset seperti sebelumnya
+        profiles = build_reference(num_cols, cat_cols, "split")
+        current, mode = profiles["current"], "split"
+    reference = profiles["reference"]
 
-    report = Report(metrics=[DataDriftPreset()])
-    snapshot = report.run(reference_data=ref, current_data=cur)
+    result = compare(reference, current, thr)
+    summary = {
+        "generated_at_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "mode": mode,
+        "window_days": window_days if mode == "log" else None,
+        "n_reference": reference["n"],
+        "n_current": current["n"],
+        **result,
+    }
+    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    OUT_JSON.write_text(json.dumps(summary, indent=2))
+    drifted = [c for c, f in result["features"].items() if f["drift"]]
+    print(f"[Monitoring] {mode}: drifted={drifted or 'none'} share={result['drift_share']:.2f}; wrote {OUT_JSON}")
 
-    OUT_HTML.parent.mkdir(parents=True, exist_ok=True)
-    snapshot.save_html(OUT_HTML)
-    print(f"[Monitoring] wrote {OUT_HTML}")
+    policy = os.getenv("DRIFT_REPORT", "auto").lower()
+    if policy == "always" or (policy == "auto" and (drifted or not OUT_HTML.exists())):
+        cols = num_cols + cat_cols
+        render_html(pd.DataFrame(reference["sample"], columns=cols), pd.DataFrame(current["sample"], columns=cols))
+        print(f"[Monitoring] wrote {OUT_HTML}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,255 @@
+"""Dependency-aware runner for the ``make all`` stages.
+
+    python -m src.pipeline                 # everything, skipping up-to-date stages
+    python -m src.pipeline train --force   # train and whatever it depends on, forced
+    python -m src.pipeline --dry-run       # show what would run
+
+Each stage's fingerprint covers its input files (processed tables, configs,
+model artifacts, its own source), the env vars it reads and its dependencies'
+fingerprints. A stage is skipped when the fingerprint matches the last
+successful run recorded in ``data/cache/pipeline.json`` and its outputs still
+exist. Ingest always runs, since only it can tell whether the remote source
+changed; its conditional download makes an unchanged run cheap, and an
+unchanged output keeps every downstream fingerprint stable. Stages whose
+dependencies are done run concurrently (``--jobs``/``PIPELINE_JOBS``), so
+validate, features and report overlap, and eval runs alongside report. Every
+stage runs as ``python -m <module>``, exactly as ``make`` does. Per-stage wall
+times and skips are logged to a ``pipeline`` run in MLflow.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parents[1]
+STATE = BASE / "data" / "cache" / "pipeline.json"
+MLRUNS = BASE / "mlruns"
+
+_PROCESSED = lambda name: [f"data/processed/{name}.*", f"data/processed/{name}/**/*"]
+_LOG = os.getenv("INFERENCE_LOG_PATH", "inference_log.jsonl")
+# modules every stage imports besides its own package
+_SHARED = ["src/data/storage.py", "src/profiling.py"]
+
+
+def _validate_outputs():
+    # full mode runs the whole-table pandera schema and writes no report
+    return [] if os.getenv("VALIDATE_MODE", "chunked").lower() == "full" else ["docs/validation.json"]
+
+
+# inputs/outputs are globs relative to the repo root; every output glob must match for a skip.
+# Code inputs cover every module the stage imports (a whole package where it imports most of it).
+# outputs may be a callable when they depend on the stage's env.
+STAGES = {
+    "ingest": {"module": "src.data.ingest", "deps": [], "always": True},
+    "validate": {
+        "module": "src.data.validate", "deps": ["ingest"],
+        "inputs": [*_PROCESSED("lca_labeled"), "configs/schema.yaml", "src/data/validate.py", *_SHARED],
+        "env": ["VALIDATE_MODE", "VALIDATE_CHUNKSIZE", "VALIDATE_MAX_SAMPLES", "FY_RANGE"],
+        "outputs": _validate_outputs,
+        # like CI's `validate || true`: data-quality failures (exit 2) do not stop the pipeline
+        "ok_codes": (0, 2),
+    },
+    "features": {
+        "module": "src.features.build_features", "deps": ["ingest"],
+        "inputs": [*_PROCESSED("lca_labeled"), "src/features/*.py", *_SHARED],
+        "env": ["PROCESSED_FORMAT"],
+        "outputs": ["data/processed/features*"],
+    },
+    "train": {
+        "module": "src.models.train", "deps": ["features"],
+        "inputs": [*_PROCESSED("features"), "configs/training.yaml", "configs/thresholds.yaml",
+                   "src/models/*.py", *_SHARED],
+        "env": ["TRAIN_MODE", "FY_RANGE", "PROCESSED_FORMAT"],
+        "outputs": ["artifacts/model.joblib", "artifacts/model_compiled.json", "artifacts/version.json"],
+    },
+    "eval": {
+        "module": "src.models.evaluate", "deps": ["train"],
+        "inputs": [*_PROCESSED("features"), "artifacts/model.joblib", "artifacts/version.json",
+                   "configs/training.yaml", "src/models/*.py", *_SHARED],
+        "env": ["EVAL_CHUNKSIZE", "FY_RANGE"],
+        "outputs": ["docs/eval.json"],
+    },
+    "report": {
+        "module": "src.monitoring.generate_report", "deps": ["ingest"],
+        "inputs": [*_PROCESSED("lca_labeled"), f"{_LOG}*", "configs/training.yaml", "configs/thresholds.yaml",
+                   "src/monitoring/*.py", *_SHARED],
+        "env": ["DRIFT_REPORT", "INFERENCE_LOG_PATH", "FY_RANGE"],
+        "outputs": ["docs/drift.json"],
+    },
+}
+
+SMALL_FILE = 1 << 20  # hash contents below this size; larger files are identified by size + mtime
+
+
+def _files(patterns) -> list:
+    out = set()
+    for pattern in patterns:
+        # absolute patterns (e.g. INFERENCE_LOG_PATH) pass through BASE / pattern unchanged
+        out.update(Path(p) for p in glob.glob(str(BASE / pattern), recursive=True) if os.path.isfile(p))
+    return sorted(out)
+
+
+def fingerprint(name: str, upstream: dict) -> str:
+    """Hash of a stage's inputs, env and dependency fingerprints."""
+    spec = STAGES[name]
+    h = hashlib.sha256(name.encode())
+    for dep in spec["deps"]:
+        h.update(f"dep:{dep}={upstream[dep]}".encode())
+    for var in spec.get("env", []):
+        h.update(f"env:{var}={os.getenv(var, '')}".encode())
+    for path in _files(spec.get("inputs", [])):
+        st = path.stat()
+        h.update(f"file:{os.path.relpath(path, BASE)}:{st.st_size}".encode())
+        if st.st_size < SMALL_FILE:
+            h.update(path.read_bytes())
+        else:
+            h.update(str(st.st_mtime_ns).encode())
+    return h.hexdigest()
+
+
+def _outputs(name: str) -> list:
+    outputs = STAGES[name].get("outputs", [])
+    return outputs() if callable(outputs) else outputs
+
+
+def _outputs_exist(name: str) -> bool:
+    return all(_files([pattern]) for pattern in _outputs(name))
+
+
+def load_state() -> dict:
+    return json.loads(STATE.read_text()) if STATE.exists() else {}
+
+
+def save_state(state: dict):
+    STATE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE.with_name(STATE.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True))
+    tmp.replace(STATE)
+
+
+def plan(targets=None) -> list:
+    """``targets`` plus everything they depend on, in declaration order."""
+    wanted, todo = set(), list(targets or STAGES)
+    while todo:
+        name = todo.pop()
+        if name not in STAGES:
+            raise SystemExit(f"[Pipeline] unknown stage '{name}' (choose from {', '.join(STAGES)})")
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(STAGES[name]["deps"])
+    return [s for s in STAGES if s in wanted]
+
+
+def _run_stage(name: str) -> tuple:
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-m", STAGES[name]["module"]], cwd=BASE,
+                          capture_output=True, text=True)
+    return proc, time.perf_counter() - t0
+
+
+def _print_output(name: str, proc):
+    # stages run concurrently, so their output is printed whole when each one finishes
+    for line in (proc.stdout + proc.stderr).splitlines():
+        print(f"  [{name}] {line}")
+
+
+def run(targets=None, force: bool = False, jobs: int = 2, dry_run: bool = False) -> dict:
+    """Run the planned stages; returns ``{stage: {"status", "seconds", "fingerprint"}}``."""
+    stages = plan(targets)
+    state = load_state()
+    results, fps = {}, {}
+    pending = {}
+    remaining = list(stages)
+
+    def ready(name):
+        return all(results.get(dep, {}).get("status") in ("ran", "skipped", "would-run")
+                   for dep in STAGES[name]["deps"])
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while remaining or pending:
+            # a skipped stage can unblock its dependants at once, so rescan until nothing new is ready
+            while ready_now := [s for s in remaining if ready(s)]:
+                for name in ready_now:
+                    remaining.remove(name)
+                    # inputs are final here: every upstream stage has finished
+                    fps[name] = fp = fingerprint(name, fps)
+                    fresh = (not force and not STAGES[name].get("always")
+                             and state.get(name, {}).get("fingerprint") == fp and _outputs_exist(name))
+                    if fresh or dry_run:
+                        results[name] = {"status": "skipped" if fresh else "would-run", "seconds": 0.0,
+                                         "fingerprint": fp}
+                        print(f"[Pipeline] {name}: {'up to date' if fresh else 'would run'}")
+                        continue
+                    print(f"[Pipeline] {name}: running")
+                    pending[pool.submit(_run_stage, name)] = name
+            if not pending:
+                blocked = [s for s in remaining if not ready(s)]
+                for name in blocked:
+                    results[name] = {"status": "blocked", "seconds": 0.0}
+                    print(f"[Pipeline] {name}: not run (an upstream stage failed)")
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = pending.pop(fut)
+                proc, secs = fut.result()
+                _print_output(name, proc)
+                if proc.returncode in STAGES[name].get("ok_codes", (0,)):
+                    if proc.returncode == 0:
+                        state[name] = {"fingerprint": fps[name], "seconds": round(secs, 3),
+                                       "finished_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+                    else:
+                        state.pop(name, None)  # tolerated failure: re-check on the next run
+                    save_state(state)
+                    results[name] = {"status": "ran", "seconds": secs, "fingerprint": fps[name]}
+                    print(f"[Pipeline] {name}: done in {secs:.2f}s")
+                else:
+                    results[name] = {"status": "failed", "seconds": secs, "returncode": proc.returncode}
+                    print(f"[Pipeline] {name}: FAILED (exit {proc.returncode}) after {secs:.2f}s")
+    return results
+
+
+def log_to_mlflow(results: dict, wall: float):
+    import mlflow
+
+    mlflow.set_tracking_uri(MLRUNS.resolve().as_uri())
+    mlflow.set_experiment("visa-lca")
+    version_path = BASE / "artifacts" / "version.json"
+    version = json.loads(version_path.read_text()) if version_path.exists() else {}
+    with mlflow.start_run(run_name="pipeline"):
+        if version.get("run_id"):
+            mlflow.set_tag("train_run_id", version["run_id"])
+        metrics = {"pipeline_wall_s": wall}
+        for name, r in results.items():
+            metrics[f"stage_{name}_s"] = r["seconds"]
+            metrics[f"stage_{name}_skipped"] = float(r["status"] == "skipped")
+        mlflow.log_metrics(metrics)
+        mlflow.set_tags({f"stage_{name}": r["status"] for name, r in results.items()})
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m src.pipeline", description="Run pipeline stages that are out of date.")
+    ap.add_argument("stages", nargs="*", help=f"targets (default: all of {', '.join(STAGES)})")
+    ap.add_argument("--force", action="store_true", help="run every planned stage even if up to date")
+    ap.add_argument("--jobs", type=int, default=int(os.getenv("PIPELINE_JOBS", "2")), help="stages run concurrently")
+    ap.add_argument("--dry-run", action="store_true", help="print the plan without running anything")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    results = run(args.stages or None, args.force, args.jobs, args.dry_run)
+    wall = time.perf_counter() - t0
+    ran = [n for n, r in results.items() if r["status"] == "ran"]
+    failed = [n for n, r in results.items() if r["status"] in ("failed", "blocked")]
+    print(f"[Pipeline] ran={ran or 'none'} failed={failed or 'none'} in {wall:.2f}s")
+    if not args.dry_run and ran:
+        log_to_mlflow(results, wall)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Opt-in profiling of pipeline stages and their hot functions.
+
+Set ``PROFILE=1`` to time every ``@profile_stage`` entry point (each module's
+``main()``) and every ``@profiled`` / ``with section(...)`` hot path inside
+it. Each one records wall time, CPU time, resident memory (RSS delta and the
+process peak) and a call count. ``PROFILE_TRACEMALLOC=1`` adds the traced
+Python-heap peak per section and the top allocation sites, captured after the
+first call of each section and at the end of the stage. ``PROFILE_CPROFILE=1``
+also runs the whole stage under cProfile. When ``PROFILE`` is unset the
+wrappers only check a flag.
+
+Results go to ``data/profiles/<stage>.json``, plus ``<stage>.prof`` and a
+cumulative-time text summary for cProfile. They are also logged to MLflow as
+``prof.<section>.*`` metrics with the files as artifacts. Train and evaluate
+attach them to the training run recorded in ``artifacts/version.json``; the
+other stages log to a ``profile-<stage>`` run.
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASE = Path(__file__).resolve().parents[1]
+OUT = BASE / "data" / "profiles"
+MLRUNS = BASE / "mlruns"
+TOP_ALLOCATIONS = 15
+
+_records = {}
+_snapshots = {}
+_peaks = []  # tracemalloc peaks of enclosing sections, saved across reset_peak()
+
+
+def _flag(name: str) -> bool:
+    return os.getenv(name, "0").lower() in ("1", "true", "yes")
+
+
+def enabled() -> bool:
+    return _flag("PROFILE")
+
+
+def _rss_mb() -> float | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux (bytes on macOS); this pipeline runs on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _top_allocations(limit: int = TOP_ALLOCATIONS) -> list:
+    stats = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ]).statistics("lineno")
+    return [f"{s.size / 2**20:.2f} MiB in {s.count} blocks at {s.traceback}" for s in stats[:limit]]
+
+
+@contextmanager
+def section(name: str):
+    """Profile the enclosed block as ``name`` (no-op unless ``PROFILE`` is set)."""
+    if not enabled():
+        yield
+        return
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        _peaks.append(0)
+        tracemalloc.reset_peak()
+    rss0, cpu0, t0 = _rss_mb(), time.process_time(), time.perf_counter()
+    try:
+        yield
+    finally:
+        wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+        rss1 = _rss_mb()
+        rec = _records.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "rss_delta_mb": 0.0,
+                                         "peak_rss_mb": 0.0})
+        rec["calls"] += 1
+        rec["wall_s"] += wall
+        rec["cpu_s"] += cpu
+        if rss0 is not None and rss1 is not None:
+            rec["rss_delta_mb"] = max(rec["rss_delta_mb"], rss1 - rss0)
+        rec["peak_rss_mb"] = max(rec["peak_rss_mb"], _peak_rss_mb() or 0.0)
+        if tracing and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], _peaks.pop())
+            if _peaks:
+                _peaks[-1] = max(_peaks[-1], peak)
+            rec["traced_peak_mb"] = max(rec.get("traced_peak_mb", 0.0), peak / 2**20)
+            if name not in _snapshots:
+                _snapshots[name] = _top_allocations()
+
+
+def profiled(name: str):
+    """Decorator form of ``section``."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with section(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def _log_mlflow(stage: str, report: dict, files: list, model_run: bool):
+    import mlflow
+
+    mlflow.set_tracking_uri(MLRUNS.resolve().as_uri())
+    mlflow.set_experiment("visa-lca")
+    run_id = None
+    if model_run and (BASE / "artifacts" / "version.json").exists():
+        run_id = json.loads((BASE / "artifacts" / "version.json").read_text()).get("run_id")
+    try:
+        run = mlflow.start_run(run_id=run_id) if run_id else mlflow.start_run(run_name=f"profile-{stage}")
+    except mlflow.exceptions.MlflowException:
+        run = mlflow.start_run(run_name=f"profile-{stage}")
+    with run:
+        mlflow.log_metrics({f"prof.{name}.{k}": float(v) for name, rec in report["sections"].items()
+                            for k, v in rec.items() if isinstance(v, (int, float))})
+        for f in files:
+            mlflow.log_artifact(str(f), artifact_path="profiles")
+
+
+def _finish(stage: str, prof, model_run: bool):
+    report = {"stage": stage, "sections": dict(_records)}
+    if _snapshots:
+        report["top_allocations"] = dict(_snapshots)
+    OUT.mkdir(parents=True, exist_ok=True)
+    files = [OUT / f"{stage}.json"]
+    if prof is not None:
+        prof.dump_stats(OUT / f"{stage}.prof")
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(40)
+        (OUT / f"{stage}.cprofile.txt").write_text(buf.getvalue())
+        files += [OUT / f"{stage}.prof", OUT / f"{stage}.cprofile.txt"]
+    files[0].write_text(json.dumps(report, indent=2))
+    for name, rec in sorted(_records.items(), key=lambda kv: -kv[1]["wall_s"]):
+        print(f"[Profile] {name:<28} calls={rec['calls']:<5} wall={rec['wall_s']:.3f}s cpu={rec['cpu_s']:.3f}s "
+              f"rss+={rec['rss_delta_mb']:.1f}MB peak_rss={rec['peak_rss_mb']:.0f}MB"
+              + (f" traced_peak={rec['traced_peak_mb']:.1f}MB" if "traced_peak_mb" in rec else ""))
+    try:
+        _log_mlflow(stage, report, files, model_run)
+    except Exception as e:  # profiling must never fail the stage it measures
+        print(f"[WARN] could not log profile to MLflow: {e}")
+    print(f"[Profile] wrote {files[0]}")
+
+
+def profile_stage(stage: str, model_run: bool = False):
+    """Wrap a module's ``main()``; ``model_run`` attaches results to the training run."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not enabled():
+                return fn(*args, **kwargs)
+            _records.clear()
+            _snapshots.clear()
+            started = _flag("PROFILE_TRACEMALLOC") and not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            prof = cProfile.Profile() if _flag("PROFILE_CPROFILE") else None
+            ok = False
+            try:
+                with section(stage):
+                    out = fn(*args, **kwargs) if prof is None else prof.runcall(fn, *args, **kwargs)
+                ok = True
+                return out
+            finally:
+                if tracemalloc.is_tracing():
+                    _snapshots[stage] = _top_allocations()
+                if started:
+                    tracemalloc.stop()
+                # a failed train leaves version.json pointing at the previous model's run
+                _finish(stage, prof, model_run and ok)
+        return inner
+    return wrap
@@ -1,7 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-import joblib, os, pandas as pd, json, re
-from pydantic import BaseModel, Field, field_validator
+import os, re, time
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from .batching import MicroBatcher
+from .metrics import CONTENT_TYPE, MetricsMiddleware, ServingMetrics
+from .model_store import ModelStore
+from .result_cache import ResultCache
+from .scoring import load_scorer, parse_batch
 
 US = {"AL","AK","AZ","AR","CA","CO","CT","DE","FL","GA","HI","IA","ID","IL","IN","KS","KY","LA","MA","MD","ME","MI","MN","MO","MS","MT","NC","ND","NE","NH","NJ","NM","NV","NY","OH","OK","OR","PA","RI","SC","SD","TN","TX","UT","VA","VT","WA","WI","WV","WY","DC"}
 
@@ -24,13 +33,17 @@ class Payload(BaseModel):
         return v
 
 VER_PATH = os.getenv("VERSION_PATH","version.json")
-@app.get("/version")
-def version():
-    try: return json.load(open(VER_PATH))
-    except: return {"trained_at_utc": None, "f1": None}
-
-
 MODEL_PATH = os.getenv("MODEL_PATH", "artifacts/model.joblib")
+COMPILED_MODEL_PATH = os.getenv("COMPILED_MODEL_PATH", "artifacts/model_compiled.json")
+SCORER = os.getenv("SCORER", "auto").lower()  # auto | compiled | pipeline
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+MICROBATCH = os.getenv("MICROBATCH", "0").lower() in ("1", "true", "yes")
+MICROBATCH_WAIT_MS = float(os.getenv("MICROBATCH_WAIT_MS", "2"))
+MICROBATCH_MAX_ROWS = int(os.getenv("MICROBATCH_MAX_ROWS", "256"))
+MODEL_RELOAD_S = float(os.getenv("MODEL_RELOAD_S", "0"))  # 0 = load once at startup
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "10000"))  # 0 disables the result cache
+PREDICT_CACHE_TTL_S = float(os.getenv("PREDICT_CACHE_TTL_S", "3600"))  # 0 = no expiry
+PREDICT_CACHE_WAGE_BUCKET = float(os.getenv("PREDICT_CACHE_WAGE_BUCKET", "0"))  # 0 = exact WAGE_RATE
 
 app = FastAPI(title="Visa LCA Classifier (Demo)")
 app.add_middleware(
@@ -40,6 +53,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+METRICS = ServingMetrics()
+app.add_middleware(MetricsMiddleware, metrics=METRICS,
+                   paths=("/predict", "/predict/batch", "/health", "/version", "/metrics"))
 
 class RequestPayload(BaseModel):
     FULL_TIME_POSITION: str = Field(..., description="Y/N")
@@ -48,22 +64,148 @@ class RequestPayload(BaseModel):
     SOC_CODE: str
     WAGE_RATE: float
 
+_PAYLOAD_BODY = {"requestBody": {"required": True, "content": {
+    "application/json": {"schema": RequestPayload.model_json_schema()}}}}
+
+# canned row scored by a freshly loaded model before it takes traffic
+_WARMUP_ROW = {"FULL_TIME_POSITION": "Y", "EMPLOYER_STATE": "CA", "WORKSITE_STATE": "CA",
+               "SOC_CODE": "15-1252", "WAGE_RATE": 100000.0}
+
 _model = None
+_store = None
+_cache = ResultCache(PREDICT_CACHE_SIZE, PREDICT_CACHE_TTL_S, PREDICT_CACHE_WAGE_BUCKET)
+_batcher = None
 
 @app.on_event("startup")
 def startup():
-    global _model
-    if os.path.exists(MODEL_PATH):
-        _model = joblib.load(MODEL_PATH).get("model")
+    global _store, _batcher
+    _store = ModelStore(lambda: load_scorer(MODEL_PATH, COMPILED_MODEL_PATH, SCORER),
+                        [COMPILED_MODEL_PATH, MODEL_PATH], VER_PATH, _WARMUP_ROW, MODEL_RELOAD_S, _swap)
+    _store.reload(force=True)
+    # with MODEL_RELOAD_S set, a daemon thread republishes retrained artifacts
+    _store.start()
+    if MICROBATCH:
+        # coalesce concurrent /predict calls into one proba_many call
+        _batcher = MicroBatcher(_score, MICROBATCH_MAX_ROWS, MICROBATCH_WAIT_MS)
+
+@app.on_event("shutdown")
+async def shutdown():
+    if _store is not None:
+        _store.close()
+    if _batcher is not None:
+        await _batcher.aclose()
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "model_loaded": _model is not None}
+    out = {"status": "ok", "model_loaded": _model is not None}
+    if _store is not None:
+        out["model"] = _store.stats()
+    if _cache.enabled:
+        out["cache"] = _cache.stats()
+    if _batcher is not None:
+        out["batcher"] = _batcher.stats()
+    return out
+
+@app.get("/version")
+def version():
+    # cached on every swap instead of re-reading version.json per call
+    # empty until a model has loaded
+    return (_store.version if _store is not None else None) or {"trained_at_utc": None, "f1": None}
 
-@app.post("/predict")
-def predict(p: RequestPayload):
+@app.get("/metrics")
+def metrics():
+    return Response(METRICS.render(), media_type=CONTENT_TYPE)
+
+@app.post("/predict", openapi_extra=_PAYLOAD_BODY)
+async def predict(request: Request):
+    # validated by hand (not as a typed parameter) so validation time is measurable
+    req = _validate(await _json_body(request), "/predict")
+    if _model is None:
+        return {"error": "Model not loaded. Train first."}
+    if _batcher is not None:
+        proba = await _batcher.submit(req)
+    else:
+        proba = (await run_in_threadpool(_score, [req]))[0]
+    return _result(proba)
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    """Score a JSON array (or NDJSON body) of payloads in one model call, keeping input order."""
     if _model is None:
         return {"error": "Model not loaded. Train first."}
-    df = pd.DataFrame([p.dict()])
-    proba = _model.predict_proba(df)[0,1]
+    try:
+        rows = parse_batch(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}")
+    if len(rows) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch of {len(rows)} rows exceeds MAX_BATCH_SIZE={MAX_BATCH_SIZE}.")
+    return await run_in_threadpool(_score_batch, rows)
+
+def _result(proba):
     return {"label": "CERTIFIED" if proba>=0.5 else "DENIED", "proba_certified": round(float(proba),4)}
+
+def _score(rows):
+    model = _model  # one snapshot per call, so a concurrent swap cannot split a batch
+    if not _cache.active(model):
+        return _score_model(model, rows)
+    keys = [_cache.key(r) for r in rows]
+    probas = _cache.get_many(model, keys)
+    miss = [i for i, p in enumerate(probas) if p is None]
+    METRICS.cache_lookups.inc("hit", amount=len(rows) - len(miss))
+    METRICS.cache_lookups.inc("miss", amount=len(miss))
+    if miss:
+        for i, p in zip(miss, _score_model(model, [rows[i] for i in miss])):
+            probas[i] = p
+        evicted = _cache.put_many(model, [(keys[i], probas[i]) for i in miss])
+        if evicted:
+            METRICS.cache_evictions.inc(amount=evicted)
+    return probas
+
+def _score_model(model, rows):
+    probas, timings = model.proba_many_timed(rows)
+    METRICS.observe_scoring(model.kind, len(rows), timings)
+    return probas
+
+def _swap(model, previous, seconds):
+    global _model
+    _cache.reset(model)  # results from the previous model must not be served
+    _model = model
+    METRICS.model_load.set(seconds)
+    if previous is not None:
+        METRICS.model_loaded.set(0, previous.kind)
+        METRICS.model_reloads.inc()
+    if model is not None:
+        METRICS.model_loaded.set(1, model.kind)
+    METRICS.model_generation.set(_store.generation)
+
+async def _json_body(request: Request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise RequestValidationError([{"type": "json_invalid", "loc": ("body",), "msg": "JSON decode error", "input": {}}])
+
+def _validate(body, path):
+    t0 = time.perf_counter()
+    try:
+        return RequestPayload.model_validate(body).dict()
+    except ValidationError as e:
+        METRICS.validation_errors.inc(path)
+        raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)])
+    finally:
+        METRICS.validation.observe(time.perf_counter() - t0, path)
+
+def _score_batch(rows):
+    results, valid = [None]*len(rows), []
+    t0 = time.perf_counter()
+    for i, row in enumerate(rows):
+        try:
+            valid.append((i, RequestPayload.model_validate(row).dict()))
+        except ValidationError as e:
+            results[i] = {"error": e.errors(include_url=False, include_context=False)}
+    METRICS.validation.observe(time.perf_counter() - t0, "/predict/batch")
+    if len(valid) < len(rows):
+        METRICS.validation_errors.inc("/predict/batch", amount=len(rows) - len(valid))
+    probas = _score([req for _, req in valid])
+    for (i, _), proba in zip(valid, probas):
+        results[i] = _result(proba)
+    return {"results": results, "n_ok": len(valid), "n_errors": len(rows)-len(valid)}
@@ -0,0 +1,32 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.serving import app as serving_app
+from src.serving.scoring import CompiledScorer
+
+ROW = {"FULL_TIME_POSITION": "Y", "EMPLOYER_STATE": "CA", "WORKSITE_STATE": "CA", "SOC_CODE": "15-1252", "WAGE_RATE": 100000.0}
+
+
+def compiled_spec(coef: float = 2.0, wage_coef: float | None = None) -> dict:
+    """Tiny compiled-logreg artifact: FULL_TIME_POSITION at +-coef, plus a scaled WAGE_RATE if wage_coef is set."""
+    numeric = [] if wage_coef is None else [
+        {"name": "WAGE_RATE", "median": 100000.0, "mean": 100000.0, "scale": 20000.0, "coef": wage_coef}]
+    return {"format": "compiled-logreg/v1", "classes": [0, 1], "intercept": 0.0, "numeric": numeric,
+            "categorical": [{"name": "FULL_TIME_POSITION", "fill": "Y", "coef": {"Y": coef, "N": -coef}}]}
+
+
+@pytest.fixture
+def row():
+    return dict(ROW)
+
+
+@pytest.fixture
+def spec():
+    return compiled_spec
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Serving app with a compiled scorer installed directly (startup is not run)."""
+    monkeypatch.setattr(serving_app, "_model", CompiledScorer(compiled_spec(2.0, wage_coef=1.0)))
+    return TestClient(serving_app.app)
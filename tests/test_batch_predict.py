@@ -0,0 +1,25 @@
+import json
+
+from src.serving import app as serving_app
+
+
+def test_batch_matches_single_and_keeps_order(client, row):
+    rows = [row, {**row, "FULL_TIME_POSITION": "N"}, {**row, "WAGE_RATE": "not-a-number"}, row]
+    out = client.post("/predict/batch", json=rows).json()
+    assert out["n_ok"] == 3 and out["n_errors"] == 1
+    assert out["results"][0] == client.post("/predict", json=row).json()
+    assert out["results"][1]["label"] == "DENIED"
+    assert "error" in out["results"][2]
+    assert out["results"][3] == out["results"][0]
+
+
+def test_batch_accepts_ndjson(client, row):
+    body = "\n".join(json.dumps(r) for r in [row, row])
+    out = client.post("/predict/batch", content=body, headers={"content-type": "application/x-ndjson"}).json()
+    assert out["n_ok"] == 2
+
+
+def test_batch_rejects_oversized_and_malformed(client, row, monkeypatch):
+    monkeypatch.setattr(serving_app, "MAX_BATCH_SIZE", 1)
+    assert client.post("/predict/batch", json=[row, row]).status_code == 413
+    assert client.post("/predict/batch", json=row).status_code == 400
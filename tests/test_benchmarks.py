@@ -0,0 +1,22 @@
+import json
+
+from benchmarks import baseline
+from src.data.ingest import REQ_OUT, make_scaled_dataset
+
+
+def test_scaled_dataset_has_realistic_cardinality():
+    df = make_scaled_dataset(20000, n_soc=300)
+    assert list(df.columns) == REQ_OUT and len(df) == 20000
+    assert df["SOC_CODE"].str.fullmatch(r"\d{2}-\d{4}").all()
+    assert df["SOC_CODE"].nunique() > 150 and df["WORKSITE_STATE"].nunique() == 51
+    assert 0.5 < (df["CASE_STATUS"] == "CERTIFIED").mean() < 0.98
+    assert make_scaled_dataset(100, seed=1).equals(make_scaled_dataset(100, seed=1))
+
+
+def test_compare_flags_slower_times_and_lower_throughput(tmp_path):
+    path = tmp_path / "baselines.json"
+    baseline.save("x", {"train_s": 1.0, "req_per_s": 100.0, "eval_s": 1.0}, path)
+    assert json.loads(path.read_text())["x"]["machine"]["cpus"]
+    regressed = baseline.compare("x", {"train_s": 2.0, "req_per_s": 50.0, "eval_s": 1.2}, tolerance=1.5, path=path)
+    assert regressed == ["train_s", "req_per_s"]
+    assert baseline.compare("missing", {"train_s": 9.0}, path=path) == []
@@ -0,0 +1,75 @@
+import http.server
+import json
+import threading
+import urllib.parse
+
+import pytest
+
+from src.data import ckan_fetch_latest as ckan
+
+PACKAGE = {"results": [{"resources": [
+    {"name": "LCA Disclosure Data FY2024", "url": "https://www.dol.gov/files/LCA_FY2024.xlsx"},
+    {"name": "LCA Disclosure Data FY2023", "url": "https://www.dol.gov/files/LCA_FY2023.xlsx"},
+    {"name": "H-1B data FY2024", "url": "https://example.com/not-dol.csv"},
+]}]}
+
+
+class _Ckan(http.server.BaseHTTPRequestHandler):
+    queries = []
+    by_query = {}  # per-query package override; PACKAGE otherwise
+
+    def do_GET(self):
+        q = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)["q"][0]
+        self.queries.append(q)
+        body = json.dumps({"result": self.by_query.get(q, PACKAGE)}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Ckan)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{srv.server_port}/api/3/action/package_search"
+    monkeypatch.setattr(ckan, "BASE_CATALOG", url)
+    monkeypatch.setattr(ckan, "BASE_GSA", url)
+    monkeypatch.setattr(ckan, "API_KEY", None)
+    monkeypatch.setattr(ckan, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(ckan, "_session", None)
+    _Ckan.queries.clear()
+    _Ckan.by_query = {}
+    yield
+    srv.shutdown()
+
+
+def test_queries_run_once_each_and_results_are_deduped(stub):
+    res = ckan.search_oflc_lca_resources(None)
+    assert sorted(_Ckan.queries) == sorted(ckan.QUERIES)
+    assert [r["url"] for r in res] == [
+        "https://www.dol.gov/files/LCA_FY2024.xlsx",
+        "https://www.dol.gov/files/LCA_FY2023.xlsx",
+    ]
+    assert ckan.pick_latest_url(res)["name"] == "LCA Disclosure Data FY2024"
+
+
+def test_year_filter_falls_back_without_refetching_and_cache_is_reused(stub):
+    assert len(ckan.search_oflc_lca_resources("2023")) == 1
+    assert len(ckan.search_oflc_lca_resources("1999")) == 2
+    assert len(_Ckan.queries) == len(ckan.QUERIES)  # second call served from the disk cache
+
+
+def test_first_query_with_results_wins_even_if_a_later_one_is_newer(stub):
+    older = {"results": [{"resources": [
+        {"name": "LCA Disclosure Data FY2022", "url": "https://www.dol.gov/files/LCA_FY2022.xlsx"}]}]}
+    _Ckan.by_query = {ckan.QUERIES[0]: {"results": []}, ckan.QUERIES[1]: older}
+    res = ckan.search_oflc_lca_resources(None)
+    assert [r["name"] for r in res] == ["LCA Disclosure Data FY2022"]  # QUERIES[2:] (FY2024) are not merged in
+    assert ckan.pick_latest_url(res)["name"] == "LCA Disclosure Data FY2022"
+    # a year filter moves on to the first query that has that year
+    assert [r["name"] for r in ckan.search_oflc_lca_resources("2024")] == ["LCA Disclosure Data FY2024"]
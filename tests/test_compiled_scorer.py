@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+import pandas as pd
+
+from src.models.compiled import compile_pipeline
+from src.models.train import build_pipeline
+from src.serving import scoring
+from src.serving.scoring import CompiledScorer, load_scorer, murmurhash3_32
+
+NUM = ["WAGE_RATE"]
+CAT = ["FULL_TIME_POSITION", "EMPLOYER_STATE", "WORKSITE_STATE", "SOC_CODE"]
+
+
+def _frame(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "FULL_TIME_POSITION": rng.choice(["Y", "N"], n),
+        "EMPLOYER_STATE": rng.choice(["CA", "TX", "WA", "NY", "MA"], n),
+        "WORKSITE_STATE": rng.choice(["CA", "TX", "WA", "NY", "MA"], n),
+        "SOC_CODE": rng.choice(["15-1252", "15-1245", "15-1256", "15-2051", "11-1021"], n),
+        "WAGE_RATE": rng.normal(110000, 25000, n),
+    })
+    df.loc[df.sample(frac=0.05, random_state=seed).index, "WAGE_RATE"] = np.nan
+    return df
+
+
+def test_compiled_scorer_matches_pipeline():
+    df = _frame(500, seed=0)
+    y = ((df["FULL_TIME_POSITION"] == "Y") & (df["WAGE_RATE"].fillna(0) > 90000)).astype(int)
+    pipe = build_pipeline(NUM, CAT).fit(df, y)
+    scorer = CompiledScorer(compile_pipeline(pipe, NUM, CAT))
+
+    test = _frame(200, seed=1)
+    test.loc[0, "SOC_CODE"] = "99-9999"  # unseen category
+    expected = pipe.predict_proba(test)[:, 1]
+    got = [scorer.proba(row) for row in test.to_dict(orient="records")]
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("encoding", [
+    {"method": "capped", "min_frequency": 30},
+    {"method": "hashing", "hash_features": 16},
+    {"method": "onehot", "rollup": {"SOC_CODE": 2}},
+    {"method": "capped", "max_categories": 3, "rollup": {"SOC_CODE": 2}},
+])
+def test_compiled_scorer_matches_pipeline_for_encodings(encoding):
+    df = _frame(500, seed=0)
+    df.loc[:9, "SOC_CODE"] = [f"29-{1000 + i}" for i in range(10)]  # rare codes
+    y = ((df["FULL_TIME_POSITION"] == "Y") & (df["WAGE_RATE"].fillna(0) > 90000)).astype(int)
+    pipe = build_pipeline(NUM, CAT, encoding).fit(df, y)
+    scorer = CompiledScorer(compile_pipeline(pipe, NUM, CAT))
+
+    test = _frame(200, seed=1)
+    test.loc[0, "SOC_CODE"] = "99-9999"
+    test.loc[1, "SOC_CODE"] = "29-1001"
+    test.loc[2, "EMPLOYER_STATE"] = None
+    expected = pipe.predict_proba(test)[:, 1]
+    got = scorer.proba_many(test.to_dict(orient="records"))
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-9)
+
+
+def test_murmurhash_matches_sklearn():
+    from sklearn.utils import murmurhash3_32 as reference
+
+    for key in ["", "a", "ab", "abc", "abcd", "15-1252", "CALIFORNIA", "é€"]:
+        assert murmurhash3_32(key.encode("utf-8")) == reference(key, positive=False)
+
+
+def test_auto_mode_raises_instead_of_returning_none_for_an_unusable_compiled_model(tmp_path, monkeypatch):
+    compiled, pipe = tmp_path / "model_compiled.json", tmp_path / "model.joblib"
+    assert load_scorer(str(pipe), str(compiled)) is None  # nothing to load yet
+    compiled.write_text('{"format": "compiled-lo')
+    with pytest.raises(ValueError, match="no pipeline artifact"):
+        load_scorer(str(pipe), str(compiled))
+
+    pipe.write_bytes(b"")
+
+    def no_sklearn(path):
+        raise ImportError("No module named 'joblib'")
+
+    monkeypatch.setattr(scoring.PipelineScorer, "load", staticmethod(no_sklearn))  # the slim image
+    with pytest.raises(ValueError, match="requirements-pipeline.txt") as exc:
+        load_scorer(str(pipe), str(compiled))
+    assert isinstance(exc.value.__cause__, ValueError)
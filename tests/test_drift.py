@@ -0,0 +1,68 @@
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from src.monitoring import drift
+
+NUM = ["WAGE_RATE"]
+CAT = ["WORKSITE_STATE", "SOC_CODE"]
+
+
+def _reference(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    acc = drift._Accumulator(NUM, CAT)
+    acc.update(pd.DataFrame({
+        "WAGE_RATE": rng.normal(100000, 20000, n),
+        "WORKSITE_STATE": rng.choice(["CA", "TX", "NY"], n),
+        "SOC_CODE": rng.choice(["15-1252", "11-1021"], n),
+    }))
+    return {"source": "test", "reference": acc.profile()}
+
+
+def _write(path, reqs, start=0, compress=False):
+    lines = "".join(json.dumps({"req": r, "pred": "CERTIFIED", "proba": 0.9, "ts": 1.7e9 + start + i}) + "\n"
+                    for i, r in enumerate(reqs))
+    opener = gzip.open if compress else open
+    with opener(path, "wt") as f:
+        f.write(lines)
+
+
+def test_log_segments_are_folded_in_once_including_rotated_and_gzipped(tmp_path):
+    ref = _reference()
+    log = tmp_path / "inference_log.jsonl"
+    shifted = [{"WAGE_RATE": 160000.0, "WORKSITE_STATE": "WA", "SOC_CODE": "15-1252"}] * 200
+    _write(log, shifted[:120])
+    state = drift.update_current(log, ref, root=tmp_path, now=1.7e9)
+    assert drift.window_profile(state)["n"] == 120
+
+    # the active file is rotated (gzipped) and a new one started: only the unseen lines count
+    _write(tmp_path / "inference_log.jsonl.20260101T000000.gz", shifted[:150], compress=True)
+    log.unlink()
+    _write(log, shifted[150:], start=150)
+    state = drift.update_current(log, ref, root=tmp_path, now=1.7e9)
+    state = drift.update_current(log, ref, root=tmp_path, now=1.7e9)
+    cur = drift.window_profile(state)
+    assert cur["n"] == 200
+
+    result = drift.compare(ref["reference"], cur, {"psi": 0.2, "p_value": 0.01})
+    assert result["features"]["WAGE_RATE"]["drift"] and result["features"]["WORKSITE_STATE"]["drift"]
+    assert result["dataset_drift"]
+
+
+def test_binned_ks_and_chi2_match_scipy_on_shared_bins():
+    rng = np.random.default_rng(1)
+    a, b = rng.normal(0, 1, 4000), rng.normal(0.1, 1, 3000)
+    edges = np.percentile(a, np.linspace(0, 100, 101)[1:-1])
+    ca = np.bincount(np.searchsorted(edges, a, side="right"), minlength=100)
+    cb = np.bincount(np.searchsorted(edges, b, side="right"), minlength=100)
+    d, _ = drift.ks_binned(ca[None], cb[None])
+    assert abs(d[0] - stats.ks_2samp(a, b).statistic) < 0.02
+
+    ref, cur = np.array([[500, 300, 200]]), np.array([[40, 40, 20]])
+    stat, p = drift.chi2(ref, cur)
+    expected = stats.chi2_contingency(np.vstack([ref[0], cur[0]]), correction=False)
+    assert np.isclose(stat[0], expected.statistic) and np.isclose(p[0], expected.pvalue)
+    assert drift.psi(ref, ref)[0] == 0
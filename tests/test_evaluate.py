@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from sklearn.metrics import classification_report, f1_score
+
+from src.models import prep_cache
+from src.models.evaluate import evaluate
+from src.models.train import build_pipeline
+
+NUM = ["WAGE_RATE"]
+CAT = ["FULL_TIME_POSITION", "WORKSITE_STATE", "SOC_CODE"]
+
+
+def _frame(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "FULL_TIME_POSITION": rng.choice(["Y", "N"], n),
+        "WORKSITE_STATE": rng.choice(["CA", "TX", "NY"], n),
+        "SOC_CODE": rng.choice(["15-1252", "15-1245", "11-1021"], n),
+        "WAGE_RATE": rng.normal(100000, 20000, n),
+    })
+    noise = rng.random(n) < 0.15
+    df["CASE_STATUS_BIN"] = ((df["WAGE_RATE"] > 95000) ^ noise).astype(int)
+    return df
+
+
+def test_chunked_evaluation_matches_sklearn_on_the_holdout():
+    df = _frame()
+    model = build_pipeline(NUM, CAT).fit(df.drop(columns=["CASE_STATUS_BIN"]), df["CASE_STATUS_BIN"])
+    chunks = lambda: (df.iloc[i:i + 400] for i in range(0, len(df), 400))
+    holdout = {"kind": "every", "n": 5}
+
+    out = evaluate(model, chunks, "CASE_STATUS_BIN", holdout, n_boot=500)
+
+    test = df.iloc[::5]
+    y, yhat = test["CASE_STATUS_BIN"], model.predict(test)
+    assert out["n_eval"] == len(test)
+    for avg, key in [("binary", "f1_positive"), ("macro", "f1_macro"), ("weighted", "f1_weighted")]:
+        assert abs(out[key] - f1_score(y, yhat, average=avg)) < 1e-12
+        lo, hi = out["ci"][key]
+        assert lo <= out[key] <= hi and hi - lo < 0.2
+    ref = classification_report(y, yhat, output_dict=True)
+    assert abs(out["report"]["weighted avg"]["recall"] - ref["weighted avg"]["recall"]) < 1e-12
+
+    soc = out["segments"]["SOC_MAJOR"]
+    assert set(soc) == {"15", "11"} and sum(s["n"] for s in soc.values()) == len(test)
+    ft = test[test["FULL_TIME_POSITION"] == "Y"]
+    assert abs(out["segments"]["FULL_TIME_POSITION"]["Y"]["f1_positive"]
+               - f1_score(ft["CASE_STATUS_BIN"], model.predict(ft))) < 1e-12
+
+
+def test_cached_design_path_matches_pipeline_path_with_tiny_chunks(tmp_path):
+    df = _frame(n=600)
+    pipe = build_pipeline(NUM, CAT)
+    cached = prep_cache.fit_or_load(pipe.named_steps["prep"], df, "CASE_STATUS_BIN", NUM + CAT, root=tmp_path)
+    pipe.set_params(prep=cached["prep"])
+    y = df["CASE_STATUS_BIN"].to_numpy()
+    pipe.named_steps["clf"].fit(cached["X"][cached["train_idx"]], y[cached["train_idx"]])
+    design = prep_cache.cached_design(cached["prep"], df, "CASE_STATUS_BIN", NUM + CAT, root=tmp_path)
+    assert design is not None
+
+    # 7-row chunks: many of them contain no holdout rows at all
+    chunks = lambda: (df.iloc[i:i + 7] for i in range(0, len(df), 7))
+    holdout = {"kind": "stratified", "test_size": 0.2, "random_state": 42}
+    via_design = evaluate(pipe, chunks, "CASE_STATUS_BIN", holdout, design, n_boot=50)
+    via_pipeline = evaluate(pipe, chunks, "CASE_STATUS_BIN", holdout, n_boot=50)
+    assert via_design["n_eval"] == len(cached["test_idx"])
+    assert via_design["confusion_matrix"] == via_pipeline["confusion_matrix"]
@@ -0,0 +1,44 @@
+import gzip
+import json
+import threading
+
+from src.serving.inference_log import InferenceLogWriter
+
+
+def test_writer_flushes_and_rotates_with_gzip(tmp_path):
+    path = tmp_path / "inference_log.jsonl"
+    writer = InferenceLogWriter(path, flush_interval=0.01, max_bytes=200, compress=True, batch_size=5).start()
+    for i in range(50):
+        assert writer.log({"i": i})
+    writer.close()
+
+    rotated = sorted(tmp_path.glob("inference_log.jsonl.*.gz"))
+    assert rotated and writer.rotations == len(rotated)
+    lines = [line for p in rotated for line in gzip.open(p, "rt").read().splitlines()]
+    if path.exists():
+        lines += path.read_text().splitlines()
+    assert sorted(json.loads(line)["i"] for line in lines) == list(range(50))
+    assert writer.stats()["dropped"] == 0
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    writer = InferenceLogWriter(tmp_path / "log.jsonl", max_queue=3)  # not started: nothing drains
+    results = [writer.log({"i": i}) for i in range(5)]
+    assert results == [True, True, True, False, False]
+    assert writer.stats()["dropped"] == 2
+
+
+def test_drop_count_is_exact_across_request_threads(tmp_path):
+    writer = InferenceLogWriter(tmp_path / "log.jsonl", max_queue=1)
+    writer.log({"i": -1})
+
+    def hammer():
+        for i in range(2000):
+            writer.log({"i": i})
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert writer.stats()["dropped"] == 8 * 2000
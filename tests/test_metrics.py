@@ -0,0 +1,34 @@
+from src.serving.metrics import Histogram
+
+
+def _samples(text):
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if not line.startswith("#")}
+
+
+def test_metrics_cover_latency_validation_scoring_and_errors(client, row):
+    before = _samples(client.get("/metrics").text)
+    assert client.post("/predict", json=row).status_code == 200
+    bad = client.post("/predict", json={**row, "WAGE_RATE": "lots"})
+    assert bad.status_code == 422 and bad.json()["detail"][0]["loc"] == ["body", "WAGE_RATE"]
+    client.post("/predict/batch", json=[row, row, {"FULL_TIME_POSITION": "Y"}])
+
+    res = client.get("/metrics")
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = _samples(res.text)
+    m = {k: v - before.get(k, 0) for k, v in after.items()}
+    assert m['visa_requests_total{path="/predict",method="POST",status="200"}'] == 1
+    assert m['visa_request_errors_total{path="/predict",status="422"}'] == 1
+    assert m['visa_request_duration_seconds_count{path="/predict",method="POST"}'] == 2
+    assert m['visa_validation_duration_seconds_count{path="/predict"}'] == 2
+    assert m['visa_validation_errors_total{path="/predict/batch"}'] == 1
+    assert m['visa_rows_scored_total{scorer="compiled"}'] == 3
+    assert m['visa_predict_proba_duration_seconds_count{scorer="compiled"}'] == 2
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("x_seconds", "x", buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 3.0):
+        h.observe(v)
+    lines = [line for line in h.render() if not line.startswith("#")]
+    assert lines == ['x_seconds_bucket{le="0.1"} 1', 'x_seconds_bucket{le="1.0"} 3', 'x_seconds_bucket{le="+Inf"} 4',
+                     "x_seconds_sum 4.05", "x_seconds_count 4"]
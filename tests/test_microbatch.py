@@ -0,0 +1,34 @@
+import asyncio
+
+from src.serving.batching import MicroBatcher
+
+def test_concurrent_submits_are_coalesced():
+    calls = []
+
+    def score_many(rows):
+        calls.append(len(rows))
+        return [row["x"] * 2 for row in rows]
+
+    async def run():
+        batcher = MicroBatcher(score_many, max_batch=8, max_wait_ms=5)
+        out = await asyncio.gather(*(batcher.submit({"x": i}) for i in range(20)))
+        stats = batcher.stats()
+        await batcher.aclose()
+        return out, stats
+
+    out, stats = asyncio.run(run())
+    assert out == [i * 2 for i in range(20)]
+    assert max(calls) <= 8 and len(calls) < 20
+    assert stats["rows"] == 20 and stats["batches"] == len(calls)
+
+def test_scoring_errors_reach_every_waiter():
+    def score_many(rows):
+        raise RuntimeError("boom")
+
+    async def run():
+        batcher = MicroBatcher(score_many, max_wait_ms=1)
+        results = await asyncio.gather(batcher.submit({}), batcher.submit({}), return_exceptions=True)
+        await batcher.aclose()
+        return results
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
@@ -0,0 +1,78 @@
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+from src.serving import app as serving_app
+from src.serving.model_store import ModelStore
+from src.serving.scoring import load_scorer
+
+
+def _write_spec(path, spec, stamp):
+    path.write_text(json.dumps(spec))
+    os.utime(path, ns=(stamp, stamp))  # mtime granularity can hide back-to-back writes
+
+
+def test_store_swaps_on_change_and_keeps_model_on_bad_artifact(tmp_path, spec, row):
+    compiled, ver = tmp_path / "model_compiled.json", tmp_path / "version.json"
+    _write_spec(compiled, spec(1.0), 1_000_000_000)
+    ver.write_text(json.dumps({"trained_at_utc": "a"}))
+    swaps = []
+    store = ModelStore(lambda: load_scorer(None, str(compiled), "compiled"), [str(compiled)], str(ver),
+                       warmup_row=row, on_swap=lambda m, prev, s: swaps.append((m, prev)))
+
+    assert store.reload() and store.generation == 1 and store.version == {"trained_at_utc": "a"}
+    assert not store.reload()  # unchanged fingerprint
+    first = store.model
+
+    _write_spec(compiled, spec(3.0), 2_000_000_000)
+    ver.write_text(json.dumps({"trained_at_utc": "b"}))
+    assert store.reload()
+    assert store.generation == 2 and store.reloads == 1 and store.version["trained_at_utc"] == "b"
+    assert store.model.proba(row) > first.proba(row)
+    assert swaps[-1] == (store.model, first)
+
+    compiled.write_text('{"format": "compiled-lo')  # half-written artifact
+    good = store.model
+    assert not store.reload()
+    assert store.model is good and store.failures == 1 and store.last_error
+
+
+def test_app_serves_reloaded_model_and_cached_version(tmp_path, monkeypatch, spec, row):
+    compiled, ver = tmp_path / "model_compiled.json", tmp_path / "version.json"
+    _write_spec(compiled, spec(1.0), 1_000_000_000)
+    ver.write_text(json.dumps({"trained_at_utc": "a", "f1": 0.8}))
+    monkeypatch.setattr(serving_app, "COMPILED_MODEL_PATH", str(compiled))
+    monkeypatch.setattr(serving_app, "VER_PATH", str(ver))
+    monkeypatch.setattr(serving_app, "SCORER", "compiled")
+
+    with TestClient(serving_app.app) as client:
+        before = client.post("/predict", json=row).json()["proba_certified"]
+        ver.unlink()
+        assert client.get("/version").json()["trained_at_utc"] == "a"  # served from memory
+
+        _write_spec(compiled, spec(3.0), 2_000_000_000)
+        ver.write_text(json.dumps({"trained_at_utc": "b", "f1": 0.9}))
+        assert serving_app._store.reload()
+        assert client.post("/predict", json=row).json()["proba_certified"] > before
+        assert client.get("/version").json()["trained_at_utc"] == "b"
+        assert client.get("/health").json()["model"]["generation"] == 2
+
+
+def test_auto_mode_keeps_model_when_compiled_artifact_is_corrupted(tmp_path, spec, row):
+    compiled, ver = tmp_path / "model_compiled.json", tmp_path / "version.json"
+    missing_pipeline = tmp_path / "model.joblib"
+    _write_spec(compiled, spec(1.0), 1_000_000_000)
+    store = ModelStore(lambda: load_scorer(str(missing_pipeline), str(compiled), "auto"),
+                       [str(compiled), str(missing_pipeline)], str(ver), warmup_row=row)
+    assert store.reload()
+    good = store.model
+
+    compiled.write_text('{"format": "compiled-lo')
+    assert not store.reload()
+    assert store.model is good and store.failures == 1 and "ValueError" in store.last_error
+
+    # a loader that finds nothing counts as a failure too, rather than publishing None
+    store._loader = lambda: None
+    assert not store.reload(force=True)
+    assert store.model is good and store.failures == 2 and store.generation == 1
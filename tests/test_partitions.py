@@ -0,0 +1,44 @@
+import pandas as pd
+
+from src.data import ingest, storage
+from src.features import build_features
+
+
+def _fake_source(tmp_path, fy, status):
+    raw = tmp_path / f"raw_{fy}_{status}.csv"
+    pd.DataFrame({
+        "CASE_STATUS": [status] * 3,
+        "EMPLOYER_STATE": ["CA"] * 3,
+        "WORKSITE_STATE": ["TX"] * 3,
+        "SOC_CODE": ["15-1252"] * 3,
+        "FULL_TIME_POSITION": ["Y"] * 3,
+        "WAGE_RATE": ["100000"] * 3,
+    }).to_csv(raw, index=False)
+    return {"path": raw, "sha256": f"{fy}{status}".ljust(64, "0"), "from_cache": False}
+
+
+def test_multi_year_ingest_is_incremental_and_readable_by_year(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "PROC", tmp_path)
+    monkeypatch.setattr(ingest, "PROC", tmp_path)
+    monkeypatch.setattr(build_features, "PROC", tmp_path)
+    resources = [{"name": f"LCA Disclosure Data FY{fy}", "url": f"https://www.dol.gov/LCA_FY{fy}.csv"} for fy in (2022, 2023)]
+    monkeypatch.setattr(ingest, "search_oflc_lca_resources", lambda year=None: resources)
+    sources = {r["url"]: _fake_source(tmp_path, fy, "CERTIFIED") for r, fy in zip(resources, (2022, 2023))}
+    monkeypatch.setattr(ingest.raw_cache, "fetch", lambda url: sources[url])
+
+    ingest.ingest_years([2022, 2023])
+    build_features.main()
+    first = storage.load_manifest("features")
+
+    # only FY2023 changes upstream; FY2022 must be left untouched
+    sources[resources[1]["url"]] = _fake_source(tmp_path, 2023, "DENIED")
+    ingest.ingest_years([2022, 2023])
+    build_features.main()
+    second = storage.load_manifest("features")
+    assert second["2022"] == first["2022"] and second["2023"] != first["2023"]
+    assert len(list((tmp_path / "lca_labeled" / "fy=2023").iterdir())) == 1
+
+    assert storage.is_partitioned("features")
+    assert len(storage.read_processed("features")) == 6
+    fy23 = storage.read_processed("features", years=[2023])
+    assert fy23["CASE_STATUS_BIN"].tolist() == [0, 0, 0]
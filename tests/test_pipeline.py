@@ -0,0 +1,88 @@
+import subprocess
+import threading
+import time
+
+from src import pipeline
+
+STAGES = {
+    "ingest": {"module": "m.ingest", "deps": [], "always": True},
+    "features": {"module": "m.features", "deps": ["ingest"], "inputs": ["raw.txt"], "outputs": ["features.txt"]},
+    "train": {"module": "m.train", "deps": ["features"], "inputs": ["features.txt", "cfg.yaml"],
+              "outputs": ["model.txt"]},
+    "eval": {"module": "m.eval", "deps": ["train"], "inputs": ["model.txt"], "outputs": ["eval.txt"]},
+    "report": {"module": "m.report", "deps": ["ingest"], "inputs": ["raw.txt"], "outputs": ["report.txt"]},
+}
+
+
+def _setup(tmp_path, monkeypatch, fail=()):
+    monkeypatch.setattr(pipeline, "BASE", tmp_path)
+    monkeypatch.setattr(pipeline, "STATE", tmp_path / "state.json")
+    monkeypatch.setattr(pipeline, "STAGES", STAGES)
+    (tmp_path / "raw.txt").write_text("rows")
+    (tmp_path / "cfg.yaml").write_text("C: 1")
+    calls, active, overlap = [], [0], []
+    lock = threading.Lock()
+
+    def fake_run(name):
+        with lock:
+            calls.append(name)
+            active[0] += 1
+            overlap.append(active[0])
+        time.sleep(0.05)
+        for out in STAGES[name].get("outputs", []):
+            (tmp_path / out).write_text(f"{name} from {[p.read_text() for p in sorted(tmp_path.glob('*.yaml'))]}")
+        with lock:
+            active[0] -= 1
+        return subprocess.CompletedProcess([], 1 if name in fail else 0, "", ""), 0.05
+
+    monkeypatch.setattr(pipeline, "_run_stage", fake_run)
+    return calls, overlap
+
+
+def test_skips_up_to_date_stages_and_reruns_only_what_changed(tmp_path, monkeypatch):
+    calls, overlap = _setup(tmp_path, monkeypatch)
+    res = pipeline.run(jobs=2)
+    assert sorted(calls) == sorted(STAGES) and all(r["status"] == "ran" for r in res.values())
+    assert max(overlap) == 2  # independent branches overlapped
+
+    calls.clear()
+    res = pipeline.run(jobs=2)
+    assert calls == ["ingest"]
+    assert {n: r["status"] for n, r in res.items() if n != "ingest"} == dict.fromkeys(
+        ["features", "train", "eval", "report"], "skipped")
+
+    calls.clear()
+    (tmp_path / "cfg.yaml").write_text("C: 2")
+    pipeline.run(["eval"], jobs=2)
+    assert calls == ["ingest", "train", "eval"]  # features is up to date; report was not requested
+
+    calls.clear()
+    (tmp_path / "eval.txt").unlink()
+    pipeline.run(jobs=2)
+    assert calls == ["ingest", "eval"]  # missing output forces a rerun
+
+
+def test_failure_blocks_dependants_and_is_not_recorded(tmp_path, monkeypatch):
+    calls, _ = _setup(tmp_path, monkeypatch, fail={"train"})
+    res = pipeline.run(jobs=1)
+    assert res["train"]["status"] == "failed" and res["eval"]["status"] == "blocked"
+    assert res["report"]["status"] == "ran"
+    assert "train" not in pipeline.load_state()
+    assert pipeline.plan(["eval"]) == ["ingest", "features", "train", "eval"]
+
+
+def test_train_fingerprint_covers_imported_modules_and_validate_outputs_follow_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "BASE", tmp_path)
+    for rel in ["src/models/train.py", "src/models/streaming.py", "src/data/storage.py"]:
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text("# v1")
+    before = pipeline.fingerprint("train", {"features": "f"})
+    for rel in ["src/models/streaming.py", "src/data/storage.py"]:
+        (tmp_path / rel).write_text("# v2")
+        assert pipeline.fingerprint("train", {"features": "f"}) != before
+        before = pipeline.fingerprint("train", {"features": "f"})
+
+    monkeypatch.setenv("VALIDATE_MODE", "full")  # writes no report, so nothing to wait for
+    assert pipeline._outputs("validate") == [] and pipeline._outputs_exist("validate")
+    monkeypatch.setenv("VALIDATE_MODE", "chunked")
+    assert not pipeline._outputs_exist("validate")
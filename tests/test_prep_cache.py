@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from src.models import prep_cache
+from src.models.train import build_pipeline
+
+NUM = ["WAGE_RATE"]
+CAT = ["FULL_TIME_POSITION", "SOC_CODE"]
+
+
+def _frame(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "FULL_TIME_POSITION": rng.choice(["Y", "N"], n),
+        "SOC_CODE": rng.choice(["15-1252", "11-1021", "13-2011"], n),
+        "WAGE_RATE": rng.normal(100000, 20000, n),
+    })
+    df["CASE_STATUS_BIN"] = (df["WAGE_RATE"] > 95000).astype(int)
+    return df
+
+
+def test_second_fit_is_a_cache_hit_and_evaluate_finds_it(tmp_path):
+    df = _frame()
+    pre = build_pipeline(NUM, CAT).named_steps["prep"]
+    first = prep_cache.fit_or_load(pre, df, "CASE_STATUS_BIN", NUM + CAT, root=tmp_path)
+    second = prep_cache.fit_or_load(build_pipeline(NUM, CAT).named_steps["prep"], df, "CASE_STATUS_BIN",
+                                    NUM + CAT, root=tmp_path)
+    assert not first["hit"] and second["hit"] and first["key"] == second["key"]
+    assert (first["X"] != second["X"]).nnz == 0
+    np.testing.assert_array_equal(first["train_idx"], second["train_idx"])
+
+    # evaluate looks the entry up from the *fitted* preprocessor stored in the model
+    design = prep_cache.cached_design(second["prep"], df, "CASE_STATUS_BIN", NUM + CAT, root=tmp_path)
+    assert design is not None and design.shape == first["X"].shape
+    changed = df.assign(WAGE_RATE=df["WAGE_RATE"] + 1)
+    assert prep_cache.cached_design(second["prep"], changed, "CASE_STATUS_BIN", NUM + CAT, root=tmp_path) is None
+
+
+def test_lru_eviction_keeps_most_recent_entries(tmp_path, monkeypatch):
+    monkeypatch.setenv("PREP_CACHE_MAX_ENTRIES", "2")
+    pre = build_pipeline(NUM, CAT).named_steps["prep"]
+    keys = [prep_cache.fit_or_load(pre, _frame(seed=s), "CASE_STATUS_BIN", NUM + CAT, root=tmp_path)["key"]
+            for s in range(3)]
+    assert sorted(d.name for d in tmp_path.iterdir()) == sorted(keys[1:])
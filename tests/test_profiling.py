@@ -0,0 +1,67 @@
+import json
+
+from src import profiling
+
+
+def _setup(tmp_path, monkeypatch, **env):
+    monkeypatch.setattr(profiling, "OUT", tmp_path / "profiles")
+    monkeypatch.setattr(profiling, "_log_mlflow", lambda *a: None)
+    for k, v in env.items():
+        monkeypatch.setenv(k, v)
+
+
+def test_disabled_is_a_passthrough(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    monkeypatch.delenv("PROFILE", raising=False)
+    stage = profiling.profile_stage("demo")(profiling.profiled("demo.hot")(lambda x: x + 1))
+    assert stage(1) == 2
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_stage_records_sections_allocations_and_cprofile(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch, PROFILE="1", PROFILE_TRACEMALLOC="1", PROFILE_CPROFILE="1")
+    logged = []
+    monkeypatch.setattr(profiling, "_log_mlflow", lambda stage, report, files, model_run: logged.append(
+        (stage, sorted(f.name for f in files), model_run)))
+
+    @profiling.profiled("demo.alloc")
+    def alloc(n):
+        return [bytes(1024) for _ in range(n)]
+
+    @profiling.profile_stage("demo", model_run=True)
+    def main():
+        for _ in range(3):
+            alloc(2000)
+        with profiling.section("demo.small"):
+            alloc(10)
+        return 0
+
+    assert main() == 0
+    report = json.loads((tmp_path / "profiles" / "demo.json").read_text())
+    secs = report["sections"]
+    assert secs["demo.alloc"]["calls"] == 4 and secs["demo"]["calls"] == 1
+    assert secs["demo"]["wall_s"] >= secs["demo.alloc"]["wall_s"]
+    # ~2 MB per call; the nested peak propagates up to the enclosing sections
+    assert secs["demo.alloc"]["traced_peak_mb"] > 1.5
+    assert secs["demo"]["traced_peak_mb"] >= secs["demo.alloc"]["traced_peak_mb"]
+    assert secs["demo.small"]["traced_peak_mb"] < 1
+    assert report["top_allocations"]["demo.alloc"]
+    assert "cumulative" in (tmp_path / "profiles" / "demo.cprofile.txt").read_text()
+    assert logged == [("demo", ["demo.cprofile.txt", "demo.json", "demo.prof"], True)]
+
+
+def test_failed_stage_is_still_reported_but_not_attached_to_the_model_run(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch, PROFILE="1")
+    logged = []
+    monkeypatch.setattr(profiling, "_log_mlflow", lambda stage, report, files, model_run: logged.append(model_run))
+
+    @profiling.profile_stage("broken", model_run=True)
+    def main():
+        raise ValueError("boom")
+
+    try:
+        main()
+    except ValueError:
+        pass
+    assert json.loads((tmp_path / "profiles" / "broken.json").read_text())["sections"]["broken"]["calls"] == 1
+    assert logged == [False]
@@ -0,0 +1,116 @@
+import hashlib
+import http.server
+import threading
+
+import pytest
+
+from src.data import raw_cache
+
+BODY = b"CASE_STATUS,WAGE_RATE\n" + b"CERTIFIED,100000\n" * 5000
+ETAG = '"v1"'
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        self.hits.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = 0
+        rng = self.headers.get("Range")
+        if rng and self.headers.get("If-Range") == ETAG:
+            start = int(rng.split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(BODY) - 1}/{len(BODY)}")
+        else:
+            self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(BODY) - start))
+        self.end_headers()
+        self.wfile.write(BODY[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    _Handler.hits.clear()
+    yield f"http://127.0.0.1:{srv.server_port}/LCA_FY2024.csv"
+    srv.shutdown()
+
+
+def test_conditional_fetch_reuses_content_addressed_object(tmp_path, url):
+    first = raw_cache.fetch(url, root=tmp_path)
+    assert not first["from_cache"]
+    assert first["sha256"] == hashlib.sha256(BODY).hexdigest()
+    assert first["path"].name == f"{first['sha256']}.csv"
+
+    second = raw_cache.fetch(url, root=tmp_path)
+    assert second["from_cache"] and second["path"] == first["path"]
+    assert _Handler.hits[-1]["If-None-Match"] == ETAG
+
+
+def test_interrupted_download_resumes_with_range(tmp_path, url):
+    _, partial = raw_cache._dirs(tmp_path)
+    key = hashlib.sha1(url.encode()).hexdigest()
+    (partial / f"{key}.part").write_bytes(BODY[:1000])
+    (partial / f"{key}.json").write_text('{"etag": "\\"v1\\"", "last_modified": null}')
+
+    got = raw_cache.fetch(url, root=tmp_path)
+    assert _Handler.hits[-1]["Range"] == "bytes=1000-"
+    assert got["path"].read_bytes() == BODY
+    assert got["sha256"] == hashlib.sha256(BODY).hexdigest()
+
+
+class _Response:
+    def __init__(self, status, body=b"", headers=None):
+        self.status_code, self.body, self.headers = status, body, headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise AssertionError(f"HTTP {self.status_code} reached raise_for_status")
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _RangeRefusingSession:
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(dict(headers or {}))
+        if "Range" in (headers or {}):
+            return _Response(416)
+        return _Response(200, BODY, {"ETag": ETAG})
+
+
+def test_rejected_resume_discards_partial_and_retries_plain_get(tmp_path):
+    url = "https://www.dol.gov/files/LCA_FY2024.csv"
+    _, partial = raw_cache._dirs(tmp_path)
+    key = hashlib.sha1(url.encode()).hexdigest()
+    (partial / f"{key}.part").write_bytes(BODY)  # already complete: the server answers 416
+    (partial / f"{key}.json").write_text('{"etag": "\\"v1\\"", "last_modified": null}')
+
+    session = _RangeRefusingSession()
+    got = raw_cache.fetch(url, root=tmp_path, session=session)
+    assert [("Range" in h) for h in session.requests] == [True, False]
+    assert got["path"].read_bytes() == BODY and not list(partial.iterdir())
+
+    raw_cache.fetch(url, root=tmp_path, session=session)  # nothing stale left to resume
+    assert "Range" not in session.requests[-1]
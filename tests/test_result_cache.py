@@ -0,0 +1,58 @@
+from fastapi.testclient import TestClient
+
+from src.serving import app as serving_app
+from src.serving.result_cache import ResultCache
+from src.serving.scoring import CompiledScorer
+
+
+def test_lru_ttl_bucketing_and_model_binding(monkeypatch, row):
+    model, other = object(), object()
+    cache = ResultCache(max_entries=2, ttl=10, wage_bucket=1000)
+    cache.reset(model)
+    assert cache.key({**row, "WAGE_RATE": 100999.0}) == cache.key(row)
+
+    keys = [cache.key({**row, "SOC_CODE": s}) for s in ("11-1011", "13-2011", "15-1252")]
+    assert cache.put_many(model, [(keys[0], 0.1), (keys[1], 0.2)]) == 0
+    assert cache.get_many(model, keys[:1]) == [0.1]  # keys[0] is now most recently used
+    assert cache.put_many(model, [(keys[2], 0.3)]) == 1
+    assert cache.get_many(model, keys) == [0.1, None, 0.3]
+
+    assert cache.get_many(other, keys[:1]) == [None]  # requests on a replaced model bypass the cache
+    assert cache.put_many(other, [(keys[1], 0.9)]) == 0
+
+    clock = [0.0]
+    monkeypatch.setattr("src.serving.result_cache.time.monotonic", lambda: clock[0])
+    cache.put_many(model, [(keys[0], 0.1)])
+    clock[0] = 11.0
+    assert cache.get_many(model, keys[:1]) == [None]
+    assert cache.stats()["expirations"] == 1
+
+    cache.reset(other)
+    assert cache.stats()["size"] == 0 and cache.stats()["invalidations"] == 1
+
+
+def test_app_serves_repeats_from_cache_until_the_model_changes(monkeypatch, spec, row):
+    monkeypatch.setattr(serving_app, "_cache", ResultCache(100, 0))
+    monkeypatch.setattr(serving_app, "_model", None)
+    serving_app._cache.reset(None)
+
+    class Store:
+        generation = 1
+
+    monkeypatch.setattr(serving_app, "_store", Store())
+    first = CompiledScorer(spec(1.0))
+    serving_app._swap(first, None, 0.0)
+    client = TestClient(serving_app.app)
+    calls = []
+    orig = first.proba_many_timed
+    monkeypatch.setattr(first, "proba_many_timed", lambda rows: calls.append(len(rows)) or orig(rows))
+
+    p1 = client.post("/predict", json=row).json()["proba_certified"]
+    out = client.post("/predict/batch", json=[row, {**row, "FULL_TIME_POSITION": "N"}]).json()
+    assert out["results"][0]["proba_certified"] == p1
+    assert calls == [1, 1]  # only the unseen profile reached the model
+    assert serving_app._cache.stats()["hits"] == 1
+
+    Store.generation = 2
+    serving_app._swap(CompiledScorer(spec(3.0)), first, 0.0)
+    assert client.post("/predict", json=row).json()["proba_certified"] > p1
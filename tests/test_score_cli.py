@@ -0,0 +1,60 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models import score
+from src.models.score import score_file
+from src.models.train import build_pipeline, load_cfg
+
+
+def _fit_model(path):
+    cfg, _ = load_cfg()
+    rng = np.random.default_rng(0)
+    n = 600
+    df = pd.DataFrame({
+        "CASE_NUMBER": [f"I-200-{i:05d}" for i in range(n)],
+        "FULL_TIME_POSITION": rng.choice(["Y", "N"], n),
+        "EMPLOYER_STATE": rng.choice(["CA", "TX", "NY"], n),
+        "WORKSITE_STATE": rng.choice(["CA", "TX", "NY"], n),
+        "SOC_CODE": rng.choice(["15-1252", "11-1021"], n),
+        "WAGE_RATE": rng.normal(100000, 20000, n),
+    })
+    y = (df["WAGE_RATE"] > 95000).astype(int)
+    pipe = build_pipeline(cfg["numeric"], cfg["categorical"]).fit(df, y)
+    joblib.dump({"model": pipe}, path)
+    return pipe, df
+
+
+def test_parallel_chunked_scoring_matches_in_memory_predict(tmp_path):
+    pipe, df = _fit_model(tmp_path / "model.joblib")
+    src = tmp_path / "in.csv"
+    df.to_csv(src, index=False)
+
+    stats = score_file(src, tmp_path / "scores.parquet", tmp_path / "model.joblib", chunksize=70, workers=2)
+    out = pd.read_parquet(tmp_path / "scores.parquet")
+
+    assert stats["rows"] == len(df) and stats["rows_per_s"] > 0
+    assert out["row"].tolist() == list(range(len(df)))
+    assert out["CASE_NUMBER"].tolist() == df["CASE_NUMBER"].tolist()
+    np.testing.assert_allclose(out["proba"], pipe.predict_proba(df)[:, 1], atol=1e-12)
+
+
+def test_raw_disclosure_columns_are_normalized_without_dropping_rows(tmp_path):
+    pipe, df = _fit_model(tmp_path / "model.joblib")
+    raw = df.head(20).rename(columns={"SOC_CODE": "SOC CODE", "WAGE_RATE": "WAGE_RATE_OF_PAY_FROM"})
+    raw.loc[0, "SOC CODE"] = None
+    raw.to_csv(tmp_path / "raw.csv", index=False)
+
+    score_file(tmp_path / "raw.csv", tmp_path / "scores.csv", tmp_path / "model.joblib", workers=1)
+    out = pd.read_csv(tmp_path / "scores.csv")
+    assert len(out) == 20 and out["proba"].between(0, 1).all()
+
+
+def test_default_worker_count_is_capped(tmp_path, monkeypatch):
+    _fit_model(tmp_path / "model.joblib")
+    pd.DataFrame({"WAGE_RATE": [1.0]}).to_csv(tmp_path / "in.csv", index=False)
+    monkeypatch.setattr(score.os, "cpu_count", lambda: 64)
+    monkeypatch.setattr(score, "ProcessPoolExecutor", lambda *a, **k: pytest.fail("pool started"))
+    monkeypatch.setattr(score, "DEFAULT_WORKERS", 1)  # cap of 1 scores in-process instead of 64 workers
+    assert score_file(tmp_path / "in.csv", tmp_path / "out.csv", tmp_path / "model.joblib")["workers"] == 1
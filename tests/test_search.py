@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from src.models.search import successive_halving
+from src.models.train import build_pipeline
+
+NUM = ["WAGE_RATE"]
+CAT = ["FULL_TIME_POSITION", "SOC_CODE"]
+
+
+def test_successive_halving_narrows_grid_to_one_candidate():
+    rng = np.random.default_rng(0)
+    n = 2000
+    X = pd.DataFrame({
+        "FULL_TIME_POSITION": rng.choice(["Y", "N"], n),
+        "SOC_CODE": rng.choice(["15-1252", "11-1021"], n),
+        "WAGE_RATE": rng.normal(100000, 20000, n),
+    })
+    y = ((X["FULL_TIME_POSITION"] == "Y") & (X["WAGE_RATE"] > 90000)).astype(int)
+    pre = build_pipeline(NUM, CAT).named_steps["prep"]
+    grid = {"C": [0.001, 0.1, 1.0, 10.0], "class_weight": [None, "balanced"]}
+
+    best, trials = successive_halving(pre, X[:1500], y[:1500], X[1500:], y[1500:], grid,
+                                      n_jobs=2, halving_factor=2, min_resources=0.25)
+
+    rungs = [t["rung"] for t in trials]
+    assert rungs.count(0) == 8 and rungs.count(max(rungs)) == 2
+    assert [t["n_rows"] for t in trials if t["rung"] == max(rungs)] == [1500, 1500]
+    assert best in [t["params"] for t in trials if t["rung"] == max(rungs)]
+    assert max(t["f1_val"] for t in trials) > 0.8
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from src.data import storage
+
+
+def _frame():
+    return pd.DataFrame({
+        "CASE_STATUS": ["CERTIFIED", "DENIED", "CERTIFIED"],
+        "SOC_CODE": ["15-1252", "15-1245", "15-1252"],
+        "WAGE_RATE": [120000.0, None, 95000.5],
+    })
+
+
+def test_parquet_roundtrip_keeps_types_and_falls_back_to_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "PROC", tmp_path)
+    monkeypatch.setenv("PROCESSED_FORMAT", "parquet")
+    assert storage.write_processed(_frame(), "features").suffix == ".parquet"
+    got = storage.read_processed("features", columns=["SOC_CODE", "WAGE_RATE"])
+    assert list(got.columns) == ["SOC_CODE", "WAGE_RATE"]
+    assert got["WAGE_RATE"].dtype == "float64"
+
+    _frame().to_csv(tmp_path / "legacy.csv", index=False)
+    pd.testing.assert_frame_equal(storage.read_processed("legacy"), pd.read_csv(tmp_path / "legacy.csv"))
+
+
+def test_write_chunks_parquet_matches_concat(tmp_path):
+    chunks = [_frame(), _frame().iloc[0:0], _frame().assign(WAGE_RATE=1.0)]
+    out = tmp_path / "lca_labeled.parquet"
+    rows = storage.write_chunks(iter(chunks), out, list(_frame().columns))
+    expected = pd.concat(chunks, ignore_index=True)
+    assert rows == len(expected)
+    pd.testing.assert_frame_equal(pd.read_parquet(out), expected, check_dtype=False)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import SGDClassifier
+
+from src.models.compiled import compile_pipeline
+from src.models.streaming import fit_streaming
+from src.models import train
+from src.models.train import build_pipeline
+
+NUM = ["WAGE_RATE"]
+CAT = ["FULL_TIME_POSITION", "EMPLOYER_STATE", "SOC_CODE"]
+
+
+def _frame(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "FULL_TIME_POSITION": rng.choice(["Y", "N"], n, p=[0.8, 0.2]),
+        "EMPLOYER_STATE": rng.choice(["CA", "TX", "WA", "NY"], n),
+        "SOC_CODE": rng.choice(["15-1252", "15-1245", "11-1021"], n),
+        "WAGE_RATE": rng.normal(110000, 25000, n),
+    })
+    df.loc[::17, "WAGE_RATE"] = np.nan
+    df["CASE_STATUS_BIN"] = ((df["FULL_TIME_POSITION"] == "Y") & (df["WAGE_RATE"].fillna(0) > 85000)).astype(int)
+    return df
+
+
+def test_streaming_fit_matches_batch_preprocessing_and_learns():
+    df = _frame()
+    chunks = lambda: (df.iloc[i:i + 256] for i in range(0, len(df), 256))
+    pipe = build_pipeline(NUM, CAT).set_params(clf=SGDClassifier(loss="log_loss", random_state=0))
+    losses = []
+    pipe, f1 = fit_streaming(pipe, chunks, "CASE_STATUS_BIN", NUM, CAT, epochs=3,
+                             on_epoch=lambda e, loss: losses.append(loss))
+
+    ref = build_pipeline(NUM, CAT).named_steps["prep"].fit(df.drop(columns=["CASE_STATUS_BIN"]))
+    num, ref_num = pipe.named_steps["prep"].named_transformers_["num"], ref.named_transformers_["num"]
+    np.testing.assert_allclose(num.named_steps["imputer"].statistics_, ref_num.named_steps["imputer"].statistics_)
+    np.testing.assert_allclose(num.named_steps["scaler"].mean_, ref_num.named_steps["scaler"].mean_)
+    np.testing.assert_allclose(num.named_steps["scaler"].scale_, ref_num.named_steps["scaler"].scale_)
+
+    assert len(losses) == 3 and f1 > 0.8
+    assert pipe.predict_proba(df.drop(columns=["CASE_STATUS_BIN"]).head(5)).shape == (5, 2)
+    assert compile_pipeline(pipe, NUM, CAT)["categorical"][0]["coef"].keys() == {"N", "Y"}
+
+
+def test_unknown_train_mode_is_rejected_before_training(monkeypatch):
+    monkeypatch.setenv("TRAIN_MODE", "streem")
+    monkeypatch.setattr(train, "TRAINERS", {**train.TRAINERS, "batch": lambda cfg: pytest.fail("batch fit ran")})
+    with pytest.raises(ValueError, match="Unknown training mode 'streem'"):
+        train.main()
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from src.data import validate
+
+CFG = {
+    "columns": [
+        {"name": "CASE_STATUS", "dtype": "string", "isin": ["CERTIFIED", "DENIED"]},
+        {"name": "WORKSITE_STATE", "dtype": "string", "isin": "states"},
+        {"name": "SOC_CODE", "dtype": "string", "pattern": r"^\d{2}-\d{4}$"},
+        {"name": "WAGE_RATE", "dtype": "float", "min": 1000, "max": 500000, "severity": "warn"},
+    ],
+    "domains": {"states": ["CA", "TX"]},
+}
+
+
+def _frame(n):
+    return pd.DataFrame({
+        "CASE_STATUS": ["CERTIFIED"] * n,
+        "WORKSITE_STATE": (["CA", "TX", "ZZ", None] * n)[:n],
+        "SOC_CODE": (["15-1252", "151252"] * n)[:n],
+        "WAGE_RATE": [100000.0] * (n - 1) + [9e9],
+    })
+
+
+def test_chunked_checks_aggregate_capped_failures():
+    rules = validate.compile_rules(CFG)
+    df = _frame(40)
+    chunks = [df.iloc[i:i + 15] for i in range(0, len(df), 15)]
+    report = validate.validate_chunks(chunks, rules, max_samples=3)
+
+    failures = {(f["column"], f["check"]): f for f in report["failures"]}
+    assert report["rows"] == 40 and report["chunks"] == 3 and not report["passed"]
+    assert failures[("WORKSITE_STATE", "isin")]["count"] == 10
+    assert failures[("WORKSITE_STATE", "not_null")]["count"] == 10
+    soc = failures[("SOC_CODE", "pattern")]
+    assert soc["count"] == 20 and soc["values"] == {"151252": 20}
+    assert soc["examples"] == [[1, "151252"], [3, "151252"], [5, "151252"]]  # global row numbers, capped
+    assert failures[("WAGE_RATE", "range")]["severity"] == "warn" and report["warnings"] == 1
+    assert report["errors"] == 40
+
+    assert validate.validate_chunks(chunks, rules, max_samples=3, workers=2)["failures"] == report["failures"]
+
+
+def test_structure_checks_and_inline_observe():
+    rules = validate.compile_rules(CFG)
+    df = _frame(4).drop(columns=["SOC_CODE"]).assign(EXTRA=1, WAGE_RATE="high")
+    failures = validate.check_chunk(df, rules)["failures"]
+    assert {("SOC_CODE", "column_missing"), ("EXTRA", "unexpected_column"), ("WAGE_RATE", "dtype")} <= set(failures)
+
+    good = pd.DataFrame({"CASE_STATUS": ["DENIED"], "WORKSITE_STATE": ["CA"], "SOC_CODE": ["11-1021"], "WAGE_RATE": [5e4]})
+    total = {"rows": 0, "chunks": 0, "failures": {}}
+    passed = list(validate.observe([good, good], rules, total))
+    assert len(passed) == 2 and passed[0] is good
+    assert validate.summarize(total)["passed"] and total["rows"] == 2
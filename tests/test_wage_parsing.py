@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from src.data.ingest import _parse_wage_cols, _parse_wage_frame, normalize_columns
+
+VALUES = ["$120,000.00", "95000", "", None, "45.50", "n/a", "-12", "+3.5e2", "85000 - 90000", ".75"]
+
+
+def test_vectorized_wage_fallback_matches_rowwise():
+    rng = np.random.default_rng(0)
+    n = 400
+    df = pd.DataFrame({
+        "WAGE_RATE_OF_PAY_FROM": rng.choice(VALUES, n),
+        "WAGE_RATE_OF_PAY_TO": rng.choice(VALUES, n),
+        "PREVAILING_WAGE_1": rng.choice(VALUES, n),
+        "EMPLOYER_NAME": rng.choice(["ACME", "1234 LLC"], n),
+    })
+    expected = df.apply(_parse_wage_cols, axis=1)
+    pd.testing.assert_series_equal(_parse_wage_frame(df), expected, check_names=False)
+
+    only_pw = df[["PREVAILING_WAGE_1", "EMPLOYER_NAME"]]
+    pd.testing.assert_series_equal(_parse_wage_frame(only_pw), only_pw.apply(_parse_wage_cols, axis=1), check_names=False)
+
+
+def test_unit_of_pay_is_annualized():
+    df = pd.DataFrame({
+        "CASE_STATUS": ["CERTIFIED"] * 4,
+        "EMPLOYER_STATE": ["CA"] * 4,
+        "WORKSITE_STATE": ["CA"] * 4,
+        "SOC_CODE": ["15-1252"] * 4,
+        "FULL_TIME_POSITION": ["Y"] * 4,
+        "WAGE_RATE_OF_PAY_FROM": ["50", "2000", "10000", "120000"],
+        "WAGE_UNIT_OF_PAY": ["Hour", "Week", "Month", "Year"],
+    })
+    assert normalize_columns(df)["WAGE_RATE"].tolist() == [104000.0, 104000.0, 120000.0, 120000.0]
+
+
+def _base(n):
+    return {"CASE_STATUS": ["CERTIFIED"] * n, "EMPLOYER_STATE": ["CA"] * n, "WORKSITE_STATE": ["CA"] * n,
+            "SOC_CODE": ["15-1252"] * n, "FULL_TIME_POSITION": ["Y"] * n}
+
+
+def test_prevailing_wage_uses_its_own_unit_column():
+    df = pd.DataFrame({**_base(3), "PREVAILING_WAGE": ["50", "10000", "120000"],
+                       "PW_UNIT_OF_PAY": ["Hour", "Month", "Year"],
+                       "WAGE_UNIT_OF_PAY": ["Year", "Year", "Hour"]})  # belongs to the offered wage
+    assert normalize_columns(df)["WAGE_RATE"].tolist() == [104000.0, 120000.0, 120000.0]
+
+    older = df.drop(columns=["WAGE_UNIT_OF_PAY"]).rename(columns={"PW_UNIT_OF_PAY": "PW_WAGE_UNIT_OF_PAY"})
+    assert normalize_columns(older)["WAGE_RATE"].tolist() == [104000.0, 120000.0, 120000.0]
+
+
+def test_fallback_wage_takes_the_unit_of_the_column_it_came_from():
+    df = pd.DataFrame({**_base(2), "WAGE_RATE_OF_PAY_FROM": ["50", ""], "PREVAILING_WAGE_1": ["", "4000"],
+                       "WAGE_UNIT_OF_PAY": ["Hour", "Hour"], "PW_UNIT_OF_PAY": ["Year", "Week"]})
+    assert normalize_columns(df)["WAGE_RATE"].tolist() == [104000.0, 208000.0]